@@ -17,7 +17,7 @@ from app.models.user import User, UserRole
 from app.models.chat import Chat, Message
 from app.models.feedback import Feedback, FeedbackStatus, FeedbackType
 from app.models.component import Component, ComponentCategory
-from app.models.build import Build, BuildRating, BuildComment, BuildView
+from app.models.build import Build, BuildRating, BuildComment, BuildView, BuildStats
 
 
 # this is the Alembic Config object, which provides
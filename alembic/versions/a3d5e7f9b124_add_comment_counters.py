@@ -0,0 +1,53 @@
+"""add_comment_counters
+
+Revision ID: a3d5e7f9b124
+Revises: f1b6d4a8c372
+Create Date: 2025-11-14 12:08:33.517902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d5e7f9b124'
+down_revision = 'f1b6d4a8c372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Денормализованные счетчики комментариев
+    op.add_column('builds', sa.Column('comments_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('build_comments', sa.Column('replies_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем счетчики по текущим комментариям
+    op.execute("""
+        UPDATE builds b
+        SET comments_count = agg.comments_count
+        FROM (
+            SELECT build_id, COUNT(*) AS comments_count
+            FROM build_comments
+            GROUP BY build_id
+        ) agg
+        WHERE agg.build_id = b.id
+    """)
+    op.execute("""
+        UPDATE build_comments c
+        SET replies_count = agg.replies_count
+        FROM (
+            SELECT parent_id, COUNT(*) AS replies_count
+            FROM build_comments
+            WHERE parent_id IS NOT NULL
+            GROUP BY parent_id
+        ) agg
+        WHERE agg.parent_id = c.id
+    """)
+
+    op.create_index('ix_build_comments_parent_id', 'build_comments', ['parent_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_build_comments_parent_id', table_name='build_comments')
+    op.drop_column('build_comments', 'replies_count')
+    op.drop_column('builds', 'comments_count')
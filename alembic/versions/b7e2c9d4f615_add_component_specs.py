@@ -0,0 +1,31 @@
+"""add_component_specs
+
+Revision ID: b7e2c9d4f615
+Revises: a3d5e7f9b124
+Create Date: 2025-11-16 09:41:27.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c9d4f615'
+down_revision = 'a3d5e7f9b124'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Характеристики компонентов, извлеченные из названий
+    # (заполняются после парсинга и при старте приложения)
+    op.add_column('components', sa.Column('specs', postgresql.JSONB(), nullable=True))
+
+    # Поиск по характеристикам: specs @> '{"socket": "AM5"}'
+    op.execute("CREATE INDEX ix_components_specs ON components USING gin (specs jsonb_path_ops)")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_components_specs', table_name='components')
+    op.drop_column('components', 'specs')
@@ -0,0 +1,50 @@
+"""add_build_rating_aggregates
+
+Revision ID: c4a1f2e9d3b5
+Revises: 88b331115fb1
+Create Date: 2025-11-10 12:14:37.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a1f2e9d3b5'
+down_revision = '88b331115fb1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Денормализованные агрегаты оценок
+    op.add_column('builds', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('builds', sa.Column('ratings_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем агрегаты по уже существующим оценкам
+    op.execute("""
+        UPDATE builds b
+        SET rating_sum = agg.rating_sum,
+            ratings_count = agg.ratings_count
+        FROM (
+            SELECT build_id, SUM(score) AS rating_sum, COUNT(id) AS ratings_count
+            FROM build_ratings
+            GROUP BY build_id
+        ) agg
+        WHERE agg.build_id = b.id
+    """)
+
+    # Индекс по выражению среднего рейтинга (должен совпадать с Build.average_rating)
+    op.execute("""
+        CREATE INDEX ix_builds_average_rating ON builds (
+            (CASE WHEN ratings_count > 0 THEN CAST(rating_sum AS FLOAT) / ratings_count ELSE 0.0 END),
+            ratings_count,
+            created_at
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_builds_average_rating', table_name='builds')
+    op.drop_column('builds', 'ratings_count')
+    op.drop_column('builds', 'rating_sum')
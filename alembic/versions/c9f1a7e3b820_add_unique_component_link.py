@@ -0,0 +1,52 @@
+"""add_unique_component_link
+
+Revision ID: c9f1a7e3b820
+Revises: b7e2c9d4f615
+Create Date: 2025-11-18 14:05:52.631940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f1a7e3b820'
+down_revision = 'b7e2c9d4f615'
+branch_labels = None
+depends_on = None
+
+
+# Компонент с наименьшим ID для каждой ссылки, сохраненной несколько раз
+DUPLICATE_LINKS = """
+    SELECT link, min(id) AS keep_id
+    FROM components
+    GROUP BY link
+    HAVING count(*) > 1
+"""
+
+
+def upgrade() -> None:
+    # Дубликаты (один товар, сохраненный несколькими парсингами) сводятся
+    # к одному компоненту: связи сборок переносятся на него, остальные
+    # строки удаляются (их связи удаляются каскадно)
+    op.execute(f"""
+        INSERT INTO build_components (build_id, component_id)
+        SELECT bc.build_id, duplicates.keep_id
+        FROM build_components bc
+        JOIN components c ON c.id = bc.component_id
+        JOIN ({DUPLICATE_LINKS}) duplicates ON duplicates.link = c.link
+        WHERE c.id <> duplicates.keep_id
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute(f"""
+        DELETE FROM components c
+        USING ({DUPLICATE_LINKS}) duplicates
+        WHERE c.link = duplicates.link AND c.id <> duplicates.keep_id
+    """)
+
+    # Ключ синхронизации каталога: INSERT ... ON CONFLICT (link)
+    op.create_index('ix_components_link', 'components', ['link'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_components_link', table_name='components')
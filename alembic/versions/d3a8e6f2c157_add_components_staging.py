@@ -0,0 +1,45 @@
+"""add_components_staging
+
+Revision ID: d3a8e6f2c157
+Revises: c9f1a7e3b820
+Create Date: 2025-11-19 11:23:08.417356
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8e6f2c157'
+down_revision = 'c9f1a7e3b820'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Товары, пропавшие из магазина, помечаются недоступными вместо удаления
+    op.add_column(
+        'components',
+        sa.Column('is_available', sa.Boolean(), nullable=False, server_default=sa.true())
+    )
+
+    # Результаты парсинга до переноса в components одной транзакцией.
+    # Данные временные и восстанавливаются повторным парсингом, поэтому
+    # таблица не пишется в WAL
+    op.create_table(
+        'components_staging',
+        sa.Column('link', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('price', sa.Integer(), nullable=True),
+        sa.Column('image', sa.Text(), nullable=True),
+        sa.Column('category', postgresql.ENUM(name='componentcategory', create_type=False), nullable=False),
+        sa.Column('specs', postgresql.JSONB(), nullable=True),
+        sa.PrimaryKeyConstraint('link'),
+        prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('components_staging')
+    op.drop_column('components', 'is_available')
@@ -0,0 +1,41 @@
+"""add_build_total_price
+
+Revision ID: d82b7c5e1f04
+Revises: c4a1f2e9d3b5
+Create Date: 2025-11-11 18:42:09.274311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd82b7c5e1f04'
+down_revision = 'c4a1f2e9d3b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Сохраненная стоимость сборки
+    op.add_column('builds', sa.Column('total_price', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем стоимость по текущим ценам компонентов
+    op.execute("""
+        UPDATE builds b
+        SET total_price = agg.total_price
+        FROM (
+            SELECT bc.build_id, COALESCE(SUM(c.price), 0) AS total_price
+            FROM build_components bc
+            JOIN components c ON c.id = bc.component_id
+            GROUP BY bc.build_id
+        ) agg
+        WHERE agg.build_id = b.id
+    """)
+
+    op.create_index('ix_builds_total_price', 'builds', ['total_price'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_builds_total_price', table_name='builds')
+    op.drop_column('builds', 'total_price')
@@ -0,0 +1,35 @@
+"""add_build_view_flushes
+
+Revision ID: e4b7c1f9a263
+Revises: d3a8e6f2c157
+Create Date: 2025-11-20 09:42:17.206841
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c1f9a263'
+down_revision = 'd3a8e6f2c157'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Токены переносов просмотров из Redis, уже записанных в БД
+    op.create_table(
+        'build_view_flushes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token')
+    )
+    op.create_index(op.f('ix_build_view_flushes_id'), 'build_view_flushes', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_build_view_flushes_id'), table_name='build_view_flushes')
+    op.drop_table('build_view_flushes')
@@ -0,0 +1,40 @@
+"""add_build_full_text_search
+
+Revision ID: e5f3a9c2b716
+Revises: d82b7c5e1f04
+Create Date: 2025-11-12 10:05:51.930127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f3a9c2b716'
+down_revision = 'd82b7c5e1f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Расширение для триграммного поиска по неполным словам
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Сгенерированный tsvector по названию, описанию и дополнительной информации
+    op.execute("""
+        ALTER TABLE builds ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(additional_info, '')), 'C')
+        ) STORED
+    """)
+
+    op.execute("CREATE INDEX ix_builds_search_vector ON builds USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_builds_title_trgm ON builds USING gin (title gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_builds_title_trgm', table_name='builds')
+    op.drop_index('ix_builds_search_vector', table_name='builds')
+    op.drop_column('builds', 'search_vector')
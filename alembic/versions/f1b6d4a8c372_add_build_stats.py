@@ -0,0 +1,48 @@
+"""add_build_stats
+
+Revision ID: f1b6d4a8c372
+Revises: e5f3a9c2b716
+Create Date: 2025-11-13 10:27:51.604218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b6d4a8c372'
+down_revision = 'e5f3a9c2b716'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Сводная статистика по сборкам (одна строка со счетчиками)
+    op.create_table(
+        'build_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('total_builds', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_ratings', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_comments', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_build_stats_id'), 'build_stats', ['id'], unique=False)
+
+    # Заполняем счетчики по текущим данным
+    op.execute("""
+        INSERT INTO build_stats (id, total_builds, total_ratings, total_comments, rating_sum)
+        SELECT
+            1,
+            (SELECT COUNT(*) FROM builds),
+            (SELECT COUNT(*) FROM build_ratings),
+            (SELECT COUNT(*) FROM build_comments),
+            (SELECT COALESCE(SUM(score), 0) FROM build_ratings)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_build_stats_id'), table_name='build_stats')
+    op.drop_table('build_stats')
@@ -60,6 +60,20 @@ class Settings(BaseSettings):
     # Celery (опционально, используется только в celery workers)
     celery_backend_url: Optional[str] = None
     
+    # Дисковый кеш PDF сборок
+    pdf_cache_dir: str = "cache/pdf"
+    pdf_cache_max_mb: int = 200
+    
+    # Пул процессов для верстки PDF
+    pdf_render_workers: int = 2
+    pdf_render_queue_size: int = 8
+    
+    # Загрузка изображений компонентов для PDF
+    pdf_thumbnail_cache_dir: str = "cache/thumbnails"
+    pdf_thumbnail_cache_max_mb: int = 100
+    pdf_image_fetch_concurrency: int = 8
+    pdf_image_timeout_seconds: float = 5.0
+    
     # SMTP для отправки email
     smtp_host: Optional[str] = None
     smtp_port: Optional[int] = None
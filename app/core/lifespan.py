@@ -9,7 +9,14 @@ from fastapi import FastAPI
 from app.services.background_tasks import (
     cleanup_cache_task,
     cleanup_auth_tokens_task,
-    check_pending_payments_task
+    check_pending_payments_task,
+    flush_build_views_task,
+    flush_build_views,
+    refresh_build_stats_task,
+    component_catalog_listener_task,
+    build_similarity_index_task,
+    build_leaderboard_task,
+    build_trending_task
 )
 
 logger = logging.getLogger(__name__)
@@ -39,10 +46,38 @@ async def lifespan(app: FastAPI):
         logger.error(f"Ошибка при инициализации RabbitMQ: {e}")
         logger.warning("Приложение будет работать без RabbitMQ")
     
+    # Загрузка шрифтов, логотипа и стилей PDF, чтобы первый экспорт не ждал их
+    try:
+        from app.services.pdf_assets import warmup_pdf_assets
+        await asyncio.to_thread(warmup_pdf_assets)
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке ресурсов PDF: {e}")
+    
+    # Досчитываем характеристики компонентов (после миграции или смены правил извлечения)
+    # и загружаем снимок каталога (иначе загрузится при первом запросе)
+    try:
+        from app.database import AsyncSessionLocal
+        from app.repositories.component_repository import ComponentRepository
+        from app.services.component_catalog import component_catalog
+        async with AsyncSessionLocal() as db:
+            updated_specs = await ComponentRepository(db).refresh_specs()
+            if updated_specs:
+                await db.commit()
+                logger.info(f"Обновлены характеристики компонентов: {updated_specs}")
+            await component_catalog.reload(db)
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке каталога компонентов: {e}")
+    
     # Запуск фоновых задач
     cleanup_task = asyncio.create_task(cleanup_cache_task())
     cleanup_tokens_task = asyncio.create_task(cleanup_auth_tokens_task())
     check_payments_task = asyncio.create_task(check_pending_payments_task())
+    flush_views_task = asyncio.create_task(flush_build_views_task())
+    stats_task = asyncio.create_task(refresh_build_stats_task())
+    catalog_task = asyncio.create_task(component_catalog_listener_task())
+    similarity_task = asyncio.create_task(build_similarity_index_task())
+    leaderboard_task = asyncio.create_task(build_leaderboard_task())
+    trending_task = asyncio.create_task(build_trending_task())
     
     yield
     
@@ -50,6 +85,12 @@ async def lifespan(app: FastAPI):
     cleanup_task.cancel()
     cleanup_tokens_task.cancel()
     check_payments_task.cancel()
+    flush_views_task.cancel()
+    stats_task.cancel()
+    catalog_task.cancel()
+    similarity_task.cancel()
+    leaderboard_task.cancel()
+    trending_task.cancel()
     
     # Ожидание завершения задач
     try:
@@ -67,6 +108,50 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
     
+    try:
+        await flush_views_task
+    except asyncio.CancelledError:
+        pass
+    
+    try:
+        await stats_task
+    except asyncio.CancelledError:
+        pass
+    
+    try:
+        await catalog_task
+    except asyncio.CancelledError:
+        pass
+    
+    try:
+        await similarity_task
+    except asyncio.CancelledError:
+        pass
+    
+    try:
+        await leaderboard_task
+    except asyncio.CancelledError:
+        pass
+    
+    try:
+        await trending_task
+    except asyncio.CancelledError:
+        pass
+    
+    # Записываем оставшиеся в буфере просмотры до закрытия Redis
+    try:
+        await flush_build_views()
+    except Exception as e:
+        logger.error(f"Ошибка при записи просмотров сборок: {e}")
+    
+    # Остановка пула верстки PDF и закрытие HTTP-сессии загрузки изображений
+    try:
+        from app.dependencies.services import get_pdf_render_pool, close_pdf_generator
+        await close_pdf_generator()
+        get_pdf_render_pool().shutdown()
+    except Exception as e:
+        logger.error(f"Ошибка при остановке пула верстки PDF: {e}")
+    
     # Закрытие Redis соединения
     try:
         from app.dependencies.services import get_redis_service
@@ -38,7 +38,10 @@ from .services import (
     get_component_parser_service,
     get_yookassa_service,
     get_shop_parser,
-    get_pdf_generator
+    get_pdf_generator,
+    get_pdf_cache,
+    get_pdf_render_pool,
+    get_thumbnail_cache
 )
 
 # Импорты из auth
@@ -83,6 +86,9 @@ __all__ = [
     "get_yookassa_service",
     "get_shop_parser",
     "get_pdf_generator",
+    "get_pdf_cache",
+    "get_pdf_render_pool",
+    "get_thumbnail_cache",
     
     # Auth
     "get_current_user",
@@ -17,6 +17,11 @@ from app.services.component_parser import ComponentParserService
 from app.services.yookassa_service import YooKassaService
 from app.services.shop_parser import ShopParser
 from app.services.pdf_generator import PDFGenerator
+from app.services.pdf_cache import PDFCache
+from app.services.pdf_render_pool import PDFRenderPool
+from app.services.pdf_assets import warmup_pdf_assets
+from app.services.thumbnail_cache import ThumbnailCache
+from app.config import settings
 from .repositories import (
     get_user_repository,
     get_build_repository,
@@ -49,13 +54,20 @@ __all__ = [
     "get_component_parser_service",
     "get_yookassa_service",
     "get_shop_parser",
-    "get_pdf_generator"
+    "get_pdf_generator",
+    "get_pdf_cache",
+    "get_pdf_render_pool",
+    "get_thumbnail_cache"
 ]
 
 
 # Singleton экземпляры для сервисов, которые должны быть глобальными
 _redis_service: RedisService | None = None
 _rabbitmq_service: RabbitMQService | None = None
+_pdf_cache: PDFCache | None = None
+_pdf_render_pool: PDFRenderPool | None = None
+_thumbnail_cache: ThumbnailCache | None = None
+_pdf_generator: PDFGenerator | None = None
 
 
 def get_redis_service() -> RedisService:
@@ -135,18 +147,79 @@ def get_auth_service(
 
 def get_pdf_generator() -> PDFGenerator:
     """
-    Получить экземпляр PDFGenerator
+    Получить экземпляр PDFGenerator (singleton)
     
     Returns:
         PDFGenerator: Экземпляр генератора PDF
     """
-    return PDFGenerator()
+    global _pdf_generator
+    if _pdf_generator is None:
+        _pdf_generator = PDFGenerator(
+            render_pool=get_pdf_render_pool(),
+            thumbnail_cache=get_thumbnail_cache(),
+            image_concurrency=settings.pdf_image_fetch_concurrency,
+            image_timeout=settings.pdf_image_timeout_seconds
+        )
+    return _pdf_generator
+
+
+async def close_pdf_generator() -> None:
+    """Закрыть HTTP-сессию генератора PDF, если он был создан"""
+    if _pdf_generator is not None:
+        await _pdf_generator.close()
+
+
+def get_pdf_render_pool() -> PDFRenderPool:
+    """
+    Получить экземпляр PDFRenderPool (singleton)
+    
+    Returns:
+        PDFRenderPool: Пул процессов для верстки PDF
+    """
+    global _pdf_render_pool
+    if _pdf_render_pool is None:
+        _pdf_render_pool = PDFRenderPool(
+            settings.pdf_render_workers,
+            settings.pdf_render_queue_size,
+            initializer=warmup_pdf_assets
+        )
+    return _pdf_render_pool
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """
+    Получить экземпляр ThumbnailCache (singleton)
+    
+    Returns:
+        ThumbnailCache: Дисковый кеш миниатюр изображений для PDF
+    """
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = ThumbnailCache(
+            settings.pdf_thumbnail_cache_dir,
+            settings.pdf_thumbnail_cache_max_mb * 1024 * 1024
+        )
+    return _thumbnail_cache
+
+
+def get_pdf_cache() -> PDFCache:
+    """
+    Получить экземпляр PDFCache (singleton)
+    
+    Returns:
+        PDFCache: Дисковый кеш PDF сборок
+    """
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = PDFCache(settings.pdf_cache_dir, settings.pdf_cache_max_mb * 1024 * 1024)
+    return _pdf_cache
 
 
 def get_build_service(
     build_repo: BuildRepository = Depends(get_build_repository),
     redis_service: RedisService = Depends(get_redis_service),
-    pdf_generator: PDFGenerator = Depends(get_pdf_generator)
+    pdf_generator: PDFGenerator = Depends(get_pdf_generator),
+    pdf_cache: PDFCache = Depends(get_pdf_cache)
 ) -> BuildService:
     """
     Получить экземпляр BuildService
@@ -155,11 +228,12 @@ def get_build_service(
         build_repo: Репозиторий сборок
         redis_service: Сервис Redis
         pdf_generator: Генератор PDF
+        pdf_cache: Дисковый кеш PDF
         
     Returns:
         BuildService: Экземпляр сервиса сборок
     """
-    return BuildService(build_repo, redis_service, pdf_generator)
+    return BuildService(build_repo, redis_service, pdf_generator, pdf_cache=pdf_cache)
 
 
 def get_chat_service(
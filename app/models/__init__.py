@@ -1,11 +1,11 @@
 from .user import User
 from .chat import Chat, Message
 from .feedback import Feedback
-from .build import Build, BuildRating, BuildComment, BuildView
+from .build import Build, BuildRating, BuildComment, BuildView, BuildViewFlush, BuildStats
 from .component import Component, ComponentCategory
 from .balance import Balance, Transaction, TransactionType, TransactionStatus
 
-__all__ = ["User", "Chat", "Message", "Feedback", "Build", "BuildRating", "BuildComment", "BuildView", "Component", "ComponentCategory", "Balance", "Transaction", "TransactionType", "TransactionStatus"]
+__all__ = ["User", "Chat", "Message", "Feedback", "Build", "BuildRating", "BuildComment", "BuildView", "BuildViewFlush", "BuildStats", "Component", "ComponentCategory", "Balance", "Transaction", "TransactionType", "TransactionStatus"]
 
 
 
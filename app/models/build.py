@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, Float, CheckConstraint, Index, Table
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Float, CheckConstraint, Index, Table, case, cast, literal_column
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from app.models.base import BaseModel
 
 
@@ -25,35 +26,57 @@ class Build(BaseModel):
     author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     views_count = Column(Integer, default=0, nullable=False)
     
+    # Денормализованные агрегаты оценок (поддерживаются BuildRepository при записи оценок)
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    ratings_count = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    # Сохраненная стоимость сборки (сумма цен компонентов, пересчитывается BuildRepository)
+    total_price = Column(Integer, default=0, server_default="0", nullable=False, index=True)
+    
+    # Денормализованное количество комментариев (вместе с ответами)
+    comments_count = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Связи
     author = relationship("User", back_populates="builds")
     ratings = relationship("BuildRating", back_populates="build", cascade="all, delete-orphan")
     comments = relationship("BuildComment", back_populates="build", cascade="all, delete-orphan")
-    components = relationship("Component", secondary=build_components, lazy="selectin")
+    # Компоненты загружаются явно (selectinload) только там, где нужен полный граф сборки
+    components = relationship("Component", secondary=build_components)
 
     # Индексы для быстрого поиска
+    # (search_vector tsvector с GIN и триграммный индекс по title создаются миграцией только в PostgreSQL)
     __table_args__ = (
         Index('ix_builds_author_created', 'author_id', 'created_at'),
     )
 
-    @property
+    @hybrid_property
     def average_rating(self):
-        """Вычисляет средний рейтинг сборки"""
-        if not self.ratings:
+        """Средний рейтинг сборки по денормализованным агрегатам"""
+        if not self.ratings_count:
             return 0.0
-        return sum(r.score for r in self.ratings) / len(self.ratings)
-
-    @property
-    def ratings_count(self):
-        """Возвращает количество оценок"""
-        return len(self.ratings) if self.ratings else 0
-
-    @property
-    def total_price(self):
-        """Вычисляет общую стоимость сборки из суммы цен компонентов"""
-        if not self.components:
-            return 0.0
-        return sum(component.price or 0 for component in self.components)
+        return (self.rating_sum or 0) / self.ratings_count
+
+    @average_rating.expression
+    def average_rating(cls):
+        """SQL-выражение среднего рейтинга (совпадает с выражением индекса ix_builds_average_rating)"""
+        # Литералы вместо bind-параметров: иначе планировщик не сопоставит выражение с индексом
+        return case(
+            (
+                cls.ratings_count > literal_column("0"),
+                cast(cls.rating_sum, Float).op("/", return_type=Float)(cls.ratings_count)
+            ),
+            else_=literal_column("0.0", Float)
+        )
+
+
+# Индекс по выражению среднего рейтинга: сортировка по рейтингу и топ сборок
+# выполняются сканированием индекса без агрегации по build_ratings
+Index(
+    'ix_builds_average_rating',
+    Build.average_rating,
+    Build.ratings_count,
+    Build.created_at,
+)
 
 
 class BuildRating(BaseModel):
@@ -83,6 +106,8 @@ class BuildComment(BaseModel):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
     parent_id = Column(Integer, ForeignKey("build_comments.id", ondelete="CASCADE"), nullable=True)  # Для ответов на комментарии
+    # Денормализованное количество ответов (только у корневых комментариев)
+    replies_count = Column(Integer, default=0, server_default="0", nullable=False)
 
     # Связи
     build = relationship("Build", back_populates="comments")
@@ -93,6 +118,8 @@ class BuildComment(BaseModel):
     # Индексы
     __table_args__ = (
         Index('ix_build_comments_build_created', 'build_id', 'created_at'),
+        # Постраничная выдача ответов комментария
+        Index('ix_build_comments_parent_id', 'parent_id', 'id'),
     )
 
 
@@ -113,3 +140,33 @@ class BuildView(BaseModel):
     )
 
 
+
+
+class BuildViewFlush(BaseModel):
+    """Перенос буферизованных просмотров, уже записанный в БД
+
+    Токен переноса вставляется в той же транзакции, что и приращения
+    views_count, поэтому повторный перенос того же буфера (после сбоя
+    между записью в БД и очисткой Redis) распознается и не применяется.
+    """
+    __tablename__ = "build_view_flushes"
+
+    token = Column(String(32), nullable=False, unique=True)
+
+
+class BuildStats(BaseModel):
+    """Сводная статистика по сборкам (одна строка, поддерживается счетчиками)
+
+    Счетчики изменяются в тех же транзакциях, что и сборки, оценки
+    и комментарии, поэтому статистика читается одним запросом по первичному ключу.
+    """
+    __tablename__ = "build_stats"
+
+    total_builds = Column(Integer, default=0, server_default="0", nullable=False)
+    total_ratings = Column(Integer, default=0, server_default="0", nullable=False)
+    total_comments = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+# ID единственной строки build_stats
+BUILD_STATS_ID = 1
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, Enum, Text
+from sqlalchemy import Column, String, Integer, Enum, Text, JSON, Boolean, Table, true
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 import enum
 from app.models.base import BaseModel
@@ -22,8 +23,29 @@ class Component(BaseModel):
     __tablename__ = "components"
 
     name = Column(String, nullable=False, index=True)
-    link = Column(String, nullable=False)
+    # Ссылка на товар в магазине — ключ синхронизации каталога (INSERT ... ON CONFLICT (link))
+    link = Column(String, nullable=False, unique=True, index=True)
     price = Column(Integer, nullable=True)
     image = Column(Text, nullable=True)
     category = Column(Enum(ComponentCategory), nullable=False, index=True)
+    # Характеристики, извлеченные из названия (сокет, тип памяти, форм-фактор, TDP, мощность БП).
+    # В PostgreSQL — JSONB с GIN-индексом ix_components_specs (создается только миграцией)
+    specs = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    # Товар пропал из магазина при последней полной синхронизации. Такие компоненты
+    # не удаляются (на них ссылаются сборки), но не попадают в снимок каталога
+    is_available = Column(Boolean, nullable=False, default=True, server_default=true())
 
+
+# Промежуточная таблица полной синхронизации каталога: результаты парсинга
+# копятся здесь и переносятся в components одной транзакцией.
+# В PostgreSQL — UNLOGGED (создается миграцией)
+components_staging = Table(
+    "components_staging",
+    BaseModel.metadata,
+    Column("link", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("price", Integer, nullable=True),
+    Column("image", Text, nullable=True),
+    Column("category", Enum(ComponentCategory), nullable=False),
+    Column("specs", JSON().with_variant(JSONB(), "postgresql"), nullable=True),
+)
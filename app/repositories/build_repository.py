@@ -1,14 +1,21 @@
+import re
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_, desc, update, insert, delete
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func, or_, and_, desc, update, insert, delete, literal, literal_column, tuple_, bindparam, text, String, Float, cast
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import IntegrityError
-from typing import Optional, List, TYPE_CHECKING
-from app.models.build import Build, BuildRating, BuildComment, BuildView, build_components
+from typing import Optional, List, Dict, Any, Tuple, Iterable, TYPE_CHECKING
+from app.models.build import Build, BuildRating, BuildComment, BuildView, BuildViewFlush, BuildStats, BUILD_STATS_ID, build_components
 from app.models.component import Component, ComponentCategory
+from app.models.user import User
 from app.schemas.build import BuildCreate, BuildUpdate, BuildRatingCreate, BuildCommentCreate
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.component_catalog import component_catalog
+from app.services.component_specs import check_compatibility
 
 if TYPE_CHECKING:
-    from app.services.redis_service import RedisService
+    from app.services.view_counter import ViewCounter
 
 # Обязательные категории компонентов для сборки
 REQUIRED_CATEGORIES = {
@@ -27,6 +34,15 @@ STORAGE_CATEGORIES = {
     ComponentCategory.ZHESTKIE_DISKI,
 }
 
+# Полнотекстовый поиск (только PostgreSQL): сгенерированная колонка builds.search_vector
+# с GIN-индексом создается миграцией и не отображается в модели
+FTS_CONFIG = "russian"
+BUILD_SEARCH_VECTOR = literal_column("builds.search_vector")
+
+# Сколько хранятся токены записанных переносов просмотров: прерванный
+# перенос повторяется при следующем запуске фоновой задачи
+VIEW_FLUSH_TOKEN_TTL = timedelta(days=1)
+
 # Русские названия категорий для сообщений об ошибках
 CATEGORY_NAMES = {
     ComponentCategory.PROCESSORY: "Процессор",
@@ -43,17 +59,20 @@ CATEGORY_NAMES = {
 
 def validate_component_categories(components: List[Component]) -> None:
     """Проверяет, что сборка содержит все обязательные категории компонентов"""
+    validate_categories([comp.category for comp in components])
+
+
+def validate_categories(categories: Iterable[ComponentCategory]) -> None:
+    """Проверяет, что категории компонентов сборки покрывают все обязательные"""
     from fastapi import HTTPException, status
     
-    if not components:
+    component_categories = set(categories)
+    if not component_categories:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Сборка должна содержать хотя бы один компонент"
         )
     
-    # Получаем набор категорий из переданных компонентов
-    component_categories = {comp.category for comp in components}
-    
     # Проверяем обязательные категории
     missing_categories = REQUIRED_CATEGORIES - component_categories
     if missing_categories:
@@ -80,6 +99,100 @@ class BuildRepository:
     
     # === Методы для Build ===
     
+    def _is_postgresql(self) -> bool:
+        """Проверить, что сессия работает с PostgreSQL"""
+        return self.db.bind is not None and self.db.bind.dialect.name == "postgresql"
+    
+    @staticmethod
+    def _build_prefix_tsquery(query: str) -> Optional[str]:
+        """Собрать префиксный tsquery ('слово:* & слово:*') из пользовательского запроса"""
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return None
+        return " & ".join(f"{word}:*" for word in words)
+    
+    def _search_condition(self, query: str):
+        """Условие поиска по тексту и выражение релевантности
+        
+        В PostgreSQL используется полнотекстовый поиск по search_vector (GIN)
+        с префиксным tsquery, а для неполных слов и опечаток - триграммное
+        сравнение с названием (word_similarity, GIN gin_trgm_ops).
+        В остальных СУБД - ILIKE по названию и описанию.
+        
+        Returns:
+            Кортеж (условие, выражение релевантности или None)
+        """
+        if not self._is_postgresql():
+            condition = or_(
+                Build.title.ilike(f"%{query}%"),
+                Build.description.ilike(f"%{query}%"),
+                Build.additional_info.ilike(f"%{query}%")
+            )
+            return condition, None
+        
+        trigram_match = literal(query, String).bool_op("<%")(Build.title)
+        trigram_rank = func.word_similarity(literal(query, String), Build.title)
+        
+        tsquery_text = self._build_prefix_tsquery(query)
+        if tsquery_text is None:
+            return trigram_match, trigram_rank
+        
+        tsquery = func.to_tsquery(FTS_CONFIG, tsquery_text)
+        condition = or_(BUILD_SEARCH_VECTOR.bool_op("@@")(tsquery), trigram_match)
+        rank = func.ts_rank(BUILD_SEARCH_VECTOR, tsquery) + trigram_rank
+        return condition, rank
+    
+    @staticmethod
+    def _summary_select(*extra_columns):
+        """Легкий запрос для списков: только колонки сборки, агрегаты и автор
+        
+        Компоненты и оценки не загружаются — стоимость и рейтинг уже
+        денормализованы в таблице builds, поэтому страница читается одним запросом.
+        """
+        return (
+            select(
+                Build.id,
+                Build.title,
+                Build.description,
+                Build.additional_info,
+                Build.author_id,
+                Build.views_count,
+                Build.average_rating.label("average_rating"),
+                Build.ratings_count,
+                Build.total_price,
+                Build.comments_count,
+                Build.created_at,
+                Build.updated_at,
+                User.name.label("author_name"),
+                User.picture.label("author_picture"),
+                *extra_columns
+            )
+            .join(User, User.id == Build.author_id)
+        )
+    
+    @staticmethod
+    def _summary_from_row(row) -> Dict[str, Any]:
+        """Преобразовать строку легкого запроса в словарь для BuildSummaryResponse"""
+        return {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "additional_info": row.additional_info,
+            "author_id": row.author_id,
+            "author": {
+                "id": row.author_id,
+                "name": row.author_name,
+                "picture": row.author_picture
+            },
+            "views_count": row.views_count,
+            "average_rating": row.average_rating or 0.0,
+            "ratings_count": row.ratings_count,
+            "total_price": row.total_price,
+            "comments_count": row.comments_count,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at
+        }
+    
     async def get_build_author_id(self, build_id: int) -> Optional[int]:
         """Получить только author_id сборки (легкий запрос для проверки)"""
         result = await self.db.execute(
@@ -87,129 +200,171 @@ class BuildRepository:
         )
         return result.scalar_one_or_none()
     
-    async def get_by_id(self, build_id: int) -> Optional[Build]:
-        """Получить сборку по ID с загрузкой связанных данных"""
+    async def get_by_id(self, build_id: int, populate_existing: bool = False) -> Optional[Build]:
+        """Получить сборку по ID с загрузкой связанных данных
+        
+        Args:
+            build_id: ID сборки
+            populate_existing: Перезаписать значения уже загруженного в сессию объекта
+        """
         result = await self.db.execute(
             select(Build)
             .options(
                 selectinload(Build.author),
-                selectinload(Build.ratings),
                 selectinload(Build.components)
             )
             .filter(Build.id == build_id)
+            .execution_options(populate_existing=populate_existing)
         )
         return result.scalar_one_or_none()
     
+    async def get_by_ids(self, build_ids: List[int]) -> List[Build]:
+        """Получить сборки по списку ID с загрузкой автора и компонентов"""
+        if not build_ids:
+            return []
+        result = await self.db.execute(
+            select(Build)
+            .options(
+                selectinload(Build.author),
+                selectinload(Build.components)
+            )
+            .filter(Build.id.in_(build_ids))
+            .order_by(Build.id)
+        )
+        return list(result.scalars().all())
+    
     async def get_with_view_tracking(
         self,
         build_id: int,
         user_id: Optional[int],
         client_ip: Optional[str],
-        redis_service: Optional["RedisService"] = None
+        view_counter: Optional["ViewCounter"] = None
     ) -> Optional[Build]:
         """Получить сборку по ID с отслеживанием просмотров
         
+        При наличии счетчика в Redis просмотр только буферизуется (без UPDATE
+        в БД), а в возвращаемой сборке views_count дополнен еще не записанным
+        приращением.
+        
         Args:
             build_id: ID сборки
             user_id: ID пользователя (если авторизован)
             client_ip: IP адрес клиента (для неавторизованных)
-            redis_service: Сервис Redis для кеширования просмотров
+            view_counter: Буферизованный счетчик просмотров в Redis
         
         Returns:
             Build или None если сборка не найдена
         """
-        # Проверяем существование сборки
-        author_id = await self.get_build_author_id(build_id)
-        if author_id is None:
+        if view_counter is None:
+            # Если Redis недоступен, пишем просмотр сразу в БД
+            if await self.get_build_author_id(build_id) is None:
+                return None
+            await self.increment_views(build_id, user_id)
+            return await self.get_by_id(build_id)
+        
+        # views_count читается заново: в объекте сессии может остаться приращение прошлого чтения
+        build = await self.get_by_id(build_id, populate_existing=True)
+        if not build:
             return None
         
-        # Увеличиваем счетчик просмотров с использованием Redis
-        if redis_service:
-            if user_id is not None:
-                # Для авторизованных пользователей - только если это не автор
-                if user_id != author_id:
-                    redis_key = f"build_view:{build_id}:user_{user_id}"
-                    view_exists = await redis_service.exists(redis_key)
-                    
-                    if not view_exists:
-                        await self.increment_views(build_id, None)
-                        await redis_service.set(redis_key, True, ttl=300)
-            elif client_ip:
-                # Для неавторизованных пользователей - используем IP
-                redis_key = f"build_view:{build_id}:{client_ip}"
-                view_exists = await redis_service.exists(redis_key)
-                
-                if not view_exists:
-                    await self.increment_views(build_id, None)
-                    await redis_service.set(redis_key, True, ttl=300)
-        else:
-            # Если Redis недоступен, просто увеличиваем счетчик
-            await self.increment_views(build_id, user_id)
+        if user_id is not None:
+            # Для авторизованных пользователей - только если это не автор
+            if user_id != build.author_id:
+                await view_counter.record_view(build_id, f"user_{user_id}")
+        elif client_ip:
+            # Для неавторизованных пользователей - используем IP
+            await view_counter.record_view(build_id, client_ip)
         
-        # Загружаем полный объект ПОСЛЕ increment_views (чтобы избежать detached state)
-        return await self.get_by_id(build_id)
+        pending = await view_counter.get_pending([build_id])
+        if pending:
+            # Не помечаем атрибут измененным, чтобы приращение не записалось при flush
+            set_committed_value(build, "views_count", (build.views_count or 0) + pending[build_id])
+        return build
     
-    async def get_all(self, skip: int = 0, limit: int = 20) -> List[Build]:
-        """Получить все сборки с пагинацией"""
-        result = await self.db.execute(
-            select(Build)
-            .options(
-                selectinload(Build.author),
-                selectinload(Build.ratings),
-                selectinload(Build.components)
-            )
-            .order_by(desc(Build.created_at))
-            .offset(skip)
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+    async def get_all(self, skip: int = 0, limit: int = 20, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Получить все сборки с пагинацией (по смещению или по курсору)"""
+        return await self.search(skip=skip, limit=limit, cursor=cursor)
     
-    async def get_by_author(self, author_id: int, skip: int = 0, limit: int = 20) -> List[Build]:
-        """Получить сборки по автору"""
-        result = await self.db.execute(
-            select(Build)
-            .options(
-                selectinload(Build.author),
-                selectinload(Build.ratings),
-                selectinload(Build.components)
-            )
-            .filter(Build.author_id == author_id)
-            .order_by(desc(Build.created_at))
-            .offset(skip)
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+    async def get_by_author(
+        self,
+        author_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Получить сборки по автору (порядок совпадает с индексом ix_builds_author_created)"""
+        return await self.search(author_id=author_id, skip=skip, limit=limit, cursor=cursor)
     
-    async def create(self, build_data: BuildCreate, author_id: int) -> Build:
-        """Создать новую сборку"""
-        from fastapi import HTTPException, status
+    async def _validate_component_ids(
+        self,
+        component_ids: List[int],
+        action: str,
+        linked_ids: Iterable[int] = ()
+    ) -> List[int]:
+        """Проверить компоненты сборки по снимку каталога
+        
+        Недоступные компоненты допускаются, только если уже входят в сборку.
         
-        components = []
+        Args:
+            component_ids: ID компонентов
+            action: Действие для сообщения об ошибке ("создать", "обновить")
+            linked_ids: ID компонентов, уже входящих в изменяемую сборку
+        
+        Returns:
+            ID компонентов без повторов (в исходном порядке)
+        """
+        from fastapi import HTTPException, status
         
-        # Проверяем, что указаны компоненты
-        if not build_data.component_ids or len(build_data.component_ids) == 0:
+        if not component_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Сборка должна содержать компоненты"
             )
         
-        # Проверяем, что все компоненты существуют в базе
-        components_result = await self.db.execute(
-            select(Component).filter(Component.id.in_(build_data.component_ids))
-        )
-        components = list(components_result.scalars().all())
+        unique_ids = list(dict.fromkeys(component_ids))
+        profiles = await component_catalog.get_profiles(self.db, unique_ids, linked_ids)
         
-        # Проверяем, что найдено столько же компонентов, сколько запрошено
-        if len(components) != len(build_data.component_ids):
-            found_ids = {c.id for c in components}
-            missing_ids = set(build_data.component_ids) - found_ids
+        # Проверяем, что все компоненты существуют в базе и доступны
+        missing_ids = set(unique_ids) - profiles.keys()
+        if missing_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Невозможно создать сборку: компоненты с ID {missing_ids} не найдены в базе данных. Все компоненты должны быть из базы данных."
+                detail=f"Невозможно {action} сборку: компоненты с ID {missing_ids} не найдены в базе данных или недоступны. Все компоненты должны быть из базы данных."
             )
         
         # Валидируем наличие всех обязательных категорий
-        validate_component_categories(components)
+        validate_categories(category for category, _ in profiles.values())
+        
+        # Проверяем совместимость по извлеченным характеристикам
+        problems = check_compatibility(profiles.values())
+        if problems:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Компоненты сборки несовместимы: {'; '.join(problems)}"
+            )
+        return unique_ids
+    
+    async def _write_component_links(self, write) -> None:
+        """Выполнить запись связей сборки с компонентами
+        
+        Снимок каталога может устареть (компонент удален после его сборки):
+        тогда вставка нарушит внешний ключ, и клиент получит 400, а не 500.
+        """
+        from fastapi import HTTPException, status
+        
+        try:
+            await write()
+        except IntegrityError:
+            await self.db.rollback()
+            component_catalog.reset()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Некоторые компоненты сборки больше не существуют, обновите список компонентов"
+            )
+    
+    async def create(self, build_data: BuildCreate, author_id: int) -> Build:
+        """Создать новую сборку"""
+        component_ids = await self._validate_component_ids(build_data.component_ids, "создать")
         
         db_build = Build(
             title=build_data.title,
@@ -217,26 +372,37 @@ class BuildRepository:
             additional_info=build_data.additional_info,
             author_id=author_id
         )
-        self.db.add(db_build)
-        await self.db.flush()  # Получаем ID сборки
         
-        # Добавляем компоненты напрямую в промежуточную таблицу, чтобы избежать lazy loading
-        await self.db.execute(
-            insert(build_components).values(
-                [{"build_id": db_build.id, "component_id": comp.id} for comp in components]
+        async def write() -> None:
+            self.db.add(db_build)
+            await self.db.flush()  # Получаем ID сборки
+            
+            # Добавляем компоненты напрямую в промежуточную таблицу, чтобы избежать lazy loading
+            await self.db.execute(
+                insert(build_components).values(
+                    [{"build_id": db_build.id, "component_id": component_id} for component_id in component_ids]
+                )
             )
-        )
+        
+        await self._write_component_links(write)
+        await self.update_total_prices([db_build.id])
+        await self._bump_stats(total_builds=1)
         
         await self.db.commit()
-        await self.db.refresh(db_build)
         
-        # Загружаем связанные данные
-        return await self.get_by_id(db_build.id)
+        # Загружаем связанные данные (и стоимость, пересчитанную в БД)
+        return await self.get_by_id(db_build.id, populate_existing=True)
     
     async def update(self, build: Build, build_data: BuildUpdate) -> Build:
-        """Обновить сборку"""
-        from fastapi import HTTPException, status
+        """Обновить сборку
+        
+        Связи с компонентами меняются по разнице: удаляются только убранные
+        и добавляются только новые. Результат загружается одним запросом.
         
+        Args:
+            build: Сборка с загруженными компонентами (get_by_id)
+            build_data: Данные для обновления
+        """
         update_data = build_data.model_dump(exclude_unset=True)
         
         # Обрабатываем component_ids отдельно
@@ -247,73 +413,79 @@ class BuildRepository:
             if hasattr(build, key):
                 setattr(build, key, value)
         
-        # Обновляем компоненты, если они указаны
         if component_ids is not None:
-            # Удаляем все существующие связи с компонентами
-            await self.db.execute(
-                delete(build_components).where(build_components.c.build_id == build.id)
-            )
-            
-            if len(component_ids) == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Сборка должна содержать компоненты"
-                )
+            current_ids = {component.id for component in build.components}
+            new_ids = set(await self._validate_component_ids(component_ids, "обновить", current_ids))
+            removed_ids = current_ids - new_ids
+            added_ids = new_ids - current_ids
             
-            # Проверяем, что все компоненты существуют
-            components_result = await self.db.execute(
-                select(Component).filter(Component.id.in_(component_ids))
-            )
-            components = list(components_result.scalars().all())
-            
-            # Проверяем, что найдено столько же компонентов, сколько запрошено
-            if len(components) != len(component_ids):
-                found_ids = {c.id for c in components}
-                missing_ids = set(component_ids) - found_ids
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Невозможно обновить сборку: компоненты с ID {missing_ids} не найдены в базе данных. Все компоненты должны быть из базы данных."
-                )
-            
-            # Валидируем наличие всех обязательных категорий
-            validate_component_categories(components)
-            
-            # Добавляем новые связи напрямую в промежуточную таблицу
-            await self.db.execute(
-                insert(build_components).values(
-                    [{"build_id": build.id, "component_id": comp.id} for comp in components]
-                )
-            )
-        else:
-            # Если компоненты не указаны, проверяем существующие компоненты сборки
-            # Загружаем компоненты сборки напрямую
-            if not build.components:
-                # Если компоненты не загружены, загружаем их
-                await self.db.refresh(build, ['components'])
-                # Если все еще не загружены, получаем через запрос
-                if not build.components:
-                    components_result = await self.db.execute(
-                        select(Component)
-                        .join(build_components)
-                        .filter(build_components.c.build_id == build.id)
+            async def write() -> None:
+                if removed_ids:
+                    await self.db.execute(
+                        delete(build_components).where(
+                            build_components.c.build_id == build.id,
+                            build_components.c.component_id.in_(removed_ids)
+                        )
+                    )
+                if added_ids:
+                    await self.db.execute(
+                        insert(build_components).values(
+                            [{"build_id": build.id, "component_id": component_id} for component_id in sorted(added_ids)]
+                        )
                     )
-                    build.components = list(components_result.scalars().all())
             
-            if not build.components:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Сборка должна содержать компоненты"
-                )
-            # Валидируем существующие компоненты
+            if removed_ids or added_ids:
+                await self._write_component_links(write)
+                await self.update_total_prices([build.id])
+        else:
+            # Компоненты не меняются: проверяем уже загруженные
             validate_component_categories(build.components)
         
         await self.db.commit()
-        await self.db.refresh(build)
-        return await self.get_by_id(build.id)
+        return await self.get_by_id(build.id, populate_existing=True)
+    
+    async def update_total_prices(self, build_ids: Optional[List[int]] = None) -> int:
+        """Пересчитать сохраненную стоимость сборок одним UPDATE
+        
+        Args:
+            build_ids: ID сборок для пересчета (None - пересчитать все сборки)
+        
+        Returns:
+            int: Количество сборок, у которых изменилась стоимость
+        """
+        price_subquery = (
+            select(func.coalesce(func.sum(Component.price), 0))
+            .select_from(build_components)
+            .join(Component, Component.id == build_components.c.component_id)
+            .where(build_components.c.build_id == Build.id)
+            .scalar_subquery()
+        )
+        
+        # Обновляем только строки, где стоимость действительно изменилась
+        stmt = (
+            update(Build)
+            .where(Build.total_price.is_distinct_from(price_subquery))
+            .values(total_price=price_subquery)
+        )
+        if build_ids is not None:
+            stmt = stmt.where(Build.id.in_(build_ids))
+        
+        result = await self.db.execute(stmt)
+        return result.rowcount or 0
     
     async def delete(self, build: Build) -> bool:
-        """Удалить сборку"""
+        """Удалить сборку (вместе с ней каскадно удаляются оценки и комментарии)"""
         try:
+            await self._bump_stats(
+                total_builds=-1,
+                total_ratings=-select(Build.ratings_count).where(Build.id == build.id).scalar_subquery(),
+                rating_sum=-select(Build.rating_sum).where(Build.id == build.id).scalar_subquery(),
+                total_comments=-(
+                    select(func.count(BuildComment.id))
+                    .where(BuildComment.build_id == build.id)
+                    .scalar_subquery()
+                )
+            )
             await self.db.delete(build)
             await self.db.commit()
             return True
@@ -321,6 +493,52 @@ class BuildRepository:
             await self.db.rollback()
             return False
     
+    async def is_view_flush_applied(self, token: str) -> bool:
+        """Записан ли перенос просмотров с этим токеном"""
+        result = await self.db.execute(select(BuildViewFlush.id).filter(BuildViewFlush.token == token))
+        return result.scalar_one_or_none() is not None
+    
+    async def apply_view_deltas(self, deltas: Dict[int, int], token: str) -> int:
+        """Пакетно прибавить накопленные просмотры к views_count
+        
+        Токен переноса записывается в той же транзакции, поэтому перенос,
+        который уже был записан, повторно не применяется.
+        
+        Args:
+            deltas: Словарь build_id -> приращение
+            token: Токен переноса
+        
+        Returns:
+            Количество обновленных сборок (0, если перенос уже записан)
+        """
+        if await self.is_view_flush_applied(token):
+            return 0
+        try:
+            await self.db.execute(insert(BuildViewFlush).values(token=token))
+            await self.db.execute(
+                delete(BuildViewFlush).where(
+                    BuildViewFlush.created_at < datetime.now(timezone.utc) - VIEW_FLUSH_TOKEN_TTL
+                )
+            )
+            if deltas:
+                builds_table = Build.__table__
+                await self.db.execute(
+                    update(builds_table)
+                    .where(builds_table.c.id == bindparam("b_id"))
+                    .values(
+                        views_count=builds_table.c.views_count + bindparam("delta"),
+                        # Просмотры не считаются изменением сборки (updated_at входит в ключ кеша PDF)
+                        updated_at=builds_table.c.updated_at
+                    ),
+                    [{"b_id": build_id, "delta": delta} for build_id, delta in deltas.items()]
+                )
+            await self.db.commit()
+        except IntegrityError:
+            # Тот же перенос одновременно записал другой воркер
+            await self.db.rollback()
+            return 0
+        return len(deltas)
+    
     async def increment_views(self, build_id: int, user_id: Optional[int] = None) -> bool:
         """Увеличить счетчик просмотров
         
@@ -358,7 +576,7 @@ class BuildRepository:
                 await self.db.execute(
                     update(Build)
                     .where(Build.id == build_id)
-                    .values(views_count=Build.views_count + 1)
+                    .values(views_count=Build.views_count + 1, updated_at=Build.updated_at)
                 )
                 await self.db.commit()
                 return True
@@ -372,7 +590,7 @@ class BuildRepository:
                 await self.db.execute(
                     update(Build)
                     .where(Build.id == build_id)
-                    .values(views_count=Build.views_count + 1)
+                    .values(views_count=Build.views_count + 1, updated_at=Build.updated_at)
                 )
                 await self.db.commit()
                 return True
@@ -392,133 +610,441 @@ class BuildRepository:
         )
         return result.scalar() or 0
     
-    async def search(
+    def _build_filters(
         self,
         query: str = "",
         author_id: Optional[int] = None,
-        skip: int = 0,
-        limit: int = 20,
-        sort_by: str = "created_at",
-        order: str = "desc"
-    ) -> List[Build]:
-        """Поиск сборок с фильтрами и сортировкой
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None
+    ):
+        """Собрать условия фильтрации сборок
         
-        Args:
-            query: Поисковый запрос по названию или описанию
-            author_id: ID автора для фильтрации
-            skip: Количество пропускаемых записей
-            limit: Максимальное количество записей
-            sort_by: Поле для сортировки (created_at, views_count, average_rating, title)
-            order: Порядок сортировки (asc или desc)
+        Returns:
+            Кортеж (список условий, выражение релевантности или None)
         """
-        stmt = select(Build).options(
-            selectinload(Build.author),
-            selectinload(Build.ratings),
-            selectinload(Build.components)
-        )
-        
         conditions = []
+        search_rank = None
         
-        # Поиск по названию или описанию
+        # Поиск по названию, описанию и дополнительной информации
         if query:
-            search_condition = or_(
-                Build.title.ilike(f"%{query}%"),
-                Build.description.ilike(f"%{query}%")
-            )
+            search_condition, search_rank = self._search_condition(query)
             conditions.append(search_condition)
         
         # Фильтр по автору
         if author_id is not None:
             conditions.append(Build.author_id == author_id)
         
-        # Применяем условия
-        if conditions:
-            stmt = stmt.filter(and_(*conditions))
-        
-        # Сортировка
-        sort_column = Build.created_at  # по умолчанию
+        # Фильтр по стоимости
+        if min_price is not None:
+            conditions.append(Build.total_price >= min_price)
+        if max_price is not None:
+            conditions.append(Build.total_price <= max_price)
         
+        return conditions, search_rank
+    
+    @staticmethod
+    def _sort_column(sort_by: str, search_rank=None):
+        """Получить выражение сортировки и фактическое имя поля сортировки"""
         if sort_by == "views_count":
-            sort_column = Build.views_count
-        elif sort_by == "average_rating":
-            # Для сортировки по рейтингу используем вычисляемое поле
-            sort_column = Build.average_rating
-        elif sort_by == "title":
-            sort_column = Build.title
-        elif sort_by == "created_at":
-            sort_column = Build.created_at
-        
-        # Применяем порядок сортировки
-        if order.lower() == "asc":
-            stmt = stmt.order_by(sort_column.asc())
+            return Build.views_count, sort_by
+        if sort_by == "average_rating":
+            # Выражение по денормализованным агрегатам (покрыто индексом ix_builds_average_rating)
+            return Build.average_rating, sort_by
+        if sort_by == "title":
+            return Build.title, sort_by
+        if sort_by == "total_price":
+            return Build.total_price, sort_by
+        if sort_by == "relevance" and search_rank is not None:
+            return search_rank, sort_by
+        return Build.created_at, "created_at"  # по умолчанию
+    
+    @staticmethod
+    def _decode_keyset(cursor: str, sort_key: str, order: str) -> tuple:
+        """Декодировать курсор в пару (значение сортировки, ID)
+        
+        Raises:
+            ValueError: Если курсор поврежден или создан для другой сортировки
+        """
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort_key or payload.get("o") != order:
+            raise ValueError("Курсор создан для другой сортировки")
+        
+        value = payload.get("v")
+        last_id = payload.get("id")
+        if not isinstance(last_id, int):
+            raise ValueError("Некорректный курсор")
+        if sort_key == "created_at" and value is not None:
+            value = datetime.fromisoformat(value)
+        return value, last_id
+    
+    async def _fetch_page(
+        self,
+        query: str,
+        author_id: Optional[int],
+        skip: int,
+        limit: int,
+        sort_by: str,
+        order: str,
+        min_price: Optional[int],
+        max_price: Optional[int],
+        cursor: Optional[str],
+        with_total: bool
+    ) -> Tuple[list, Optional[str]]:
+        """Выполнить запрос страницы и собрать курсор следующей страницы
+        
+        При with_total в каждую строку добавляется total_count = count(*) OVER ()
+        по отфильтрованному набору. Окно считается в подзапросе до условия
+        курсора, поэтому итог не зависит от позиции страницы.
+        
+        Returns:
+            Кортеж (строки результата, курсор следующей страницы или None)
+        """
+        conditions, search_rank = self._build_filters(query, author_id, min_price, max_price)
+        sort_column, sort_key = self._sort_column(sort_by, search_rank)
+        order = "asc" if order.lower() == "asc" else "desc"
+        
+        if with_total:
+            filtered = self._summary_select(
+                sort_column.label("sort_value"),
+                func.count().over().label("total_count")
+            )
+            if conditions:
+                filtered = filtered.filter(and_(*conditions))
+            filtered = filtered.subquery()
+            stmt = select(filtered)
+            sort_column, id_column = filtered.c.sort_value, filtered.c.id
+        else:
+            stmt = self._summary_select(sort_column.label("sort_value"))
+            if conditions:
+                stmt = stmt.filter(and_(*conditions))
+            id_column = Build.id
+        
+        # Keyset: продолжаем строго после последней строки предыдущей страницы
+        if cursor:
+            last_value, last_id = self._decode_keyset(cursor, sort_key, order)
+            position = tuple_(sort_column, id_column)
+            if order == "asc":
+                stmt = stmt.filter(position > tuple_(last_value, last_id))
+            else:
+                stmt = stmt.filter(position < tuple_(last_value, last_id))
+        
+        if order == "asc":
+            stmt = stmt.order_by(sort_column.asc(), id_column.asc())
         else:
-            stmt = stmt.order_by(sort_column.desc())
+            stmt = stmt.order_by(sort_column.desc(), id_column.desc())
         
-        # Пагинация
-        stmt = stmt.offset(skip).limit(limit)
+        if not cursor:
+            stmt = stmt.offset(skip)
+        # Лишняя строка показывает, есть ли следующая страница
+        stmt = stmt.limit(limit + 1)
         
         result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+        rows = result.all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_value = rows[-1].sort_value
+            if isinstance(last_value, datetime):
+                last_value = last_value.isoformat()
+            next_cursor = encode_cursor({
+                "s": sort_key,
+                "o": order,
+                "v": last_value,
+                "id": rows[-1].id
+            })
+        
+        return rows, next_cursor
+    
+    async def search_page(
+        self,
+        query: str = "",
+        author_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 20,
+        sort_by: str = "created_at",
+        order: str = "desc",
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Поиск сборок с фильтрами, сортировкой и курсором следующей страницы
+        
+        Сортировка всегда дополняется ID сборки, поэтому порядок однозначен.
+        Если передан курсор, страница выбирается по ключу (значение сортировки, ID)
+        вместо OFFSET, и skip игнорируется.
+        
+        Args:
+            query: Поисковый запрос по названию или описанию
+            author_id: ID автора для фильтрации
+            skip: Количество пропускаемых записей (только без курсора)
+            limit: Максимальное количество записей
+            sort_by: Поле для сортировки (created_at, views_count, average_rating, title, total_price, relevance)
+            order: Порядок сортировки (asc или desc)
+            min_price: Минимальная стоимость сборки
+            max_price: Максимальная стоимость сборки
+            cursor: Курсор, полученный со страницы ранее
+        
+        Returns:
+            Кортеж (список кратких данных сборок, курсор следующей страницы или None)
+        
+        Raises:
+            ValueError: Если курсор некорректен
+        """
+        rows, next_cursor = await self._fetch_page(
+            query, author_id, skip, limit, sort_by, order, min_price, max_price, cursor,
+            with_total=False
+        )
+        return [self._summary_from_row(row) for row in rows], next_cursor
+    
+    async def search_with_total(
+        self,
+        query: str = "",
+        author_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 20,
+        sort_by: str = "created_at",
+        order: str = "desc",
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+        """Поиск сборок вместе с общим количеством результатов одним запросом
+        
+        Параметры совпадают с search_page. Отдельный подсчет выполняется
+        только если страница пуста, но могла быть не первой.
+        
+        Returns:
+            Кортеж (список кратких данных сборок, всего результатов, курсор следующей страницы)
+        
+        Raises:
+            ValueError: Если курсор некорректен
+        """
+        rows, next_cursor = await self._fetch_page(
+            query, author_id, skip, limit, sort_by, order, min_price, max_price, cursor,
+            with_total=True
+        )
+        if rows:
+            total = rows[0].total_count
+        elif skip or cursor:
+            total = await self.count_search_results(query, author_id, min_price, max_price)
+        else:
+            total = 0
+        return [self._summary_from_row(row) for row in rows], total, next_cursor
+    
+    async def estimate_count(self) -> Optional[int]:
+        """Оценка количества сборок по статистике планировщика (только PostgreSQL)
+        
+        Returns:
+            Оценка или None, если статистика недоступна (таблица еще не анализировалась)
+        """
+        if not self._is_postgresql():
+            return None
+        result = await self.db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'builds'::regclass")
+        )
+        estimate = result.scalar()
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+    
+    async def search(
+        self,
+        query: str = "",
+        author_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 20,
+        sort_by: str = "created_at",
+        order: str = "desc",
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Поиск сборок с фильтрами и сортировкой (см. search_page)"""
+        builds, _ = await self.search_page(
+            query=query,
+            author_id=author_id,
+            skip=skip,
+            limit=limit,
+            sort_by=sort_by,
+            order=order,
+            min_price=min_price,
+            max_price=max_price,
+            cursor=cursor
+        )
+        return builds
     
     async def count_search_results(
         self,
         query: str = "",
-        author_id: Optional[int] = None
+        author_id: Optional[int] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None
     ) -> int:
         """Подсчет результатов поиска"""
         stmt = select(func.count(Build.id))
         
-        conditions = []
-        
-        if query:
-            search_condition = or_(
-                Build.title.ilike(f"%{query}%"),
-                Build.description.ilike(f"%{query}%")
-            )
-            conditions.append(search_condition)
-        
-        if author_id is not None:
-            conditions.append(Build.author_id == author_id)
-        
+        conditions, _ = self._build_filters(query, author_id, min_price, max_price)
         if conditions:
             stmt = stmt.filter(and_(*conditions))
         
         result = await self.db.execute(stmt)
         return result.scalar() or 0
     
-    async def get_top_builds(self, limit: int = 10) -> List[Build]:
-        """Получить топ сборок по рейтингу"""
-        # Подзапрос для вычисления среднего рейтинга
-        avg_rating_subq = (
-            select(
-                BuildRating.build_id,
-                func.avg(BuildRating.score).label('avg_rating'),
-                func.count(BuildRating.id).label('ratings_count')
-            )
-            .group_by(BuildRating.build_id)
+    async def get_ids_for_export(
+        self,
+        build_ids: Optional[List[int]] = None,
+        query: str = "",
+        author_id: Optional[int] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        limit: int = 500
+    ) -> List[int]:
+        """Получить ID сборок для массового экспорта (по списку ID и/или фильтрам)"""
+        stmt = select(Build.id)
+        
+        conditions, _ = self._build_filters(query, author_id, min_price, max_price)
+        if build_ids is not None:
+            conditions.append(Build.id.in_(build_ids))
+        if conditions:
+            stmt = stmt.filter(and_(*conditions))
+        
+        result = await self.db.execute(stmt.order_by(Build.id).limit(limit))
+        return list(result.scalars().all())
+    
+    async def get_summaries_by_ids(self, build_ids: List[int]) -> List[Dict[str, Any]]:
+        """Получить краткие данные сборок одним запросом в порядке переданных ID
+        
+        Несуществующие ID (например, сборки, удаленные после построения
+        внешнего индекса) пропускаются.
+        """
+        if not build_ids:
+            return []
+        result = await self.db.execute(self._summary_select().filter(Build.id.in_(build_ids)))
+        summaries = {row.id: self._summary_from_row(row) for row in result.all()}
+        return [summaries[build_id] for build_id in build_ids if build_id in summaries]
+    
+    async def get_component_links(self) -> Dict[int, List[int]]:
+        """Получить все связи сборок с компонентами (build_id -> ID компонентов)"""
+        result = await self.db.execute(
+            select(build_components.c.build_id, build_components.c.component_id)
+            .order_by(build_components.c.build_id)
+        )
+        links: Dict[int, List[int]] = {}
+        for build_id, component_id in result.all():
+            links.setdefault(build_id, []).append(component_id)
+        return links
+    
+    async def get_similar_builds(self, build_id: int, limit: int) -> List[Tuple[int, float, int]]:
+        """Найти похожие сборки по коэффициенту Жаккара запросом к БД
+        
+        Используется, пока индекс похожих сборок в Redis не построен.
+        
+        Returns:
+            Список (ID сборки, похожесть, число общих компонентов) по убыванию похожести
+        """
+        own = build_components.alias("own")
+        other = build_components.alias("other")
+        overlaps = (
+            select(other.c.build_id, func.count().label("common"))
+            .select_from(own.join(other, other.c.component_id == own.c.component_id))
+            .where(own.c.build_id == build_id, other.c.build_id != build_id)
+            .group_by(other.c.build_id)
+            .subquery()
+        )
+        sizes = (
+            select(build_components.c.build_id, func.count().label("size"))
+            .where(build_components.c.build_id.in_(select(overlaps.c.build_id)))
+            .group_by(build_components.c.build_id)
             .subquery()
         )
+        own_size = (
+            select(func.count())
+            .select_from(build_components)
+            .where(build_components.c.build_id == build_id)
+            .scalar_subquery()
+        )
+        similarity = (
+            cast(overlaps.c.common, Float) / (own_size + sizes.c.size - overlaps.c.common)
+        ).label("similarity")
+        result = await self.db.execute(
+            select(overlaps.c.build_id, similarity, overlaps.c.common)
+            .join(sizes, sizes.c.build_id == overlaps.c.build_id)
+            .order_by(desc(similarity), desc(overlaps.c.common), desc(overlaps.c.build_id))
+            .limit(limit)
+        )
+        return [(row.build_id, float(row.similarity), row.common) for row in result.all()]
+    
+    async def get_top_builds(
+        self,
+        limit: int = 10,
+        prior_mean: float = 0.0,
+        prior_weight: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """Получить топ сборок по байесовскому рейтингу (краткие данные)
+        
+        Используется, пока топ в Redis не построен. С нулевым весом
+        априорной оценки сортирует по простому среднему.
         
-        # Основной запрос с сортировкой по рейтингу
+        Args:
+            limit: Количество сборок
+            prior_mean: Средняя оценка по всем сборкам
+            prior_weight: Вес априорной оценки
+        """
+        score = (
+            (prior_weight * prior_mean + Build.rating_sum)
+            / (prior_weight + cast(Build.ratings_count, Float))
+        )
         stmt = (
-            select(Build)
-            .options(
-                selectinload(Build.author),
-                selectinload(Build.ratings),
-                selectinload(Build.components)
-            )
-            .join(avg_rating_subq, Build.id == avg_rating_subq.c.build_id)
-            .filter(avg_rating_subq.c.ratings_count >= 1)  # Минимум 1 оценка
+            self._summary_select()
+            .filter(Build.ratings_count >= 1)  # Минимум 1 оценка
             .order_by(
-                desc(avg_rating_subq.c.avg_rating),
-                desc(avg_rating_subq.c.ratings_count),
+                desc(score),
+                desc(Build.ratings_count),
                 desc(Build.created_at)
             )
             .limit(limit)
         )
         
         result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+        return [self._summary_from_row(row) for row in result.all()]
+    
+    async def get_rating_aggregates(self, build_id: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """Получить агрегаты оценок сборок с хотя бы одной оценкой
+        
+        Args:
+            build_id: ID сборки (None — все сборки)
+            
+        Returns:
+            Список (ID сборки, количество оценок, сумма оценок)
+        """
+        stmt = select(Build.id, Build.ratings_count, Build.rating_sum).where(Build.ratings_count >= 1)
+        if build_id is not None:
+            stmt = stmt.where(Build.id == build_id)
+        result = await self.db.execute(stmt.order_by(Build.id))
+        return [(row.id, row.ratings_count, row.rating_sum) for row in result.all()]
+    
+    async def get_activity_since(
+        self,
+        since: datetime
+    ) -> Tuple[List[Tuple[int, int, datetime]], List[Tuple[int, datetime]]]:
+        """Получить оценки и комментарии, оставленные начиная с момента
+        
+        Returns:
+            ([(ID сборки, оценка, дата)], [(ID сборки, дата)])
+        """
+        ratings = await self.db.execute(
+            select(BuildRating.build_id, BuildRating.score, BuildRating.created_at)
+            .where(BuildRating.created_at >= since)
+        )
+        comments = await self.db.execute(
+            select(BuildComment.build_id, BuildComment.created_at)
+            .where(BuildComment.created_at >= since)
+        )
+        return (
+            [(row.build_id, row.score, row.created_at) for row in ratings.all()],
+            [(row.build_id, row.created_at) for row in comments.all()]
+        )
     
     # === Методы для BuildRating ===
     
@@ -539,28 +1065,71 @@ class BuildRepository:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    def _rating_score_subquery(rating_id: int):
+        """Подзапрос текущего значения оценки для атомарной корректировки агрегатов"""
+        return (
+            select(BuildRating.score)
+            .where(BuildRating.id == rating_id)
+            .scalar_subquery()
+        )
+    
     async def create_rating(self, build_id: int, user_id: int, rating_data: BuildRatingCreate) -> BuildRating:
-        """Создать оценку"""
+        """Создать оценку и обновить агрегаты рейтинга сборки в той же транзакции"""
         db_rating = BuildRating(
             build_id=build_id,
             user_id=user_id,
             score=rating_data.score
         )
         self.db.add(db_rating)
+        await self.db.execute(
+            update(Build)
+            .where(Build.id == build_id)
+            .values(
+                rating_sum=Build.rating_sum + rating_data.score,
+                ratings_count=Build.ratings_count + 1,
+                updated_at=Build.updated_at  # агрегаты не считаются изменением сборки
+            )
+        )
+        await self._bump_stats(total_ratings=1, rating_sum=rating_data.score)
         await self.db.commit()
         await self.db.refresh(db_rating)
         return db_rating
     
     async def update_rating(self, rating: BuildRating, score: int) -> BuildRating:
-        """Обновить оценку"""
+        """Обновить оценку и скорректировать сумму оценок сборки на разницу"""
+        # Разница вычисляется в БД по текущему значению оценки, а не по загруженному объекту
+        current_score = self._rating_score_subquery(rating.id)
+        await self.db.execute(
+            update(Build)
+            .where(Build.id == rating.build_id)
+            .values(
+                rating_sum=Build.rating_sum + score - current_score,
+                updated_at=Build.updated_at
+            )
+        )
+        await self._bump_stats(rating_sum=score - current_score)
         rating.score = score
         await self.db.commit()
         await self.db.refresh(rating)
         return rating
     
     async def delete_rating(self, rating: BuildRating) -> bool:
-        """Удалить оценку"""
+        """Удалить оценку и вычесть ее из агрегатов рейтинга сборки"""
         try:
+            await self.db.execute(
+                update(Build)
+                .where(Build.id == rating.build_id)
+                .values(
+                    rating_sum=Build.rating_sum - self._rating_score_subquery(rating.id),
+                    ratings_count=Build.ratings_count - 1,
+                    updated_at=Build.updated_at
+                )
+            )
+            await self._bump_stats(
+                total_ratings=-1,
+                rating_sum=-self._rating_score_subquery(rating.id)
+            )
             await self.db.delete(rating)
             await self.db.commit()
             return True
@@ -578,13 +1147,10 @@ class BuildRepository:
     # === Методы для BuildComment ===
     
     async def get_comment_by_id(self, comment_id: int) -> Optional[BuildComment]:
-        """Получить комментарий по ID (с максимум 1 уровнем replies)"""
+        """Получить комментарий по ID (без ответов: их количество в replies_count)"""
         result = await self.db.execute(
             select(BuildComment)
-            .options(
-                selectinload(BuildComment.user),
-                selectinload(BuildComment.replies).selectinload(BuildComment.user)
-            )
+            .options(selectinload(BuildComment.user))
             .filter(BuildComment.id == comment_id)
         )
         return result.scalar_one_or_none()
@@ -593,16 +1159,24 @@ class BuildRepository:
         self,
         build_id: int,
         skip: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        replies_limit: int = 3
     ) -> List[BuildComment]:
-        """Получить комментарии для сборки (только корневые + первый уровень ответов, максимум 2 уровня)"""
+        """Получить корневые комментарии сборки с первыми ответами
+        
+        Для каждого корневого комментария загружается не больше replies_limit
+        ответов (одним запросом с оконной функцией на всю страницу),
+        остальные отдаются постранично через get_comment_replies.
+        
+        Args:
+            build_id: ID сборки
+            skip: Количество корневых комментариев для пропуска
+            limit: Максимальное количество корневых комментариев
+            replies_limit: Максимальное количество ответов на каждый комментарий
+        """
         result = await self.db.execute(
             select(BuildComment)
-            .options(
-                selectinload(BuildComment.user),
-                selectinload(BuildComment.replies)
-                .selectinload(BuildComment.user)
-            )
+            .options(selectinload(BuildComment.user))
             .filter(
                 BuildComment.build_id == build_id,
                 BuildComment.parent_id == None
@@ -611,14 +1185,80 @@ class BuildRepository:
             .offset(skip)
             .limit(limit)
         )
-        return list(result.scalars().all())
+        comments = list(result.scalars().all())
+        
+        replies_by_parent: Dict[int, List[BuildComment]] = {comment.id: [] for comment in comments}
+        parent_ids = [comment.id for comment in comments if comment.replies_count]
+        if parent_ids and replies_limit > 0:
+            position = func.row_number().over(
+                partition_by=BuildComment.parent_id,
+                order_by=BuildComment.id
+            ).label("position")
+            ranked = (
+                select(BuildComment.id, position)
+                .where(BuildComment.parent_id.in_(parent_ids))
+                .subquery()
+            )
+            replies = await self.db.execute(
+                select(BuildComment)
+                .options(selectinload(BuildComment.user))
+                .join(ranked, ranked.c.id == BuildComment.id)
+                .where(ranked.c.position <= replies_limit)
+                .order_by(BuildComment.parent_id, BuildComment.id)
+            )
+            for reply in replies.scalars().all():
+                replies_by_parent[reply.parent_id].append(reply)
+        
+        # Подставляем ответы без ленивой загрузки всей связи
+        for comment in comments:
+            set_committed_value(comment, "replies", replies_by_parent[comment.id])
+        return comments
+    
+    async def get_comment_replies(
+        self,
+        comment_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[BuildComment], Optional[str]]:
+        """Получить страницу ответов на комментарий (keyset по ID, в порядке создания)
+        
+        Args:
+            comment_id: ID корневого комментария
+            limit: Размер страницы
+            cursor: Курсор следующей страницы (next_cursor из предыдущего ответа)
+            
+        Returns:
+            Кортеж (ответы, курсор следующей страницы или None)
+            
+        Raises:
+            ValueError: Если курсор некорректен
+        """
+        stmt = (
+            select(BuildComment)
+            .options(selectinload(BuildComment.user))
+            .filter(BuildComment.parent_id == comment_id)
+        )
+        if cursor:
+            payload = decode_cursor(cursor)
+            if not isinstance(payload.get("id"), int):
+                raise ValueError("Некорректный курсор")
+            stmt = stmt.filter(BuildComment.id > payload["id"])
+        
+        result = await self.db.execute(stmt.order_by(BuildComment.id).limit(limit + 1))
+        replies = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(replies) > limit:
+            replies = replies[:limit]
+            next_cursor = encode_cursor({"id": replies[-1].id})
+        return replies, next_cursor
     
-    async def count_build_comments(self, build_id: int) -> int:
-        """Получить количество комментариев для сборки"""
+    async def get_comments_count(self, build_id: int) -> Optional[int]:
+        """Получить количество комментариев сборки (None, если сборки нет)"""
         result = await self.db.execute(
-            select(func.count(BuildComment.id)).filter(BuildComment.build_id == build_id)
+            select(Build.comments_count).filter(Build.id == build_id)
         )
-        return result.scalar() or 0
+        return result.scalar_one_or_none()
     
     async def create_comment(
         self,
@@ -634,6 +1274,22 @@ class BuildRepository:
             parent_id=comment_data.parent_id
         )
         self.db.add(db_comment)
+        
+        # Счетчики комментариев сборки и ответов родителя (updated_at не меняется)
+        await self.db.execute(
+            update(Build)
+            .where(Build.id == build_id)
+            .values(comments_count=Build.comments_count + 1, updated_at=Build.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        if comment_data.parent_id:
+            await self.db.execute(
+                update(BuildComment)
+                .where(BuildComment.id == comment_data.parent_id)
+                .values(replies_count=BuildComment.replies_count + 1, updated_at=BuildComment.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        await self._bump_stats(total_comments=1)
         await self.db.commit()
         await self.db.refresh(db_comment)
         
@@ -648,9 +1304,41 @@ class BuildRepository:
         return await self.get_comment_by_id(comment.id)
     
     async def delete_comment(self, comment: BuildComment) -> bool:
-        """Удалить комментарий"""
+        """Удалить комментарий (вместе с ответами)"""
         try:
-            await self.db.delete(comment)
+            # Комментарий и все его ответы
+            thread = (
+                select(BuildComment.id)
+                .where(BuildComment.id == comment.id)
+                .cte("comment_thread", recursive=True)
+            )
+            thread = thread.union_all(
+                select(BuildComment.id).where(BuildComment.parent_id == thread.c.id)
+            )
+            result = await self.db.execute(select(func.count()).select_from(thread))
+            removed = result.scalar() or 0
+            
+            await self.db.execute(
+                update(Build)
+                .where(Build.id == comment.build_id)
+                .values(comments_count=Build.comments_count - removed, updated_at=Build.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            if comment.parent_id:
+                await self.db.execute(
+                    update(BuildComment)
+                    .where(BuildComment.id == comment.parent_id)
+                    .values(replies_count=BuildComment.replies_count - 1, updated_at=BuildComment.updated_at)
+                    .execution_options(synchronize_session=False)
+                )
+            await self._bump_stats(total_comments=-removed)
+            
+            # Удаляем ветку одним запросом, не загружая ответы в сессию
+            await self.db.execute(
+                delete(BuildComment)
+                .where(BuildComment.id.in_(select(thread.c.id)))
+                .execution_options(synchronize_session=False)
+            )
             await self.db.commit()
             return True
         except Exception:
@@ -659,48 +1347,67 @@ class BuildRepository:
     
     # === Статистика ===
     
-    async def get_stats(self) -> dict:
-        """Получить общую статистику по сборкам"""
-        total_builds = await self.count()
-        
-        # Общее количество оценок
-        ratings_result = await self.db.execute(select(func.count(BuildRating.id)))
-        total_ratings = ratings_result.scalar() or 0
+    async def _bump_stats(self, **deltas) -> None:
+        """Изменить счетчики build_stats в текущей транзакции
         
-        # Общее количество комментариев
-        comments_result = await self.db.execute(select(func.count(BuildComment.id)))
-        total_comments = comments_result.scalar() or 0
+        Значения могут быть числами или SQL-выражениями (подзапросами).
+        Если строки статистики еще нет, она будет создана пересчетом в refresh_stats.
+        """
+        await self.db.execute(
+            update(BuildStats)
+            .where(BuildStats.id == BUILD_STATS_ID)
+            .values({
+                name: getattr(BuildStats, name) + delta
+                for name, delta in deltas.items()
+            })
+            .execution_options(synchronize_session=False)
+        )
+    
+    async def refresh_stats(self) -> BuildStats:
+        """Полностью пересчитать build_stats по таблицам сборок, оценок и комментариев"""
+        result = await self.db.execute(
+            select(
+                select(func.count(Build.id)).scalar_subquery(),
+                select(func.count(BuildRating.id)).scalar_subquery(),
+                select(func.count(BuildComment.id)).scalar_subquery(),
+                select(func.coalesce(func.sum(BuildRating.score), 0)).scalar_subquery()
+            )
+        )
+        total_builds, total_ratings, total_comments, rating_sum = result.one()
         
-        # Средний рейтинг по всем сборкам
-        avg_rating_result = await self.db.execute(select(func.avg(BuildRating.score)))
-        average_rating = avg_rating_result.scalar() or 0.0
+        stats = await self.db.get(BuildStats, BUILD_STATS_ID)
+        if stats is None:
+            stats = BuildStats(id=BUILD_STATS_ID)
+            self.db.add(stats)
+        stats.total_builds = total_builds
+        stats.total_ratings = total_ratings
+        stats.total_comments = total_comments
+        stats.rating_sum = rating_sum
         
-        return {
-            "total_builds": total_builds,
-            "total_ratings": total_ratings,
-            "total_comments": total_comments,
-            "average_rating": float(average_rating)
-        }
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Строку одновременно создал другой запрос
+            await self.db.rollback()
+            return await self.refresh_stats()
+        return stats
     
-    async def get_unique_components(self) -> dict:
-        """Получить список доступных компонентов, сгруппированных по категориям"""
-        from app.models.component import ComponentCategory
-        from app.schemas.component import ComponentResponse
-        
-        # Получаем все компоненты, сгруппированные по категориям
+    async def get_stats(self) -> dict:
+        """Получить общую статистику по сборкам (чтение одной строки по первичному ключу)"""
         result = await self.db.execute(
-            select(Component).order_by(Component.category, Component.name)
+            select(BuildStats)
+            .where(BuildStats.id == BUILD_STATS_ID)
+            .execution_options(populate_existing=True)
         )
-        components = list(result.scalars().all())
+        stats = result.scalar_one_or_none()
+        if stats is None:
+            stats = await self.refresh_stats()
         
-        # Группируем по категориям
-        components_by_category: dict[str, list] = {}
-        for component in components:
-            category_name = component.category.value
-            if category_name not in components_by_category:
-                components_by_category[category_name] = []
-            components_by_category[category_name].append(ComponentResponse.model_validate(component))
-        
-        return {"components_by_category": components_by_category}
+        return {
+            "total_builds": stats.total_builds,
+            "total_ratings": stats.total_ratings,
+            "total_comments": stats.total_comments,
+            "average_rating": stats.rating_sum / stats.total_ratings if stats.total_ratings else 0.0
+        }
 
 
@@ -1,7 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
-from typing import Optional, List
-from app.models.component import Component, ComponentCategory
+from sqlalchemy import select, func, and_, or_, update, delete, case, true
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Optional, List, Dict, Any, Iterable
+from app.models.component import Component, ComponentCategory, components_staging
+from app.services.component_specs import extract_specs
+
+# Сколько товаров записывается одним INSERT ... ON CONFLICT
+UPSERT_BATCH_SIZE = 500
 
 
 class ComponentRepository:
@@ -60,6 +65,241 @@ class ComponentRepository:
             # Создаем новый
             return await self.create(name, link, price, image, category)
     
+    def _insert(self, table=Component):
+        """INSERT с поддержкой ON CONFLICT для диалекта сессии"""
+        if self.db.bind is not None and self.db.bind.dialect.name == "postgresql":
+            return postgresql.insert(table)
+        return sqlite.insert(table)
+    
+    @staticmethod
+    def _product_rows(products: Iterable[Dict[str, Any]], category: ComponentCategory) -> List[Dict[str, Any]]:
+        """Строки компонентов из товаров парсера (без ссылки пропускаются, повторы ссылки сводятся к последнему)"""
+        rows: Dict[str, Dict[str, Any]] = {}
+        for product in products:
+            link = product.get("link")
+            if not link:
+                continue
+            name = product.get("name", "")
+            rows[link] = {
+                "name": name,
+                "link": link,
+                "price": product.get("price"),
+                "image": product.get("image"),
+                "category": category,
+                "specs": extract_specs(name, category)
+            }
+        return list(rows.values())
+    
+    async def bulk_upsert(
+        self,
+        products: Iterable[Dict[str, Any]],
+        category: ComponentCategory,
+        batch_size: int = UPSERT_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """Создать или обновить товары пакетами INSERT ... ON CONFLICT (link) DO UPDATE
+        
+        Каждый пакет записывается одним запросом в своей транзакции.
+        Существующая строка обновляется, только если у товара изменились
+        название, цена, картинка или категория либо он снова появился
+        в магазине после пометки недоступным. Товары без ссылки
+        пропускаются, повторы ссылки внутри вызова сводятся к последнему.
+        
+        Args:
+            products: Товары парсера (name, link, price, image)
+            category: Категория товаров
+            batch_size: Количество товаров в пакете
+            
+        Returns:
+            Словарь с количеством созданных (inserted), обновленных (updated)
+            и неизменившихся (unchanged) компонентов
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        rows = self._product_rows(products, category)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            links = [row["link"] for row in batch]
+            try:
+                existing = set(
+                    (await self.db.execute(select(Component.link).where(Component.link.in_(links)))).scalars()
+                )
+                stmt = self._insert().values(batch)
+                excluded = stmt.excluded
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Component.link],
+                    set_={
+                        "name": excluded.name,
+                        "price": excluded.price,
+                        "image": excluded.image,
+                        "category": excluded.category,
+                        "specs": excluded.specs,
+                        "is_available": True,
+                        "updated_at": func.now()
+                    },
+                    # Неизменившиеся строки не перезаписываются и не возвращаются RETURNING
+                    where=or_(
+                        Component.name.is_distinct_from(excluded.name),
+                        Component.price.is_distinct_from(excluded.price),
+                        Component.image.is_distinct_from(excluded.image),
+                        Component.category.is_distinct_from(excluded.category),
+                        ~Component.is_available
+                    )
+                ).returning(Component.link)
+                written = set((await self.db.execute(stmt)).scalars())
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            counts["inserted"] += len(written - existing)
+            counts["updated"] += len(written & existing)
+            counts["unchanged"] += len(batch) - len(written)
+        return counts
+    
+    async def clear_staging(self) -> None:
+        """Очистить промежуточную таблицу синхронизации"""
+        await self.db.execute(delete(components_staging))
+        await self.db.commit()
+    
+    async def stage(
+        self,
+        products: Iterable[Dict[str, Any]],
+        category: ComponentCategory,
+        batch_size: int = UPSERT_BATCH_SIZE
+    ) -> int:
+        """Записать товары в промежуточную таблицу (components не изменяется)
+        
+        Args:
+            products: Товары парсера (name, link, price, image)
+            category: Категория товаров
+            batch_size: Количество товаров в пакете
+            
+        Returns:
+            int: Количество записанных товаров
+        """
+        rows = self._product_rows(products, category)
+        for start in range(0, len(rows), batch_size):
+            stmt = self._insert(components_staging).values(rows[start:start + batch_size])
+            excluded = stmt.excluded
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[components_staging.c.link],
+                set_={
+                    "name": excluded.name,
+                    "price": excluded.price,
+                    "image": excluded.image,
+                    "category": excluded.category,
+                    "specs": excluded.specs
+                }
+            ))
+            await self.db.commit()
+        return len(rows)
+    
+    async def apply_staging(self, categories: Iterable[ComponentCategory]) -> Dict[str, int]:
+        """Перенести промежуточную таблицу в components одной транзакцией
+        
+        Товары создаются или обновляются по ссылке, а доступные компоненты
+        переданных категорий, которых нет в промежуточной таблице, помечаются
+        недоступными (не удаляются: на них ссылаются сборки). Категории,
+        которые не удалось распарсить, передавать не нужно — иначе все их
+        компоненты станут недоступными. Читатели видят каталог либо до,
+        либо после переноса.
+        
+        Args:
+            categories: Полностью распарсенные категории
+            
+        Returns:
+            Словарь с количеством созданных (inserted), обновленных (updated),
+            неизменившихся (unchanged) и ставших недоступными (unavailable) компонентов
+        """
+        staged = components_staging.c
+        changed = or_(
+            Component.name.is_distinct_from(staged.name),
+            Component.price.is_distinct_from(staged.price),
+            Component.image.is_distinct_from(staged.image),
+            Component.category.is_distinct_from(staged.category),
+            ~Component.is_available
+        )
+        try:
+            total, inserted, updated = (await self.db.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(case((Component.id.is_(None), 1), else_=0)), 0),
+                    func.coalesce(func.sum(case((and_(Component.id.isnot(None), changed), 1), else_=0)), 0)
+                ).select_from(components_staging.outerjoin(Component, Component.link == staged.link))
+            )).one()
+            
+            columns = ["link", "name", "price", "image", "category", "specs"]
+            # WHERE true нужен SQLite, чтобы отличить ON CONFLICT от условия JOIN
+            stmt = self._insert().from_select(
+                columns, select(*(staged[column] for column in columns)).where(true())
+            )
+            excluded = stmt.excluded
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[Component.link],
+                set_={
+                    "name": excluded.name,
+                    "price": excluded.price,
+                    "image": excluded.image,
+                    "category": excluded.category,
+                    "specs": excluded.specs,
+                    "is_available": True,
+                    "updated_at": func.now()
+                },
+                where=or_(
+                    Component.name.is_distinct_from(excluded.name),
+                    Component.price.is_distinct_from(excluded.price),
+                    Component.image.is_distinct_from(excluded.image),
+                    Component.category.is_distinct_from(excluded.category),
+                    ~Component.is_available
+                )
+            ))
+            
+            result = await self.db.execute(
+                update(Component)
+                .where(
+                    Component.category.in_(list(categories)),
+                    Component.is_available,
+                    Component.link.notin_(select(staged.link))
+                )
+                .values(is_available=False, updated_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+            unavailable = result.rowcount
+            
+            await self.db.execute(delete(components_staging))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return {
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": total - inserted - updated,
+            "unavailable": unavailable
+        }
+    
+    async def refresh_specs(self) -> int:
+        """Пересчитать характеристики компонентов по названиям
+        
+        Обновляются только строки, у которых характеристики изменились
+        (новые компоненты, переименованные товары, новая версия правил
+        извлечения). Коммит выполняет вызывающий код.
+        
+        Returns:
+            int: Количество компонентов с обновленными характеристиками
+        """
+        result = await self.db.execute(
+            select(Component.id, Component.name, Component.category, Component.specs)
+        )
+        changes = []
+        for row in result:
+            specs = extract_specs(row.name, row.category)
+            if specs != row.specs:
+                changes.append({"id": row.id, "specs": specs})
+        
+        if changes:
+            # Пакетный UPDATE по первичному ключу
+            await self.db.execute(update(Component), changes)
+        return len(changes)
+    
     async def delete_all(self) -> int:
         """Удалить все компоненты"""
         try:
@@ -1,15 +1,15 @@
-from fastapi import APIRouter, Depends, Query, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Query, Request, Header
 from typing import List, Optional
 from app.dependencies.auth import get_current_user, get_optional_user
 from app.dependencies import get_build_service
 from app.models.user import User
 from app.services.build_service import BuildService
 from app.schemas.build import (
-    BuildCreate, BuildUpdate, BuildResponse, BuildListResponse, BuildTopResponse,
+    BuildCreate, BuildUpdate, BuildResponse, BuildListResponse, BuildTopResponse, BuildSimilarResponse,
     BuildRatingCreate, BuildRatingUpdate, BuildRatingResponse,
     BuildCommentCreate, BuildCommentUpdate, BuildCommentResponse, BuildCommentListResponse,
-    BuildCommentSingleResponse, BuildStatsResponse, BuildComponentsResponse
+    BuildCommentRepliesResponse, BuildCommentSingleResponse, BuildStatsResponse, BuildComponentsResponse, BuildExportRequest,
+    BuildOptimizeRequest, BuildOptimizeResponse
 )
 from app.schemas.common import MessageResponse
 
@@ -34,8 +34,12 @@ async def get_builds(
     limit: int = Query(20, ge=1, le=100),
     query: str = Query("", description="Поиск по названию или описанию"),
     author_id: Optional[int] = Query(None, description="Фильтр по автору"),
-    sort_by: str = Query("created_at", description="Поле для сортировки (created_at, views_count, average_rating, title)"),
+    sort_by: str = Query("created_at", description="Поле для сортировки (created_at, views_count, average_rating, title, total_price, relevance)"),
     order: str = Query("desc", description="Порядок сортировки (asc, desc)"),
+    min_price: Optional[int] = Query(None, ge=0, description="Минимальная стоимость сборки"),
+    max_price: Optional[int] = Query(None, ge=0, description="Максимальная стоимость сборки"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    estimate_total: bool = Query(False, description="Оценить общее количество по статистике БД (только без фильтров)"),
     build_service: BuildService = Depends(get_build_service)
 ):
     """Получить список сборок с фильтрами, сортировкой и пагинацией"""
@@ -45,7 +49,11 @@ async def get_builds(
         query=query,
         author_id=author_id,
         sort_by=sort_by,
-        order=order
+        order=order,
+        min_price=min_price,
+        max_price=max_price,
+        cursor=cursor,
+        estimate_total=estimate_total
     )
 
 
@@ -58,10 +66,21 @@ async def get_top_builds(
     return await build_service.get_top_builds(limit=limit)
 
 
+@router.get("/trending", response_model=BuildListResponse)
+async def get_trending_builds(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    build_service: BuildService = Depends(get_build_service)
+):
+    """Получить популярные сейчас сборки (просмотры, оценки и комментарии за последние дни)"""
+    return await build_service.get_trending_builds(skip=skip, limit=limit)
+
+
 @router.get("/my", response_model=BuildListResponse)
 async def get_my_builds(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
     current_user: User = Depends(get_current_user),
     build_service: BuildService = Depends(get_build_service)
 ):
@@ -69,7 +88,8 @@ async def get_my_builds(
     return await build_service.get_user_builds(
         author_id=current_user.id,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
 
@@ -83,10 +103,20 @@ async def get_builds_stats(
 
 @router.get("/components/unique", response_model=BuildComponentsResponse)
 async def get_unique_components(
+    if_none_match: Optional[str] = Header(None),
+    build_service: BuildService = Depends(get_build_service)
+):
+    """Получить список доступных компонентов, сгруппированных по категориям (поддерживает ETag / If-None-Match)"""
+    return await build_service.get_unique_components(if_none_match=if_none_match)
+
+
+@router.post("/optimize", response_model=BuildOptimizeResponse)
+async def optimize_build(
+    optimize_data: BuildOptimizeRequest,
     build_service: BuildService = Depends(get_build_service)
 ):
-    """Получить список доступных компонентов, сгруппированных по категориям"""
-    return await build_service.get_unique_components()
+    """Подобрать комплектующие по бюджету (несколько лучших вариантов)"""
+    return await build_service.optimize_build(optimize_data)
 
 
 @router.get("/{build_id}", response_model=BuildResponse)
@@ -100,6 +130,16 @@ async def get_build(
     return await build_service.get_build(build_id, request, current_user)
 
 
+@router.get("/{build_id}/similar", response_model=BuildSimilarResponse)
+async def get_similar_builds(
+    build_id: int,
+    limit: int = Query(6, ge=1, le=20, description="Количество похожих сборок"),
+    build_service: BuildService = Depends(get_build_service)
+):
+    """Получить сборки, похожие по составу компонентов"""
+    return await build_service.get_similar_builds(build_id, limit=limit)
+
+
 @router.put("/{build_id}", response_model=BuildResponse)
 async def update_build(
     build_id: int,
@@ -183,10 +223,23 @@ async def get_comments(
     build_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    replies_limit: int = Query(3, ge=0, le=20, description="Количество ответов на каждый комментарий"),
     build_service: BuildService = Depends(get_build_service)
 ):
-    """Получить комментарии к сборке"""
-    return await build_service.get_comments(build_id, skip, limit)
+    """Получить комментарии к сборке (с первыми ответами)"""
+    return await build_service.get_comments(build_id, skip, limit, replies_limit)
+
+
+@router.get("/{build_id}/comments/{comment_id}/replies", response_model=BuildCommentRepliesResponse)
+async def get_comment_replies(
+    build_id: int,
+    comment_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor или replies_next_cursor)"),
+    build_service: BuildService = Depends(get_build_service)
+):
+    """Получить ответы на комментарий постранично"""
+    return await build_service.get_comment_replies(build_id, comment_id, limit, cursor)
 
 
 @router.put("/{build_id}/comments/{comment_id}", response_model=BuildCommentSingleResponse)
@@ -214,12 +267,23 @@ async def delete_comment(
 
 # ==================== Endpoint для экспорта PDF ====================
 
+@router.post("/export")
+async def export_builds(
+    export_data: BuildExportRequest,
+    current_user: User = Depends(get_current_user),
+    build_service: BuildService = Depends(get_build_service)
+):
+    """Экспортировать несколько сборок в ZIP-архив с PDF (по списку ID или фильтрам поиска)"""
+    return await build_service.export_builds_zip(export_data, current_user)
+
+
 @router.get("/{build_id}/export/pdf")
 async def export_build_pdf(
     build_id: int,
+    if_none_match: Optional[str] = Header(None),
     build_service: BuildService = Depends(get_build_service)
 ):
-    """Экспортировать сборку в PDF"""
-    return await build_service.export_build_pdf(build_id)
+    """Экспортировать сборку в PDF (поддерживает ETag / If-None-Match)"""
+    return await build_service.export_build_pdf(build_id, if_none_match=if_none_match)
 
 
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Header
+from typing import List, Optional
 from app.dependencies import (
     require_admin_or_super_admin,
     get_component_repository,
@@ -9,6 +9,7 @@ from app.repositories.component_repository import ComponentRepository
 from app.schemas.component import ComponentResponse, ParseStatusResponse, ParseStartResponse
 from app.models.user import User
 from app.services.component_parser import ComponentParserService
+from app.services.component_catalog import component_catalog, catalog_response
 
 router = APIRouter(prefix="/components", tags=["components"])
 
@@ -16,7 +17,7 @@ router = APIRouter(prefix="/components", tags=["components"])
 @router.post("/parse", response_model=ParseStartResponse)
 async def start_parsing(
     background_tasks: BackgroundTasks,
-    clear_existing: bool = Query(True, description="Очистить существующие данные перед парсингом"),
+    clear_existing: bool = Query(True, description="Полная синхронизация: пропавшие из магазина товары помечаются недоступными"),
     current_user: User = Depends(require_admin_or_super_admin),
     component_repo: ComponentRepository = Depends(get_component_repository),
     component_parser_service: ComponentParserService = Depends(get_component_parser_service)
@@ -29,7 +30,7 @@ async def start_parsing(
     
     Args:
         background_tasks: FastAPI BackgroundTasks для запуска фоновых задач
-        clear_existing: Очистить существующие данные перед парсингом
+        clear_existing: Полная синхронизация каталога (иначе товары только добавляются и обновляются)
         current_user: Текущий пользователь
         component_repo: Репозиторий компонентов
         component_parser_service: Сервис парсинга компонентов
@@ -145,16 +146,20 @@ async def get_components_by_category(
     query: str = Query("", description="Поиск по названию"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
     component_repo: ComponentRepository = Depends(get_component_repository)
 ):
     """
     Получить компоненты по категории с поиском по названию
     
+    Ответ строится из снимка каталога в памяти, ETag — версия снимка.
+    
     Args:
         category: Категория компонента (значение ComponentCategory)
         query: Поисковый запрос по названию
         skip: Количество записей для пропуска
         limit: Максимальное количество записей
+        if_none_match: Значение заголовка If-None-Match
         component_repo: Репозиторий компонентов
     """
     from app.models.component import ComponentCategory
@@ -168,13 +173,11 @@ async def get_components_by_category(
             detail=f"Неизвестная категория: {category}"
         )
     
-    # Получаем компоненты по категории с поиском
-    components = await component_repo.get_by_category_with_search(
-        category=component_category,
-        query=query,
-        skip=skip,
-        limit=limit
+    # Получаем компоненты по категории с поиском из снимка каталога
+    snapshot = await component_catalog.get_snapshot(component_repo.db)
+    return catalog_response(
+        snapshot,
+        if_none_match,
+        lambda: snapshot.by_category_json(component_category, query, skip, limit)
     )
-    
-    return [ComponentResponse.model_validate(c) for c in components]
 
@@ -2,10 +2,12 @@ from .user import UserBase, UserCreate, UserResponse, UserUpdate, UserStats
 from .auth import Token, GoogleUserInfo, LoginResponse, LogoutResponse
 from .common import MessageResponse, ErrorResponse, SuccessResponse, PaginationParams, PaginatedResponse
 from .build import (
-    BuildBase, BuildCreate, BuildUpdate, BuildResponse, BuildListResponse, BuildTopResponse,
+    BuildBase, BuildCreate, BuildUpdate, BuildResponse, BuildSummaryResponse, BuildListResponse, BuildTopResponse,
+    SimilarBuildResponse, BuildSimilarResponse,
     BuildRatingCreate, BuildRatingUpdate, BuildRatingResponse,
     BuildCommentCreate, BuildCommentUpdate, BuildCommentResponse, BuildCommentListResponse,
-    BuildStatsResponse
+    BuildCommentRepliesResponse, BuildStatsResponse, BuildExportRequest,
+    BuildOptimizeRequest, OptimizedBuildResponse, BuildOptimizeResponse
 )
 from .balance import (
     BalanceResponse, TransactionBase, TransactionCreate, TransactionResponse,
@@ -35,8 +37,11 @@ __all__ = [
     "BuildCreate",
     "BuildUpdate",
     "BuildResponse",
+    "BuildSummaryResponse",
     "BuildListResponse",
     "BuildTopResponse",
+    "SimilarBuildResponse",
+    "BuildSimilarResponse",
     "BuildRatingCreate",
     "BuildRatingUpdate",
     "BuildRatingResponse",
@@ -44,7 +49,12 @@ __all__ = [
     "BuildCommentUpdate",
     "BuildCommentResponse",
     "BuildCommentListResponse",
+    "BuildCommentRepliesResponse",
     "BuildStatsResponse",
+    "BuildExportRequest",
+    "BuildOptimizeRequest",
+    "OptimizedBuildResponse",
+    "BuildOptimizeResponse",
     # Balance schemas
     "BalanceResponse",
     "TransactionBase",
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Annotated
 from app.schemas.component import ComponentResponse
 from app.models.component import ComponentCategory
 
@@ -46,6 +46,26 @@ class BuildResponse(BuildBase):
     average_rating: float
     ratings_count: int
     total_price: float = Field(default=0.0, description="Общая стоимость сборки из суммы цен компонентов")
+    comments_count: int = Field(default=0, description="Количество комментариев вместе с ответами")
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BuildSummaryResponse(BaseModel):
+    """Краткая схема сборки для списков (без компонентов)"""
+    id: int
+    title: str
+    description: str
+    additional_info: Optional[str] = None
+    author_id: int
+    author: Optional[BuildAuthor] = None
+    views_count: int
+    average_rating: float
+    ratings_count: int
+    total_price: float = Field(default=0.0, description="Общая стоимость сборки из суммы цен компонентов")
+    comments_count: int = Field(default=0, description="Количество комментариев вместе с ответами")
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -54,19 +74,32 @@ class BuildResponse(BuildBase):
 
 class BuildListResponse(BaseModel):
     """Схема для списка сборок с пагинацией"""
-    builds: List[BuildResponse]
+    builds: List[BuildSummaryResponse]
     total: int
-    page: int
+    page: Optional[int] = None  # не определена при пагинации по курсору
     per_page: int
     total_pages: int
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False  # total получен по статистике БД, а не точным подсчетом
 
 
 class BuildTopResponse(BaseModel):
     """Схема для топа сборок"""
-    builds: List[BuildResponse]
+    builds: List[BuildSummaryResponse]
     total: int
 
 
+class SimilarBuildResponse(BuildSummaryResponse):
+    """Схема похожей сборки"""
+    similarity: float = Field(..., description="Коэффициент Жаккара по множествам компонентов")
+    common_components: int = Field(..., description="Количество общих компонентов")
+
+
+class BuildSimilarResponse(BaseModel):
+    """Схема для похожих сборок"""
+    builds: List[SimilarBuildResponse]
+
+
 # Схемы для оценок (BuildRating)
 class BuildRatingCreate(BaseModel):
     """Схема для создания оценки"""
@@ -135,7 +168,9 @@ class BuildCommentResponse(BaseModel):
     parent_id: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
-    replies: Optional[List[BuildCommentReplyResponse]] = []
+    replies: Optional[List[BuildCommentReplyResponse]] = Field(default=[], description="Первые ответы на комментарий")
+    replies_count: int = Field(default=0, description="Общее количество ответов")
+    replies_next_cursor: Optional[str] = Field(None, description="Курсор для загрузки остальных ответов")
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -160,6 +195,13 @@ class BuildCommentListResponse(BaseModel):
     total: int
 
 
+class BuildCommentRepliesResponse(BaseModel):
+    """Схема для страницы ответов на комментарий"""
+    replies: List[BuildCommentReplyResponse]
+    total: int
+    next_cursor: Optional[str] = None
+
+
 # Схемы для статистики
 class BuildStatsResponse(BaseModel):
     """Схема для статистики сборок"""
@@ -178,3 +220,44 @@ class BuildComponentsResponse(BaseModel):
     )
 
 
+# Схема для массового экспорта
+class BuildExportRequest(BaseModel):
+    """Схема запроса массового экспорта сборок в PDF (ZIP-архив)
+
+    Если указан build_ids, экспортируются эти сборки (с учетом фильтров),
+    иначе — все сборки, подходящие под фильтры поиска.
+    """
+    build_ids: Optional[List[int]] = Field(None, min_length=1, max_length=500, description="ID сборок для экспорта")
+    query: str = Field("", description="Поиск по названию или описанию")
+    author_id: Optional[int] = Field(None, description="Фильтр по автору")
+    min_price: Optional[int] = Field(None, ge=0, description="Минимальная стоимость сборки")
+    max_price: Optional[int] = Field(None, ge=0, description="Максимальная стоимость сборки")
+
+
+# Схемы для подбора сборки по бюджету
+class BuildOptimizeRequest(BaseModel):
+    """Схема запроса подбора комплектующих по бюджету"""
+    budget: int = Field(..., gt=0, le=10_000_000, description="Бюджет в рублях")
+    weights: Dict[ComponentCategory, Annotated[float, Field(ge=0, le=100)]] = Field(
+        default_factory=dict,
+        description="Веса категорий в оценке сборки (по умолчанию видеокарта и процессор важнее остальных)"
+    )
+    pinned_component_ids: List[int] = Field(
+        default_factory=list,
+        max_length=9,
+        description="ID компонентов, которые обязательно войдут в сборку (не больше одного на категорию)"
+    )
+    top_k: int = Field(3, ge=1, le=10, description="Количество вариантов сборки")
+
+
+class OptimizedBuildResponse(BaseModel):
+    """Схема варианта сборки, подобранного по бюджету"""
+    components: List[ComponentResponse]
+    total_price: int
+    score: float
+
+
+class BuildOptimizeResponse(BaseModel):
+    """Схема ответа подбора комплектующих по бюджету"""
+    budget: int
+    builds: List[OptimizedBuildResponse]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 from app.models.component import ComponentCategory
 
@@ -14,6 +14,8 @@ class ComponentResponse(BaseModel):
     category: ComponentCategory
     created_at: datetime
     updated_at: Optional[datetime]
+    specs: Optional[Dict[str, Any]] = None
+    is_available: bool = True
 
     class Config:
         from_attributes = True
@@ -3,6 +3,7 @@
 """
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone, timedelta
 
 
@@ -39,6 +40,153 @@ async def cleanup_auth_tokens_task():
         await asyncio.sleep(60)  # Очищаем каждую минуту
 
 
+async def flush_build_views():
+    """Перенести накопленные в Redis просмотры сборок в БД"""
+    from app.database import AsyncSessionLocal
+    from app.dependencies.services import get_redis_service
+    from app.repositories.build_repository import BuildRepository
+    from app.services.view_counter import ViewCounter
+
+    async with AsyncSessionLocal() as db:
+        updated = await ViewCounter(get_redis_service()).flush(BuildRepository(db))
+    if updated:
+        logger.info(f"Записаны просмотры для {updated} сборок")
+    return updated
+
+
+async def flush_build_views_task():
+    """Периодическая запись буферизованных просмотров сборок"""
+    while True:
+        await asyncio.sleep(10)  # Записываем каждые 10 секунд
+        try:
+            await flush_build_views()
+        except Exception as e:
+            logger.error(f"Ошибка при записи просмотров сборок: {e}")
+
+
+async def refresh_build_stats_task():
+    """Периодическая сверка счетчиков build_stats с таблицами
+
+    Счетчики поддерживаются при записи через BuildRepository; сверка
+    исправляет расхождения от каскадных удалений (например, пользователя).
+    """
+    while True:
+        await asyncio.sleep(3600)  # Сверяем каждый час
+        try:
+            from app.database import AsyncSessionLocal
+            from app.repositories.build_repository import BuildRepository
+
+            async with AsyncSessionLocal() as db:
+                await BuildRepository(db).refresh_stats()
+        except Exception as e:
+            logger.error(f"Ошибка при пересчете статистики сборок: {e}")
+
+
+async def build_similarity_index_task():
+    """Построение индекса похожих сборок
+
+    Индекс обновляется при записи сборок; задача строит его по БД при
+    первом запуске и перестраивает, если признак готовности пропал
+    (очистка Redis или сбой инкрементального обновления).
+    """
+    while True:
+        try:
+            from app.database import AsyncSessionLocal
+            from app.dependencies.services import get_redis_service
+            from app.repositories.build_repository import BuildRepository
+            from app.services.build_similarity import BuildSimilarityIndex
+
+            index = BuildSimilarityIndex(get_redis_service())
+            if not await index.is_ready():
+                async with AsyncSessionLocal() as db:
+                    indexed = await index.rebuild(BuildRepository(db))
+                if indexed is not None:
+                    logger.info(f"Построен индекс похожих сборок: {indexed} сборок")
+        except Exception as e:
+            logger.error(f"Ошибка при построении индекса похожих сборок: {e}")
+        await asyncio.sleep(60)  # Проверяем каждую минуту
+
+
+async def build_leaderboard_task():
+    """Построение топа сборок по байесовскому рейтингу
+
+    Веса обновляются при записи оценок; задача строит топ по БД при первом
+    запуске или пропаже параметров и раз в час перестраивает его, чтобы
+    учесть изменение средней оценки по всем сборкам.
+    """
+    last_rebuild = None
+    while True:
+        try:
+            from app.database import AsyncSessionLocal
+            from app.dependencies.services import get_redis_service
+            from app.repositories.build_repository import BuildRepository
+            from app.services.build_leaderboard import BuildLeaderboard
+
+            leaderboard = BuildLeaderboard(get_redis_service())
+            now = asyncio.get_running_loop().time()
+            if (
+                last_rebuild is None
+                or now - last_rebuild >= 3600
+                or await leaderboard.get_params() is None
+            ):
+                async with AsyncSessionLocal() as db:
+                    ranked = await leaderboard.rebuild(BuildRepository(db))
+                if ranked is not None:
+                    last_rebuild = now
+                    logger.info(f"Построен топ сборок: {ranked} сборок")
+        except Exception as e:
+            logger.error(f"Ошибка при построении топа сборок: {e}")
+        await asyncio.sleep(60)  # Проверяем каждую минуту
+
+
+async def build_trending_task():
+    """Обслуживание популярных сейчас сборок
+
+    Строит множество по БД при первом запуске или пропаже epoch и раз
+    в сутки приводит веса к текущему моменту.
+    """
+    while True:
+        try:
+            from app.database import AsyncSessionLocal
+            from app.dependencies.services import get_redis_service
+            from app.repositories.build_repository import BuildRepository
+            from app.services.build_trending import BuildTrending, TRENDING_RESCALE_INTERVAL
+
+            trending = BuildTrending(get_redis_service())
+            epoch = await trending.get_epoch()
+            if epoch is None:
+                async with AsyncSessionLocal() as db:
+                    ranked = await trending.rebuild(BuildRepository(db))
+                if ranked is not None:
+                    logger.info(f"Построены популярные сборки: {ranked} сборок")
+            elif time.time() - epoch >= TRENDING_RESCALE_INTERVAL:
+                if await trending.rescale():
+                    logger.info("Веса популярных сборок приведены к текущему моменту")
+        except Exception as e:
+            logger.error(f"Ошибка при обслуживании популярных сборок: {e}")
+        await asyncio.sleep(600)  # Проверяем каждые 10 минут
+
+
+async def component_catalog_listener_task():
+    """Подписка на объявления новых версий каталога компонентов
+
+    При обрыве соединения с Redis переподписывается; после подписки
+    каталог сверяется с последней объявленной версией.
+    """
+    from app.database import AsyncSessionLocal
+    from app.dependencies.services import get_redis_service
+    from app.services.component_catalog import component_catalog
+
+    while True:
+        try:
+            await component_catalog.listen(get_redis_service(), AsyncSessionLocal)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка подписки на обновления каталога компонентов: {e}")
+        await asyncio.sleep(5)  # Переподписываемся через 5 секунд
+
+
 async def check_pending_payments_task():
     """Периодическая проверка статусов ожидающих платежей"""
     while True:
@@ -0,0 +1,157 @@
+"""
+Топ сборок по байесовскому рейтингу (упорядоченное множество в Redis)
+"""
+from typing import List, Optional, Tuple
+import logging
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Упорядоченное множество ID сборок с весом — байесовским рейтингом
+LEADERBOARD_KEY = "build_leaderboard:top"
+# Временный ключ для перестроения (подменяет основной через RENAME)
+LEADERBOARD_REBUILD_KEY = "build_leaderboard:rebuild"
+# Параметры априорного распределения, с которыми посчитаны веса
+LEADERBOARD_PARAMS_KEY = "build_leaderboard:params"
+# Блокировка перестроения (одновременно строит только один воркер)
+LEADERBOARD_REBUILD_LOCK_KEY = "build_leaderboard:rebuild_lock"
+LEADERBOARD_REBUILD_LOCK_TTL = 300
+
+# Вес априорной оценки: сборка с таким числом оценок наполовину
+# определяется своим средним и наполовину средним по всем сборкам
+LEADERBOARD_PRIOR_WEIGHT = 5
+# Априорное среднее, пока на сайте нет ни одной оценки
+LEADERBOARD_DEFAULT_MEAN = 3.0
+
+# Сколько сборок записывается в Redis за одну команду при перестроении
+LEADERBOARD_REBUILD_BATCH_SIZE = 1000
+
+
+def bayesian_rating(rating_sum: float, ratings_count: int, prior_mean: float, prior_weight: float) -> float:
+    """
+    Байесовский рейтинг: среднее оценок, сглаженное к среднему по всем сборкам
+
+    Сборка с одной оценкой 5 не обгоняет сборку с сотней оценок 4.9:
+    пока оценок мало, рейтинг близок к prior_mean.
+
+    Args:
+        rating_sum: Сумма оценок сборки
+        ratings_count: Количество оценок сборки
+        prior_mean: Средняя оценка по всем сборкам
+        prior_weight: Вес априорной оценки (в «оценках»)
+    """
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + ratings_count)
+
+
+class BuildLeaderboard:
+    """Заранее посчитанный топ сборок
+
+    Вес сборки пересчитывается при каждой записи оценки (O(log N) в Redis),
+    а чтение топа — это ZREVRANGE и один запрос к БД за данными сборок.
+    Параметры априорного распределения фиксируются при перестроении, чтобы
+    все веса в множестве были посчитаны по одной формуле; фоновая задача
+    периодически перестраивает множество по БД с обновленным средним.
+    Пока параметров нет (пустой Redis), топ возвращает None и вызывающий
+    код считает его запросом к БД.
+    """
+
+    def __init__(self, redis_service: RedisService):
+        self.redis_service = redis_service
+
+    async def get_params(self) -> Optional[Tuple[float, float]]:
+        """Параметры (среднее, вес), с которыми построен топ, или None, если топ не готов"""
+        params = await self.redis_service.get(LEADERBOARD_PARAMS_KEY)
+        if not params:
+            return None
+        return params["mean"], params["weight"]
+
+    async def update(self, build_id: int, ratings_count: int, rating_sum: float) -> None:
+        """
+        Пересчитать вес сборки после изменения ее оценок
+
+        Args:
+            build_id: ID сборки
+            ratings_count: Количество оценок после изменения
+            rating_sum: Сумма оценок после изменения
+        """
+        params = await self.get_params()
+        if params is None:
+            return
+        if ratings_count < 1:
+            applied = await self.redis_service.zrem(LEADERBOARD_KEY, str(build_id))
+        else:
+            score = bayesian_rating(rating_sum, ratings_count, *params)
+            applied = await self.redis_service.zadd(LEADERBOARD_KEY, {str(build_id): score})
+        if not applied:
+            await self._invalidate()
+
+    async def remove(self, *build_ids: int) -> None:
+        """Удалить сборки из топа"""
+        if not await self.redis_service.zrem(LEADERBOARD_KEY, *(str(build_id) for build_id in build_ids)):
+            await self._invalidate()
+
+    async def _invalidate(self) -> None:
+        """Снять признак готовности: топ устарел и будет перестроен"""
+        logger.warning("Топ сборок не обновлен, будет перестроен")
+        await self.redis_service.delete(LEADERBOARD_PARAMS_KEY)
+
+    async def top_ids(self, limit: int) -> Optional[List[int]]:
+        """
+        ID сборок с наибольшим рейтингом
+
+        Args:
+            limit: Количество сборок
+
+        Returns:
+            Список ID по убыванию рейтинга или None, если топ не готов или недоступен
+        """
+        if await self.get_params() is None:
+            return None
+        members = await self.redis_service.zrevrange(LEADERBOARD_KEY, 0, limit - 1)
+        if members is None:
+            return None
+        return [int(member) for member in members]
+
+    async def rebuild(self, build_repo) -> Optional[int]:
+        """
+        Перестроить топ по агрегатам оценок в БД
+
+        Множество собирается во временном ключе и подменяет основное
+        атомарным RENAME, поэтому читатели не видят частично построенный топ.
+
+        Args:
+            build_repo: Репозиторий сборок (BuildRepository)
+
+        Returns:
+            Количество сборок в топе или None, если топ уже перестраивает
+            другой воркер
+        """
+        if not await self.redis_service.set_nx(LEADERBOARD_REBUILD_LOCK_KEY, "1", ttl=LEADERBOARD_REBUILD_LOCK_TTL):
+            return None
+        try:
+            stats = await build_repo.get_stats()
+            prior_mean = stats["average_rating"] if stats["total_ratings"] else LEADERBOARD_DEFAULT_MEAN
+            prior_weight = LEADERBOARD_PRIOR_WEIGHT
+            rated = await build_repo.get_rating_aggregates()
+
+            await self.redis_service.delete(LEADERBOARD_REBUILD_KEY)
+            for start in range(0, len(rated), LEADERBOARD_REBUILD_BATCH_SIZE):
+                mapping = {
+                    str(build_id): bayesian_rating(rating_sum, ratings_count, prior_mean, prior_weight)
+                    for build_id, ratings_count, rating_sum in rated[start:start + LEADERBOARD_REBUILD_BATCH_SIZE]
+                }
+                if not await self.redis_service.zadd(LEADERBOARD_REBUILD_KEY, mapping):
+                    return 0
+
+            # Параметры записываются до подмены: оценки, поставленные между
+            # подменой и записью параметров, иначе посчитались бы со старым средним
+            await self.redis_service.set(LEADERBOARD_PARAMS_KEY, {"mean": prior_mean, "weight": prior_weight})
+            if rated:
+                if not await self.redis_service.rename(LEADERBOARD_REBUILD_KEY, LEADERBOARD_KEY):
+                    await self._invalidate()
+                    return 0
+            else:
+                await self.redis_service.delete(LEADERBOARD_KEY)
+            return len(rated)
+        finally:
+            await self.redis_service.delete(LEADERBOARD_REBUILD_LOCK_KEY)
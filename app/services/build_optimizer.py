@@ -0,0 +1,466 @@
+"""
+Подбор комплектующих по бюджету
+
+Задача — multiple-choice knapsack: из каждой группы (обязательные категории
+и накопитель) выбирается ровно один компонент так, чтобы суммарная оценка
+была максимальной, а стоимость не превышала бюджет. Решается динамическим
+программированием по дискретизированному бюджету на массивах NumPy,
+в каждой ячейке хранятся k лучших частичных сборок.
+
+Совместимость учитывается через платформу материнской платы (сокет, тип
+памяти, форм-фактор): группы, не зависящие от платформы, решаются один раз,
+а плата, процессор, память и корпус — отдельно для каждой платформы поверх
+общей таблицы. Мощность блока питания проверяется по готовым сборкам.
+"""
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.models.component import ComponentCategory
+from app.repositories.build_repository import REQUIRED_CATEGORIES, STORAGE_CATEGORIES, CATEGORY_NAMES
+from app.services.component_catalog import CatalogSnapshot
+from app.services.component_specs import check_compatibility, fits_platform, platform_key
+
+# Группы выбора: по одному компоненту из каждой
+OPTIMIZER_GROUPS: Tuple[Tuple[ComponentCategory, ...], ...] = tuple(
+    (category,) for category in sorted(REQUIRED_CATEGORIES, key=lambda c: c.value)
+) + (tuple(sorted(STORAGE_CATEGORIES, key=lambda c: c.value)),)
+
+# Вес категории по умолчанию (вклад в оценку сборки)
+DEFAULT_CATEGORY_WEIGHTS: Dict[ComponentCategory, float] = {
+    ComponentCategory.VIDEOKARTY: 3.0,
+    ComponentCategory.PROCESSORY: 2.0,
+    ComponentCategory.OPERATIVNAYA_PAMYAT: 1.0,
+    ComponentCategory.MATERINSKIE_PLATY: 1.0,
+    ComponentCategory.SSD_NAKOPITELI: 1.0,
+    ComponentCategory.ZHESTKIE_DISKI: 0.5,
+    ComponentCategory.BLOKI_PITANIYA: 0.5,
+    ComponentCategory.OHLAZHDENIE: 0.5,
+    ComponentCategory.KORPUSA: 0.5,
+}
+
+# Количество шагов дискретизации бюджета: цены округляются вверх до шага,
+# поэтому найденные сборки всегда укладываются в бюджет
+OPTIMIZER_BUDGET_STEPS = 1000
+
+# Категории, совместимость которых определяется платформой материнской платы
+PLATFORM_CATEGORIES = frozenset({
+    ComponentCategory.MATERINSKIE_PLATY,
+    ComponentCategory.PROCESSORY,
+    ComponentCategory.OPERATIVNAYA_PAMYAT,
+    ComponentCategory.KORPUSA,
+})
+
+# Характеристика платформы (индекс в platform_key), от которой зависит совместимость категории
+_PLATFORM_FIELDS = {
+    ComponentCategory.PROCESSORY: 0,
+    ComponentCategory.OPERATIVNAYA_PAMYAT: 1,
+    ComponentCategory.KORPUSA: 2,
+}
+
+# Во сколько раз больше сборок ищется, чтобы после проверки мощности блока
+# питания осталось top_k
+OPTIMIZER_OVERSAMPLING = 3
+
+
+class OptimizedBuild:
+    """Найденная сборка"""
+
+    def __init__(self, component_ids: List[int], total_price: int, score: float):
+        self.component_ids = component_ids
+        self.total_price = total_price
+        self.score = score
+
+
+class _Group:
+    """Варианты выбора одной группы после отсечения"""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        prices: np.ndarray,
+        costs: np.ndarray,
+        scores: np.ndarray,
+        specs: np.ndarray,
+        min_price: int
+    ):
+        self.ids = ids
+        self.prices = prices
+        self.costs = costs
+        self.scores = scores
+        # Характеристики вариантов (массив словарей)
+        self.specs = specs
+        # Минимальная цена в группе до отсечения по бюджету (для сообщения об ошибке)
+        self.min_price = min_price
+
+    def restrict(self, mask: np.ndarray) -> "_Group":
+        """Оставить только варианты по маске"""
+        return _Group(
+            self.ids[mask], self.prices[mask], self.costs[mask], self.scores[mask], self.specs[mask], self.min_price
+        )
+
+    def min_cost(self, capacity: int) -> int:
+        """Минимальная стоимость варианта в шагах (capacity + 1 для пустой группы)"""
+        return int(self.costs.min()) if len(self.costs) else capacity + 1
+
+
+# Таблицы выбора группы: вариант и ранг в предыдущей таблице для каждой (ячейки, ранга)
+_Choices = Tuple[np.ndarray, np.ndarray]
+# Решенная цепочка групп: группы, итоговая таблица оценок, таблицы выбора
+_Chain = Tuple[List[_Group], np.ndarray, List[_Choices]]
+
+
+class BuildOptimizer:
+    """Оптимизатор сборки по бюджету
+
+    Оценка компонента — вес его категории, умноженный на нормированный
+    логарифм цены внутри группы (0 у самого дешевого, 1 у самого дорогого):
+    при отсутствии характеристик цена служит приближением производительности,
+    а логарифм дает убывающую отдачу, поэтому бюджет распределяется
+    между категориями, а не уходит целиком в одну.
+    """
+
+    def __init__(self, budget_steps: int = OPTIMIZER_BUDGET_STEPS):
+        self.budget_steps = budget_steps
+
+    def optimize(
+        self,
+        snapshot: CatalogSnapshot,
+        budget: int,
+        weights: Optional[Dict[ComponentCategory, float]] = None,
+        pinned_ids: Iterable[int] = (),
+        top_k: int = 3
+    ) -> List[OptimizedBuild]:
+        """
+        Подобрать лучшие сборки в пределах бюджета
+
+        Args:
+            snapshot: Снимок каталога
+            budget: Бюджет в рублях
+            weights: Веса категорий (дополняют DEFAULT_CATEGORY_WEIGHTS)
+            pinned_ids: ID компонентов, которые обязательно войдут в сборку
+            top_k: Количество сборок
+
+        Returns:
+            До top_k различных совместимых сборок по убыванию оценки
+
+        Raises:
+            ValueError: Некорректные закрепленные компоненты, бюджет меньше минимальной
+                сборки или отсутствие совместимых сборок
+        """
+        category_weights = {**DEFAULT_CATEGORY_WEIGHTS, **(weights or {})}
+        pins = self._group_pins(snapshot, pinned_ids)
+        search_k = top_k * OPTIMIZER_OVERSAMPLING
+
+        step = max(1, math.ceil(budget / self.budget_steps))
+        capacity = budget // step
+
+        groups = {
+            categories: self._build_group(snapshot, categories, category_weights, pins.get(index), step, capacity)
+            for index, categories in enumerate(OPTIMIZER_GROUPS)
+        }
+
+        # Вариант не войдет ни в одну сборку, если вместе с самыми дешевыми
+        # вариантами остальных групп он выходит за бюджет (минимумы без учета
+        # платформы не больше минимумов любой платформы)
+        total_min_cost = sum(group.min_cost(capacity) for group in groups.values())
+        prefix = self._prune(
+            [group for categories, group in groups.items() if categories[0] not in PLATFORM_CATEGORIES],
+            capacity, total_min_cost, search_k
+        )
+        prefix_chain = (prefix, *self._solve(prefix, capacity, search_k))
+
+        # Совместимость процессора, памяти и корпуса зависит от одной характеристики
+        # платы, поэтому группы кэшируются по ее значению
+        platform_groups: Dict[Tuple[ComponentCategory, Optional[str]], _Group] = {}
+
+        def platform_group(
+            category: ComponentCategory,
+            platform: Tuple[Optional[str], Optional[str], Optional[str]]
+        ) -> _Group:
+            key = (category, platform[_PLATFORM_FIELDS[category]])
+            if key not in platform_groups:
+                group = self._platform_group(groups[(category,)], category, platform)
+                platform_groups[key] = self._prune([group], capacity, total_min_cost, search_k)[0]
+            return platform_groups[key]
+
+        # Этапы платформы добавляются к общему префиксу: корпус зависит только
+        # от форм-фактора, память — от форм-фактора и типа памяти, поэтому их
+        # таблицы общие для платформ; процессор считается только в ячейках,
+        # из которых бюджет достижим платой платформы, плата — в одной ячейке
+        shared_chains: Dict[Tuple[Optional[str], ...], _Chain] = {}
+        candidates: List[Tuple[float, int, int]] = []  # (оценка, номер решения, ранг)
+        solutions: List[_Chain] = []
+        board_group = groups[(ComponentCategory.MATERINSKIE_PLATY,)]
+        board_platforms = [platform_key(specs) for specs in board_group.specs]
+        platforms = {platform: code for code, platform in enumerate(dict.fromkeys(board_platforms))}
+        board_codes = np.fromiter(
+            (platforms[platform] for platform in board_platforms), dtype=np.int64, count=len(board_platforms)
+        )
+        for platform, code in platforms.items():
+            _, memory_type, form_factor = platform
+            board = self._prune([board_group.restrict(board_codes == code)], capacity, total_min_cost, search_k)[0]
+            processor = platform_group(ComponentCategory.PROCESSORY, platform)
+            if not len(board.costs) or not len(processor.costs):
+                continue
+
+            chain = prefix_chain
+            for key, category in (
+                ((form_factor,), ComponentCategory.KORPUSA),
+                ((form_factor, memory_type), ComponentCategory.OPERATIVNAYA_PAMYAT),
+            ):
+                if key not in shared_chains:
+                    shared_chains[key] = self._extend(chain, platform_group(category, platform), capacity, search_k)
+                chain = shared_chains[key]
+            chain = self._extend(chain, processor, capacity, search_k, rows=np.unique(capacity - board.costs))
+            chain = self._extend(chain, board, capacity, search_k, rows=np.array([capacity]))
+
+            best = chain[1]
+            for rank in range(search_k):
+                score = best[capacity, rank]
+                if not np.isfinite(score):
+                    break
+                candidates.append((float(score), len(solutions), rank))
+            solutions.append(chain)
+
+        builds = []
+        for score, solution, rank in sorted(candidates, key=lambda candidate: -candidate[0]):
+            chain_groups, _, choices = solutions[solution]
+            build = self._backtrack(chain_groups, choices, capacity, rank, score)
+            if check_compatibility(snapshot.get_profiles(build.component_ids).values()):
+                continue
+            builds.append(build)
+            if len(builds) == top_k:
+                break
+
+        if not builds:
+            minimal = sum(group.min_price for group in groups.values())
+            if minimal > budget:
+                raise ValueError(f"Бюджета недостаточно: минимальная стоимость сборки {minimal} ₽")
+            raise ValueError("Нет совместимых сборок в пределах бюджета")
+        return builds
+
+    @staticmethod
+    def _group_pins(snapshot: CatalogSnapshot, pinned_ids: Iterable[int]) -> Dict[int, int]:
+        """Сопоставить закрепленные компоненты группам (индекс группы -> ID)"""
+        group_by_category = {
+            category: index for index, categories in enumerate(OPTIMIZER_GROUPS) for category in categories
+        }
+        pins: Dict[int, int] = {}
+        for component_id in dict.fromkeys(pinned_ids):
+            component = snapshot.get(component_id)
+            if component is None or not component.price:
+                raise ValueError(f"Компонент с ID {component_id} не найден или не имеет цены")
+            index = group_by_category.get(component.category)
+            if index is None:
+                raise ValueError(f"Компонент с ID {component_id} не участвует в подборе")
+            if index in pins:
+                raise ValueError(f"Закреплено несколько компонентов одной категории: {pins[index]}, {component_id}")
+            pins[index] = component_id
+        return pins
+
+    @staticmethod
+    def _build_group(
+        snapshot: CatalogSnapshot,
+        categories: Sequence[ComponentCategory],
+        weights: Dict[ComponentCategory, float],
+        pinned_id: Optional[int],
+        step: int,
+        capacity: int
+    ) -> _Group:
+        """Собрать массивы группы: стоимость в шагах бюджета, оценка и характеристики"""
+        ids_parts, prices_parts, weight_parts = [], [], []
+        for category in categories:
+            ids, prices = snapshot.price_arrays(category)
+            ids_parts.append(ids)
+            prices_parts.append(prices)
+            weight_parts.append(np.full(len(ids), weights.get(category, 0.0)))
+        ids = np.concatenate(ids_parts)
+        prices = np.concatenate(prices_parts)
+        category_weights = np.concatenate(weight_parts)
+
+        if len(ids) == 0:
+            names = ", ".join(CATEGORY_NAMES.get(category, category.value) for category in categories)
+            raise ValueError(f"Нет компонентов с ценой в категории: {names}")
+
+        # Нормировка по всей группе, а не по закрепленному компоненту
+        log_prices = np.log(prices.astype(np.float64))
+        low, high = log_prices.min(), log_prices.max()
+        normalized = (log_prices - low) / (high - low) if high > low else np.ones(len(ids))
+        scores = category_weights * normalized
+        costs = -(-prices // step)
+
+        if pinned_id is not None:
+            pinned = ids == pinned_id
+            ids, prices, costs, scores = ids[pinned], prices[pinned], costs[pinned], scores[pinned]
+        min_price = int(prices.min())
+
+        # Варианты дороже всего бюджета не участвуют (группа может остаться пустой)
+        affordable = costs <= capacity
+        ids, prices, costs, scores = ids[affordable], prices[affordable], costs[affordable], scores[affordable]
+        profiles = snapshot.get_profiles(int(component_id) for component_id in ids)
+        specs = np.empty(len(ids), dtype=object)
+        specs[:] = [profiles[int(component_id)][1] or {} for component_id in ids]
+        return _Group(ids, prices, costs, scores, specs, min_price)
+
+    @staticmethod
+    def _platform_group(
+        group: _Group,
+        category: ComponentCategory,
+        platform: Tuple[Optional[str], Optional[str], Optional[str]]
+    ) -> _Group:
+        """Варианты группы, совместимые с платформой материнской платы"""
+        matches = (fits_platform(category, specs, platform) for specs in group.specs)
+        return group.restrict(np.fromiter(matches, dtype=bool, count=len(group.specs)))
+
+    @staticmethod
+    def _prune(groups: List[_Group], capacity: int, total_min_cost: int, top_k: int) -> List[_Group]:
+        """
+        Отсечь варианты, не способные войти в k лучших сборок
+
+        Args:
+            groups: Группы
+            capacity: Бюджет в шагах
+            total_min_cost: Нижняя граница стоимости самой дешевой сборки в шагах
+            top_k: Количество сборок
+        """
+        pruned = []
+        for group in groups:
+            group = group.restrict(group.costs <= capacity - (total_min_cost - group.min_cost(capacity)))
+            pruned.append(group.restrict(BuildOptimizer._top_k_pareto(group.costs, group.scores, top_k)))
+        return pruned
+
+    @staticmethod
+    def _top_k_pareto(costs: np.ndarray, scores: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Индексы вариантов, которые могут войти в k лучших сборок
+
+        Вариант, у которого есть k других не дороже и не хуже по оценке,
+        заменяется любым из них и не нужен динамическому программированию.
+        """
+        order = np.lexsort((-scores, costs))
+        keep = []
+        best_scores: List[float] = []  # k лучших оценок среди уже просмотренных (min-куча)
+        for index in order:
+            score = scores[index]
+            if len(best_scores) < top_k:
+                heapq.heappush(best_scores, score)
+            elif score > best_scores[0]:
+                heapq.heapreplace(best_scores, score)
+            else:
+                continue
+            keep.append(index)
+        return np.array(keep, dtype=np.int64)
+
+    @staticmethod
+    def _solve(
+        groups: List[_Group],
+        capacity: int,
+        top_k: int,
+        initial: Optional[np.ndarray] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, List[_Choices]]:
+        """
+        Динамическое программирование по группам
+
+        initial — таблица уже решенных групп (продолжение общего префикса);
+        ранги в таблицах выбора первой группы ссылаются на нее. rows —
+        ячейки, которые нужно вычислить для последней группы (остальные
+        остаются -inf), None — все ячейки.
+
+        best[b, r] — r-я по величине оценка сборки из уже обработанных групп
+        стоимостью не больше b шагов. Для восстановления решений по каждой
+        группе сохраняются выбранный вариант и ранг в предыдущей таблице.
+
+        Кандидаты варианта i в ячейке b — это best[b - cost_i, :] + score_i,
+        уже отсортированные по убыванию. Поэтому k лучших кандидатов ячейки
+        берутся только из вариантов с k лучшими «головами» (ранг 0): сначала
+        выбираются такие варианты, затем объединяются их k×k кандидатов.
+        """
+        cells = capacity + 1
+        if initial is None:
+            best = np.full((cells, top_k), -np.inf)
+            best[:, 0] = 0.0
+        else:
+            best = initial
+        budget_index = np.arange(cells, dtype=np.int32)
+        choices = []
+
+        for position, group in enumerate(groups):
+            size = len(group.costs)
+            if size == 0:
+                best = np.full((cells, top_k), -np.inf)
+                choices.append((np.full((cells, top_k), -1, dtype=np.int64), np.zeros((cells, top_k), dtype=np.int64)))
+                continue
+            targets = budget_index
+            if rows is not None and position == len(groups) - 1:
+                targets = rows.astype(np.int32)
+            count = len(targets)
+
+            # Строка предыдущей таблицы для каждой пары (ячейка, вариант); строка 0 —
+            # заглушка с -inf для вариантов дороже ячейки
+            padded = np.vstack([np.full((1, top_k), -np.inf), best])
+            source = np.maximum(targets[:, None] - group.costs.astype(np.int32)[None, :] + 1, 0)
+
+            heads = np.take(padded[:, 0], source) + group.scores[None, :]
+            if size > top_k:
+                items = np.argpartition(-heads, top_k - 1, axis=1)[:, :top_k]
+            else:
+                items = np.broadcast_to(np.arange(size), (count, size))
+            width = items.shape[1]
+
+            # Кандидаты выбранных вариантов: (ячейка, вариант, ранг) -> (ячейка, вариант * k + ранг)
+            item_source = np.take_along_axis(source, items, axis=1)
+            candidates = padded[item_source] + group.scores[items][:, :, None]
+            candidates = candidates.reshape(count, width * top_k)
+
+            if width * top_k > top_k:
+                top = np.argpartition(-candidates, top_k - 1, axis=1)[:, :top_k]
+            else:
+                top = np.broadcast_to(np.arange(top_k), (count, top_k))
+            values = np.take_along_axis(candidates, top, axis=1)
+            order = np.argsort(-values, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+
+            best = np.full((cells, top_k), -np.inf)
+            group_items = np.full((cells, top_k), -1, dtype=np.int64)
+            group_prev = np.zeros((cells, top_k), dtype=np.int64)
+            best[targets] = np.take_along_axis(values, order, axis=1)
+            group_items[targets] = np.take_along_axis(items, top // top_k, axis=1)
+            group_prev[targets] = top % top_k
+            choices.append((group_items, group_prev))
+        return best, choices
+
+    @staticmethod
+    def _extend(
+        chain: _Chain,
+        group: _Group,
+        capacity: int,
+        top_k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> _Chain:
+        """Добавить группу к решенной цепочке групп"""
+        groups, best, choices = chain
+        extended_best, extended_choices = BuildOptimizer._solve([group], capacity, top_k, initial=best, rows=rows)
+        return groups + [group], extended_best, choices + extended_choices
+
+    @staticmethod
+    def _backtrack(
+        groups: List[_Group],
+        choices: List[_Choices],
+        capacity: int,
+        rank: int,
+        score: float
+    ) -> OptimizedBuild:
+        """Восстановить сборку по таблицам выбора"""
+        component_ids = []
+        total_price = 0
+        cell = capacity
+        for group, (group_item, group_prev) in zip(reversed(groups), reversed(choices)):
+            item = group_item[cell, rank]
+            rank = group_prev[cell, rank]
+            component_ids.append(int(group.ids[item]))
+            total_price += int(group.prices[item])
+            cell -= int(group.costs[item])
+        component_ids.reverse()
+        return OptimizedBuild(component_ids=component_ids, total_price=total_price, score=score)
@@ -1,30 +1,56 @@
 """
 Сервис для работы со сборками
 """
+import json
 import math
-import io
+import os
+import asyncio
+import zipfile
+import tempfile
 import urllib.parse
-from typing import Optional, List
+from typing import Optional, List, Callable, Awaitable, AsyncIterator, Iterator, Tuple, BinaryIO, Set
+from pydantic import BaseModel
 from fastapi import HTTPException, status
 from fastapi import Request as FastAPIRequest
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from app.repositories.build_repository import BuildRepository
-from app.models.user import User
+from app.models.build import Build
+from app.models.user import User, UserRole
 from app.schemas.build import (
-    BuildCreate, BuildUpdate, BuildResponse, BuildListResponse, BuildTopResponse,
+    BuildCreate, BuildUpdate, BuildResponse, BuildListResponse, BuildTopResponse, BuildSimilarResponse,
     BuildRatingCreate, BuildRatingUpdate, BuildRatingResponse,
     BuildCommentCreate, BuildCommentUpdate, BuildCommentResponse, 
-    BuildCommentListResponse, BuildCommentSingleResponse, BuildStatsResponse,
-    BuildComponentsResponse
+    BuildCommentListResponse, BuildCommentRepliesResponse, BuildCommentSingleResponse, BuildStatsResponse,
+    BuildExportRequest, BuildOptimizeRequest, BuildOptimizeResponse, OptimizedBuildResponse
 )
 from app.schemas.common import MessageResponse
 from app.services.redis_service import RedisService
+from app.services.response_cache import ResponseCache, BUILDS_NAMESPACE
+from app.services.component_catalog import component_catalog, catalog_response
+from app.services.build_optimizer import BuildOptimizer
+from app.services.build_similarity import BuildSimilarityIndex
+from app.services.build_leaderboard import BuildLeaderboard, LEADERBOARD_PRIOR_WEIGHT, LEADERBOARD_DEFAULT_MEAN
+from app.services.build_trending import BuildTrending, TRENDING_FALLBACK_CACHE_TTL
+from app.services.view_counter import ViewCounter
 from app.services.pdf_generator import PDFGenerator
+from app.services.pdf_cache import PDFCache
+from app.services.pdf_render_pool import PDFRenderBusyError
 from app.utils.transliteration import safe_filename
+from app.utils.zip_stream import ZipStreamBuffer
+from app.utils.pagination import encode_cursor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Массовый экспорт: максимум сборок в архиве, сборок в одной выборке из БД,
+# одновременных генераций PDF и повторов при переполненной очереди верстки
+BULK_EXPORT_MAX_BUILDS = 500
+BULK_EXPORT_BATCH_SIZE = 20
+BULK_EXPORT_CONCURRENCY = 2
+BULK_EXPORT_BUSY_RETRIES = 5
+# Размер блока при отдаче PDF и копировании его в архив
+PDF_CHUNK_SIZE = 64 * 1024
+
 
 class BuildService:
     """Сервис для работы со сборками"""
@@ -33,11 +59,60 @@ class BuildService:
         self, 
         build_repo: BuildRepository, 
         redis_service: RedisService,
-        pdf_generator: PDFGenerator
+        pdf_generator: PDFGenerator,
+        response_cache: Optional[ResponseCache] = None,
+        pdf_cache: Optional[PDFCache] = None,
+        build_optimizer: Optional[BuildOptimizer] = None
     ):
         self.build_repo = build_repo
         self.redis_service = redis_service
         self.pdf_generator = pdf_generator
+        self.response_cache = response_cache or ResponseCache(redis_service)
+        self.trending = BuildTrending(redis_service) if redis_service else None
+        self.view_counter = ViewCounter(redis_service, trending=self.trending) if redis_service else None
+        self.similarity_index = BuildSimilarityIndex(redis_service) if redis_service else None
+        self.leaderboard = BuildLeaderboard(redis_service) if redis_service else None
+        self.pdf_cache = pdf_cache
+        self.build_optimizer = build_optimizer or BuildOptimizer()
+    
+    async def _cached_response(
+        self,
+        namespace: str,
+        name: str,
+        compute: Callable[[], Awaitable[BaseModel]]
+    ) -> Response:
+        """
+        Отдать ответ из кеша или вычислить и закешировать его
+        
+        В кеше хранится уже сериализованный JSON, поэтому попадание
+        не обращается к БД и не валидирует данные через Pydantic.
+        
+        Args:
+            namespace: Пространство имен кеша
+            name: Имя ответа с параметрами
+            compute: Функция вычисления ответа
+            
+        Returns:
+            Response с JSON ответа
+        """
+        key = await self.response_cache.key(namespace, name)
+        payload = await self.response_cache.get(key)
+        if payload is None:
+            payload = (await compute()).model_dump_json()
+            await self.response_cache.set(key, payload)
+        return Response(content=payload, media_type="application/json")
+    
+    async def _merge_pending_views(self, builds: List[dict]) -> None:
+        """Добавить к views_count еще не записанные в БД просмотры"""
+        if not self.view_counter or not builds:
+            return
+        pending = await self.view_counter.get_pending([build["id"] for build in builds])
+        for build in builds:
+            build["views_count"] += pending.get(build["id"], 0)
+    
+    async def _invalidate_builds_cache(self) -> None:
+        """Инвалидировать кешированные ответы по сборкам (статистика, похожие сборки)"""
+        await self.response_cache.invalidate(BUILDS_NAMESPACE)
     
     async def create_build(
         self,
@@ -54,7 +129,11 @@ class BuildService:
         Returns:
             BuildResponse с данными созданной сборки
         """
-        return await self.build_repo.create(build_data, author_id)
+        build = await self.build_repo.create(build_data, author_id)
+        await self._invalidate_builds_cache()
+        if self.similarity_index:
+            await self.similarity_index.add(build.id, [component.id for component in build.components])
+        return build
     
     async def get_builds(
         self,
@@ -63,7 +142,11 @@ class BuildService:
         query: str = "",
         author_id: Optional[int] = None,
         sort_by: str = "created_at",
-        order: str = "desc"
+        order: str = "desc",
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        cursor: Optional[str] = None,
+        estimate_total: bool = False
     ) -> BuildListResponse:
         """
         Получить список сборок с фильтрами, сортировкой и пагинацией
@@ -75,53 +158,160 @@ class BuildService:
             author_id: Фильтр по автору
             sort_by: Поле для сортировки
             order: Порядок сортировки (asc, desc)
+            min_price: Минимальная стоимость сборки
+            max_price: Максимальная стоимость сборки
+            cursor: Курсор следующей страницы (вместо skip)
+            estimate_total: Оценить общее количество по статистике БД (только без фильтров)
             
         Returns:
             BuildListResponse со списком сборок
         """
-        builds = await self.build_repo.search(
-            query=query,
-            author_id=author_id,
-            skip=skip,
-            limit=limit,
-            sort_by=sort_by,
-            order=order
-        )
+        unfiltered = not query and author_id is None and min_price is None and max_price is None
+        total = await self.build_repo.estimate_count() if estimate_total and unfiltered else None
+        total_is_estimate = total is not None
         
-        total = await self.build_repo.count_search_results(
-            query=query,
-            author_id=author_id
-        )
+        try:
+            if total_is_estimate:
+                builds, next_cursor = await self.build_repo.search_page(
+                    skip=skip,
+                    limit=limit,
+                    sort_by=sort_by,
+                    order=order,
+                    cursor=cursor
+                )
+            else:
+                builds, total, next_cursor = await self.build_repo.search_with_total(
+                    query=query,
+                    author_id=author_id,
+                    skip=skip,
+                    limit=limit,
+                    sort_by=sort_by,
+                    order=order,
+                    min_price=min_price,
+                    max_price=max_price,
+                    cursor=cursor
+                )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        await self._merge_pending_views(builds)
         
         return BuildListResponse(
             builds=builds,
             total=total,
-            page=skip // limit + 1,
+            page=None if cursor else skip // limit + 1,
             per_page=limit,
-            total_pages=math.ceil(total / limit) if total > 0 else 0
+            total_pages=math.ceil(total / limit) if total > 0 else 0,
+            next_cursor=next_cursor,
+            total_is_estimate=total_is_estimate
         )
     
     async def get_top_builds(self, limit: int = 10) -> BuildTopResponse:
         """
-        Получить топ сборок по рейтингу
+        Получить топ сборок по байесовскому рейтингу
+        
+        ID берутся из заранее посчитанного топа в Redis, данные сборок —
+        одним запросом по ID. Пока топ не построен, он считается запросом к БД.
         
         Args:
             limit: Количество сборок в топе
             
         Returns:
-            BuildTopResponse с топ сборками
+            BuildTopResponse
         """
-        builds = await self.build_repo.get_top_builds(limit=limit)
+        top_ids = await self.leaderboard.top_ids(limit) if self.leaderboard else None
+        if top_ids is None:
+            stats = await self.build_repo.get_stats()
+            builds = await self.build_repo.get_top_builds(
+                limit=limit,
+                prior_mean=stats["average_rating"] if stats["total_ratings"] else LEADERBOARD_DEFAULT_MEAN,
+                prior_weight=LEADERBOARD_PRIOR_WEIGHT
+            )
+        else:
+            builds = await self.build_repo.get_summaries_by_ids(top_ids)
+            stale_ids = set(top_ids) - {build["id"] for build in builds}
+            if stale_ids:
+                # Сборки удалены в обход сервиса (например, вместе с автором)
+                await self.leaderboard.remove(*stale_ids)
+        
+        await self._merge_pending_views(builds)
         return BuildTopResponse(
             builds=builds,
             total=len(builds)
         )
     
+    async def get_trending_builds(self, skip: int = 0, limit: int = 20) -> BuildListResponse:
+        """
+        Получить популярные сейчас сборки (просмотры, оценки и комментарии с затуханием)
+        
+        ID страницы берутся из упорядоченного множества в Redis, данные
+        сборок — одним запросом по ID. Пока множество не построено, веса
+        считаются по оценкам и комментариям из БД (см. _trending_from_database).
+        
+        Args:
+            skip: Количество сборок для пропуска
+            limit: Количество сборок на странице
+            
+        Returns:
+            BuildListResponse
+        """
+        page = await self.trending.page(skip, limit) if self.trending else None
+        if page is None:
+            ranked = await self._trending_from_database()
+            build_ids, total = ranked[skip:skip + limit], len(ranked)
+        else:
+            build_ids, total = page
+        
+        builds = await self.build_repo.get_summaries_by_ids(build_ids)
+        stale_ids = set(build_ids) - {build["id"] for build in builds}
+        if stale_ids and self.trending:
+            await self.trending.remove(*stale_ids)
+        await self._merge_pending_views(builds)
+        
+        return BuildListResponse(
+            builds=builds,
+            total=total,
+            page=skip // limit + 1,
+            per_page=limit,
+            total_pages=math.ceil(total / limit) if total > 0 else 0
+        )
+    
+    async def _trending_from_database(self) -> List[int]:
+        """
+        ID популярных сборок по убыванию веса, посчитанные по БД
+        
+        Используется, пока фоновая задача не построила множество в Redis.
+        Результат кешируется на TRENDING_FALLBACK_CACHE_TTL, чтобы расчет
+        по БД не повторялся на каждый запрос.
+        """
+        key = await self.response_cache.key(BUILDS_NAMESPACE, "trending_fallback")
+        payload = await self.response_cache.get(key)
+        if payload is not None:
+            return json.loads(payload)
+        scores = await BuildTrending.scores_from_database(self.build_repo)
+        ranked = sorted(scores, key=lambda build_id: (-scores[build_id], -build_id))
+        await self.response_cache.set(key, json.dumps(ranked), ttl=TRENDING_FALLBACK_CACHE_TTL)
+        return ranked
+    
+    async def _update_leaderboard(self, build_id: int) -> None:
+        """Пересчитать вес сборки в топе после изменения ее оценок"""
+        if not self.leaderboard:
+            return
+        aggregates = await self.build_repo.get_rating_aggregates(build_id)
+        if aggregates:
+            _, ratings_count, rating_sum = aggregates[0]
+            await self.leaderboard.update(build_id, ratings_count, rating_sum)
+        else:
+            await self.leaderboard.update(build_id, 0, 0)
+    
     async def get_user_builds(
         self,
         author_id: int,
         skip: int = 0,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None
     ) -> BuildListResponse:
         """
         Получить сборки пользователя
@@ -130,45 +320,105 @@ class BuildService:
             author_id: ID автора
             skip: Количество записей для пропуска
             limit: Максимальное количество записей
+            cursor: Курсор следующей страницы (вместо skip)
             
         Returns:
             BuildListResponse со списком сборок
         """
-        builds = await self.build_repo.get_by_author(
-            author_id=author_id,
-            skip=skip,
-            limit=limit
-        )
-        
-        total = await self.build_repo.count_by_author(author_id)
+        try:
+            builds, total, next_cursor = await self.build_repo.search_with_total(
+                author_id=author_id,
+                skip=skip,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        await self._merge_pending_views(builds)
         
         return BuildListResponse(
             builds=builds,
             total=total,
-            page=skip // limit + 1,
+            page=None if cursor else skip // limit + 1,
             per_page=limit,
-            total_pages=math.ceil(total / limit) if total > 0 else 0
+            total_pages=math.ceil(total / limit) if total > 0 else 0,
+            next_cursor=next_cursor
         )
     
-    async def get_builds_stats(self) -> BuildStatsResponse:
+    async def get_builds_stats(self) -> Response:
         """
-        Получить статистику по сборкам
+        Получить статистику по сборкам (кешируется)
         
         Returns:
-            BuildStatsResponse со статистикой
+            Response с сериализованным BuildStatsResponse
         """
-        stats = await self.build_repo.get_stats()
-        return BuildStatsResponse(**stats)
+        async def compute() -> BuildStatsResponse:
+            stats = await self.build_repo.get_stats()
+            return BuildStatsResponse(**stats)
+        
+        return await self._cached_response(BUILDS_NAMESPACE, "stats", compute)
     
-    async def get_unique_components(self) -> BuildComponentsResponse:
+    async def get_unique_components(self, if_none_match: Optional[str] = None) -> Response:
         """
         Получить список доступных компонентов, сгруппированных по категориям
         
+        Ответ берется из снимка каталога (сериализуется один раз на версию),
+        ETag — версия снимка.
+        
+        Args:
+            if_none_match: Значение заголовка If-None-Match
+            
         Returns:
-            BuildComponentsResponse с компонентами
+            Response с сериализованным BuildComponentsResponse или 304
         """
-        components = await self.build_repo.get_unique_components()
-        return BuildComponentsResponse(**components)
+        snapshot = await component_catalog.get_snapshot(self.build_repo.db)
+        return catalog_response(snapshot, if_none_match, snapshot.unique_json)
+    
+    async def optimize_build(self, optimize_data: BuildOptimizeRequest) -> BuildOptimizeResponse:
+        """
+        Подобрать комплектующие по бюджету
+        
+        Подбор выполняется по снимку каталога в памяти, без запросов к БД
+        (кроме первой загрузки снимка), в отдельном потоке: динамическое
+        программирование на полном каталоге занимает сотни миллисекунд
+        и не должно блокировать цикл событий.
+        
+        Args:
+            optimize_data: Бюджет, веса категорий, закрепленные компоненты и количество вариантов
+            
+        Returns:
+            BuildOptimizeResponse с вариантами сборки по убыванию оценки
+        """
+        snapshot = await component_catalog.get_snapshot(self.build_repo.db)
+        try:
+            builds = await asyncio.to_thread(
+                self.build_optimizer.optimize,
+                snapshot,
+                budget=optimize_data.budget,
+                weights=optimize_data.weights,
+                pinned_ids=optimize_data.pinned_component_ids,
+                top_k=optimize_data.top_k
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        return BuildOptimizeResponse(
+            budget=optimize_data.budget,
+            builds=[
+                OptimizedBuildResponse(
+                    components=[snapshot.get(component_id) for component_id in build.component_ids],
+                    total_price=build.total_price,
+                    score=round(build.score, 4)
+                )
+                for build in builds
+            ]
+        )
     
     async def get_build(
         self,
@@ -195,7 +445,7 @@ class BuildService:
             build_id=build_id,
             user_id=current_user.id if current_user else None,
             client_ip=client_ip,
-            redis_service=self.redis_service
+            view_counter=self.view_counter
         )
         
         if not build:
@@ -206,6 +456,41 @@ class BuildService:
         
         return build
     
+    async def get_similar_builds(self, build_id: int, limit: int = 6) -> Response:
+        """
+        Получить сборки, похожие по составу компонентов (кешируется)
+        
+        Args:
+            build_id: ID сборки
+            limit: Количество сборок
+            
+        Returns:
+            Response с сериализованным BuildSimilarResponse
+        """
+        if await self.build_repo.get_build_author_id(build_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Сборка не найдена"
+            )
+        
+        async def compute() -> BuildSimilarResponse:
+            similar = None
+            if self.similarity_index:
+                similar = await self.similarity_index.find_similar(build_id, limit)
+            if similar is None:
+                similar = await self.build_repo.get_similar_builds(build_id, limit)
+            
+            summaries = await self.build_repo.get_summaries_by_ids([candidate for candidate, _, _ in similar])
+            await self._merge_pending_views(summaries)
+            scores = {candidate: (similarity, common) for candidate, similarity, common in similar}
+            for summary in summaries:
+                similarity, common = scores[summary["id"]]
+                summary["similarity"] = round(similarity, 4)
+                summary["common_components"] = common
+            return BuildSimilarResponse(builds=summaries)
+        
+        return await self._cached_response(BUILDS_NAMESPACE, f"similar:{build_id}:{limit}", compute)
+    
     async def update_build(
         self,
         build_id: int,
@@ -237,7 +522,16 @@ class BuildService:
                 detail="У вас нет прав для редактирования этой сборки"
             )
         
-        return await self.build_repo.update(build, build_data)
+        old_component_ids = [component.id for component in build.components]
+        updated_build = await self.build_repo.update(build, build_data)
+        await self._invalidate_builds_cache()
+        if self.similarity_index and build_data.component_ids is not None:
+            await self.similarity_index.replace(
+                build_id, old_component_ids, [component.id for component in updated_build.components]
+            )
+        if self.pdf_cache:
+            self.pdf_cache.invalidate(build_id)
+        return updated_build
     
     async def delete_build(
         self,
@@ -268,6 +562,7 @@ class BuildService:
                 detail="У вас нет прав для удаления этой сборки"
             )
         
+        component_ids = [component.id for component in build.components]
         success = await self.build_repo.delete(build)
         if not success:
             raise HTTPException(
@@ -275,6 +570,15 @@ class BuildService:
                 detail="Ошибка при удалении сборки"
             )
         
+        await self._invalidate_builds_cache()
+        if self.similarity_index:
+            await self.similarity_index.remove(build_id, component_ids)
+        if self.leaderboard:
+            await self.leaderboard.remove(build_id)
+        if self.trending:
+            await self.trending.remove(build_id)
+        if self.pdf_cache:
+            self.pdf_cache.invalidate(build_id)
         return MessageResponse(message="Сборка успешно удалена")
     
     # ==================== Методы для оценок ====================
@@ -319,7 +623,12 @@ class BuildService:
                 detail="Вы уже оценили эту сборку. Используйте PUT для обновления оценки."
             )
         
-        return await self.build_repo.create_rating(build_id, current_user.id, rating_data)
+        rating = await self.build_repo.create_rating(build_id, current_user.id, rating_data)
+        await self._invalidate_builds_cache()
+        await self._update_leaderboard(build_id)
+        if self.trending:
+            await self.trending.record_rating(build_id, rating_data.score)
+        return rating
     
     async def update_rating(
         self,
@@ -354,7 +663,10 @@ class BuildService:
                 detail="Вы еще не оценили эту сборку. Используйте POST для создания оценки."
             )
         
-        return await self.build_repo.update_rating(rating, rating_data.score)
+        updated_rating = await self.build_repo.update_rating(rating, rating_data.score)
+        await self._invalidate_builds_cache()
+        await self._update_leaderboard(build_id)
+        return updated_rating
     
     async def delete_rating(
         self,
@@ -386,6 +698,8 @@ class BuildService:
                 detail="Ошибка при удалении оценки"
             )
         
+        await self._invalidate_builds_cache()
+        await self._update_leaderboard(build_id)
         return MessageResponse(message="Оценка успешно удалена")
     
     async def get_user_rating(
@@ -457,13 +771,18 @@ class BuildService:
                     detail="Нельзя отвечать на комментарий второго уровня. Максимальная вложенность - 2 уровня."
                 )
         
-        return await self.build_repo.create_comment(build_id, current_user.id, comment_data)
+        comment = await self.build_repo.create_comment(build_id, current_user.id, comment_data)
+        await self._invalidate_builds_cache()
+        if self.trending:
+            await self.trending.record_comment(build_id)
+        return comment
     
     async def get_comments(
         self,
         build_id: int,
         skip: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        replies_limit: int = 3
     ) -> BuildCommentListResponse:
         """
         Получить комментарии к сборке
@@ -472,26 +791,74 @@ class BuildService:
             build_id: ID сборки
             skip: Количество записей для пропуска
             limit: Максимальное количество записей
+            replies_limit: Количество ответов, отдаваемых вместе с комментарием
             
         Returns:
             BuildCommentListResponse со списком комментариев
         """
-        # Проверяем, существует ли сборка
-        build = await self.build_repo.get_by_id(build_id)
-        if not build:
+        # Счетчик комментариев заодно проверяет, существует ли сборка
+        total = await self.build_repo.get_comments_count(build_id)
+        if total is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Сборка не найдена"
             )
         
-        comments = await self.build_repo.get_build_comments(build_id, skip, limit)
-        total = await self.build_repo.count_build_comments(build_id)
+        comments = await self.build_repo.get_build_comments(build_id, skip, limit, replies_limit)
+        
+        items = []
+        for comment in comments:
+            item = BuildCommentResponse.model_validate(comment)
+            # Остальные ответы загружаются через get_comment_replies
+            if item.replies and comment.replies_count > len(item.replies):
+                item.replies_next_cursor = encode_cursor({"id": item.replies[-1].id})
+            items.append(item)
         
         return BuildCommentListResponse(
-            comments=comments,
+            comments=items,
             total=total
         )
     
+    async def get_comment_replies(
+        self,
+        build_id: int,
+        comment_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> BuildCommentRepliesResponse:
+        """
+        Получить страницу ответов на комментарий
+        
+        Args:
+            build_id: ID сборки
+            comment_id: ID корневого комментария
+            limit: Размер страницы
+            cursor: Курсор следующей страницы
+            
+        Returns:
+            BuildCommentRepliesResponse со страницей ответов
+        """
+        comment = await self.build_repo.get_comment_by_id(comment_id)
+        if not comment or comment.build_id != build_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Комментарий не найден"
+            )
+        
+        try:
+            replies, next_cursor = await self.build_repo.get_comment_replies(comment_id, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        return BuildCommentRepliesResponse(
+            replies=replies,
+            total=comment.replies_count,
+            next_cursor=next_cursor
+        )
+    
     async def update_comment(
         self,
         build_id: int,
@@ -565,19 +932,29 @@ class BuildService:
                 detail="Ошибка при удалении комментария"
             )
         
+        await self._invalidate_builds_cache()
         return MessageResponse(message="Комментарий успешно удален")
     
     # ==================== Метод для экспорта PDF ====================
     
-    async def export_build_pdf(self, build_id: int) -> StreamingResponse:
+    async def export_build_pdf(
+        self,
+        build_id: int,
+        if_none_match: Optional[str] = None
+    ) -> Response:
         """
         Экспортировать сборку в PDF
         
+        PDF кешируется на диске по хешу состояния сборки и отдается потоком
+        из файла, открытого до ответа (его удаление из кеша ответ не прерывает). Хеш используется как ETag: если клиент прислал совпадающий
+        If-None-Match, возвращается 304 без тела.
+        
         Args:
             build_id: ID сборки
+            if_none_match: Значение заголовка If-None-Match
             
         Returns:
-            StreamingResponse с PDF файлом
+            StreamingResponse с PDF файлом или Response 304
         """
         # Получаем сборку с загруженными компонентами
         build = await self.build_repo.get_by_id(build_id)
@@ -588,33 +965,203 @@ class BuildService:
                 detail="Сборка не найдена"
             )
         
+        key = PDFCache.cache_key(build)
+        etag = f'"{key}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
         try:
-            # Создаем PDF в памяти
-            pdf_buffer = io.BytesIO()
-            await self.pdf_generator.create_build_pdf(build, pdf_buffer)
-            pdf_buffer.seek(0)
-            
-            # Создаем безопасное имя файла с транслитерацией
-            safe_title = safe_filename(build.title, max_length=80, prefix=f"build_{build_id}_")
-            filename = f"{safe_title}.pdf"
-            
-            # Кодируем имя файла для заголовка (RFC 5987)
-            filename_encoded = urllib.parse.quote(filename, safe='')
-            
-            # Читаем данные из буфера
-            pdf_data = pdf_buffer.read()
-            pdf_buffer.close()
-            
-            return StreamingResponse(
-                io.BytesIO(pdf_data),
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f"attachment; filename=\"{filename}\"; filename*=UTF-8''{filename_encoded}"
-                }
+            pdf_file = await self._open_pdf(build, key)
+        except PDFRenderBusyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис генерации PDF перегружен, попробуйте позже",
+                headers={"Retry-After": "5"}
             )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Ошибка при генерации PDF: {str(e)}"
             )
-
+        
+        filename = self._pdf_filename(build)
+        
+        # Кодируем имя файла для заголовка (RFC 5987)
+        filename_encoded = urllib.parse.quote(filename, safe='')
+        headers["Content-Disposition"] = f"attachment; filename=\"{filename}\"; filename*=UTF-8''{filename_encoded}"
+        headers["Content-Length"] = str(os.fstat(pdf_file.fileno()).st_size)
+        
+        return StreamingResponse(self._read_chunks(pdf_file), media_type="application/pdf", headers=headers)
+    
+    async def export_builds_zip(
+        self,
+        export_data: BuildExportRequest,
+        current_user: User
+    ) -> StreamingResponse:
+        """
+        Экспортировать несколько сборок одним ZIP-архивом с PDF
+        
+        Архив отдается потоком по мере готовности PDF: сборки загружаются
+        из БД пачками, PDF берутся из кеша или генерируются параллельно
+        в пуле верстки, а в памяти держится только текущий блок архива.
+        Пользователь экспортирует только свои сборки, администратор — любые.
+        
+        Args:
+            export_data: Список ID и/или фильтры поиска
+            current_user: Текущий пользователь
+            
+        Returns:
+            StreamingResponse с ZIP-архивом
+        """
+        author_id = export_data.author_id
+        if current_user.role not in [UserRole.ADMIN, UserRole.SUPER_ADMIN]:
+            if author_id is not None and author_id != current_user.id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Можно экспортировать только свои сборки"
+                )
+            author_id = current_user.id
+        
+        build_ids = await self.build_repo.get_ids_for_export(
+            build_ids=export_data.build_ids,
+            query=export_data.query,
+            author_id=author_id,
+            min_price=export_data.min_price,
+            max_price=export_data.max_price,
+            limit=BULK_EXPORT_MAX_BUILDS + 1
+        )
+        
+        if not build_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Сборки для экспорта не найдены"
+            )
+        if len(build_ids) > BULK_EXPORT_MAX_BUILDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Можно экспортировать не больше {BULK_EXPORT_MAX_BUILDS} сборок за раз"
+            )
+        
+        return StreamingResponse(
+            self._stream_builds_zip(build_ids),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="builds.zip"'}
+        )
+    
+    async def _stream_builds_zip(self, build_ids: List[int]) -> AsyncIterator[bytes]:
+        """Сформировать ZIP-архив с PDF сборок, отдавая его частями"""
+        buffer = ZipStreamBuffer()
+        failed: List[str] = []
+        
+        # PDF уже сжат, поэтому файлы сохраняются без повторного сжатия
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            async for build, pdf_file in self._iter_build_pdfs(build_ids):
+                if pdf_file is None:
+                    failed.append(f"{build.id}: {build.title}")
+                    continue
+                with pdf_file, archive.open(self._pdf_filename(build), mode="w") as entry:
+                    while chunk := pdf_file.read(PDF_CHUNK_SIZE):
+                        entry.write(chunk)
+                        if buffer.size >= PDF_CHUNK_SIZE:
+                            yield buffer.drain()
+                yield buffer.drain()
+            
+            if failed:
+                archive.writestr("errors.txt", "Не удалось сформировать PDF:\n" + "\n".join(failed) + "\n")
+        
+        yield buffer.drain()
+    
+    async def _iter_build_pdfs(
+        self,
+        build_ids: List[int]
+    ) -> AsyncIterator[Tuple[Build, Optional[BinaryIO]]]:
+        """
+        Получить PDF сборок по мере готовности
+        
+        Yields:
+            Кортеж (сборка, открытый файл PDF или None при ошибке)
+        """
+        semaphore = asyncio.Semaphore(BULK_EXPORT_CONCURRENCY)
+        
+        async def produce(build: Build) -> Tuple[Build, Optional[BinaryIO]]:
+            async with semaphore:
+                try:
+                    return build, await self._open_pdf_with_retry(build)
+                except Exception as e:
+                    logger.error(f"Ошибка при генерации PDF сборки {build.id}: {e}")
+                    return build, None
+        
+        for start in range(0, len(build_ids), BULK_EXPORT_BATCH_SIZE):
+            builds = await self.build_repo.get_by_ids(build_ids[start:start + BULK_EXPORT_BATCH_SIZE])
+            tasks = [asyncio.create_task(produce(build)) for build in builds]
+            yielded: Set[Build] = set()
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    build, pdf_file = await next_done
+                    yielded.add(build)
+                    yield build, pdf_file
+            finally:
+                # Клиент разорвал соединение: не продолжаем генерацию впустую
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+                        continue
+                    if task.cancelled():
+                        continue
+                    # Готовые, но не отданные PDF закрываем сами
+                    done_build, done_file = task.result()
+                    if done_file is not None and done_build not in yielded:
+                        done_file.close()
+    
+    async def _open_pdf_with_retry(self, build: Build) -> BinaryIO:
+        """Получить PDF, ожидая освобождения очереди верстки вместо отказа"""
+        for attempt in range(BULK_EXPORT_BUSY_RETRIES - 1):
+            try:
+                return await self._open_pdf(build)
+            except PDFRenderBusyError:
+                await asyncio.sleep(0.5 * (attempt + 1))
+        # Последняя попытка: переполнение очереди передается вызывающему коду
+        return await self._open_pdf(build)
+    
+    async def _open_pdf(self, build: Build, key: Optional[str] = None) -> BinaryIO:
+        """
+        Получить PDF сборки из кеша или сгенерировать его
+        
+        Args:
+            build: Сборка с загруженными автором и компонентами
+            key: Ключ PDF (вычисляется, если не передан)
+            
+        Returns:
+            Файл PDF, открытый на чтение (закрывает вызывающий код)
+        """
+        async def render(target) -> None:
+            await self.pdf_generator.create_build_pdf(build, target)
+        
+        if self.pdf_cache:
+            key = key or PDFCache.cache_key(build)
+            return await self.pdf_cache.get_or_create(build.id, key, render)
+        
+        # Без кеша PDF пишется в анонимный файл, который удаляется при закрытии
+        pdf_file = tempfile.TemporaryFile()
+        try:
+            await render(pdf_file)
+            pdf_file.seek(0)
+        except BaseException:
+            pdf_file.close()
+            raise
+        return pdf_file
+    
+    @staticmethod
+    def _read_chunks(pdf_file: BinaryIO) -> Iterator[bytes]:
+        """Прочитать открытый файл блоками и закрыть его"""
+        with pdf_file:
+            while chunk := pdf_file.read(PDF_CHUNK_SIZE):
+                yield chunk
+    
+    @staticmethod
+    def _pdf_filename(build: Build) -> str:
+        """Безопасное имя файла PDF с транслитерацией"""
+        safe_title = safe_filename(build.title, max_length=80, prefix=f"build_{build.id}_")
+        return f"{safe_title}.pdf"
@@ -0,0 +1,219 @@
+"""
+Похожие сборки по общим компонентам (инвертированный индекс в Redis)
+"""
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Множество ID сборок, в которые входит компонент
+COMPONENT_BUILDS_KEY = "build_similarity:component:{component_id}"
+# Множество ID компонентов сборки
+BUILD_COMPONENTS_KEY = "build_similarity:build:{build_id}"
+# Признак того, что индекс построен по БД
+SIMILARITY_READY_KEY = "build_similarity:ready"
+# Блокировка перестроения (одновременно строит только один воркер)
+SIMILARITY_REBUILD_LOCK_KEY = "build_similarity:rebuild_lock"
+SIMILARITY_REBUILD_LOCK_TTL = 600
+
+# Сколько сборок записывается в Redis за одну транзакцию при перестроении
+SIMILARITY_REBUILD_BATCH_SIZE = 500
+# Сколько кандидатов за раз проверяется при поиске
+SIMILARITY_CANDIDATE_BATCH_SIZE = 200
+# Списки сборок компонентов, входящих в большее число сборок, при поиске
+# не загружаются: такой компонент (популярный блок питания, кулер) есть почти
+# везде и почти не влияет на выбор кандидатов
+SIMILARITY_MAX_POSTING_SIZE = 5000
+
+
+def _component_key(component_id) -> str:
+    return COMPONENT_BUILDS_KEY.format(component_id=component_id)
+
+
+def _build_key(build_id) -> str:
+    return BUILD_COMPONENTS_KEY.format(build_id=build_id)
+
+
+class BuildSimilarityIndex:
+    """Инвертированный индекс компонент -> сборки
+
+    Похожесть двух сборок — коэффициент Жаккара по множествам компонентов.
+    Кандидаты берутся только из сборок, имеющих с исходной хотя бы один
+    общий компонент (объединение списков сборок ее компонентов), и
+    проверяются по убыванию числа общих компонентов: у кандидата с o общими
+    компонентами похожесть не больше o / |A|, поэтому перебор
+    останавливается, как только эта граница меньше k-й найденной.
+
+    Списки сборок слишком популярных компонентов (больше
+    SIMILARITY_MAX_POSTING_SIZE) не загружаются: кандидаты берутся по
+    остальным компонентам, а число общих компонентов уточняется по
+    множеству компонентов кандидата. Сборки, совпадающие с исходной только
+    популярными компонентами, в выдачу не попадают.
+
+    Индекс обновляется при создании, изменении и удалении сборок и
+    перестраивается по БД фоновой задачей, если признака готовности нет
+    (пустой Redis или сбой записи). Пока индекс не готов, поиск возвращает
+    None и вызывающий код считает похожесть запросом к БД.
+    """
+
+    def __init__(self, redis_service: RedisService):
+        self.redis_service = redis_service
+
+    async def is_ready(self) -> bool:
+        """Построен ли индекс"""
+        return bool(await self.redis_service.get_raw(SIMILARITY_READY_KEY))
+
+    async def add(self, build_id: int, component_ids: Iterable[int]) -> None:
+        """Добавить сборку в индекс"""
+        await self.replace(build_id, (), component_ids)
+
+    async def replace(self, build_id: int, old_component_ids: Iterable[int], new_component_ids: Iterable[int]) -> None:
+        """
+        Обновить компоненты сборки в индексе по разнице
+
+        Args:
+            build_id: ID сборки
+            old_component_ids: Компоненты до изменения
+            new_component_ids: Компоненты после изменения
+        """
+        old_ids, new_ids = set(old_component_ids), set(new_component_ids)
+        member = str(build_id)
+        applied = await self.redis_service.update_sets(
+            add={
+                **{_component_key(component_id): [member] for component_id in new_ids - old_ids},
+                _build_key(build_id): [str(component_id) for component_id in new_ids],
+            },
+            remove={_component_key(component_id): [member] for component_id in old_ids - new_ids},
+            delete=[_build_key(build_id)]
+        )
+        if not applied:
+            await self._invalidate()
+
+    async def remove(self, build_id: int, component_ids: Iterable[int]) -> None:
+        """Удалить сборку из индекса"""
+        member = str(build_id)
+        applied = await self.redis_service.update_sets(
+            remove={_component_key(component_id): [member] for component_id in set(component_ids)},
+            delete=[_build_key(build_id)]
+        )
+        if not applied:
+            await self._invalidate()
+
+    async def _invalidate(self) -> None:
+        """Снять признак готовности: индекс устарел и будет перестроен"""
+        logger.warning("Индекс похожих сборок не обновлен, будет перестроен")
+        await self.redis_service.delete(SIMILARITY_READY_KEY)
+
+    async def find_similar(self, build_id: int, limit: int) -> Optional[List[Tuple[int, float, int]]]:
+        """
+        Найти сборки с наибольшей похожестью
+
+        Args:
+            build_id: ID исходной сборки
+            limit: Количество сборок
+
+        Returns:
+            Список (ID сборки, похожесть, число общих компонентов) по убыванию
+            похожести или None, если индекс не готов или недоступен
+        """
+        if not await self.is_ready():
+            return None
+        own = await self.redis_service.smembers_many([_build_key(build_id)])
+        if not own or not own[0]:
+            # Сборки нет в индексе (например, создана, пока Redis был недоступен)
+            return None
+        own_components = own[0]
+
+        posting_sizes = await self.redis_service.scard_many([_component_key(c) for c in own_components])
+        if posting_sizes is None:
+            return None
+        # Хотя бы один список загружается всегда, иначе не из чего брать кандидатов
+        smallest = min(posting_sizes)
+        loaded = [
+            component for component, size in zip(own_components, posting_sizes)
+            if size <= SIMILARITY_MAX_POSTING_SIZE or size == smallest
+        ]
+        skipped = own_components.difference(loaded)
+
+        postings = await self.redis_service.smembers_many([_component_key(c) for c in loaded])
+        if postings is None:
+            return None
+        overlaps: Counter[str] = Counter()
+        for builds in postings:
+            overlaps.update(builds)
+        overlaps.pop(str(build_id), None)
+
+        own_size = len(own_components)
+        ranked = sorted(overlaps.items(), key=lambda item: (-item[1], -int(item[0])))
+        best: List[Tuple[float, int, int]] = []  # min-куча (похожесть, общие, ID)
+        for start in range(0, len(ranked), SIMILARITY_CANDIDATE_BATCH_SIZE):
+            batch = ranked[start:start + SIMILARITY_CANDIDATE_BATCH_SIZE]
+            # Пропущенные компоненты могут добавить кандидату до len(skipped) общих
+            if len(best) == limit and (batch[0][1] + len(skipped)) / own_size < best[0][0]:
+                break
+            if skipped:
+                members = await self.redis_service.smembers_many([_build_key(candidate) for candidate, _ in batch])
+                if members is None:
+                    return None
+                sizes = [len(components) for components in members]
+                batch = [
+                    (candidate, common + len(components & skipped))
+                    for (candidate, common), components in zip(batch, members)
+                ]
+            else:
+                scards = await self.redis_service.scard_many([_build_key(candidate) for candidate, _ in batch])
+                if scards is None:
+                    return None
+                sizes = scards
+            for (candidate, common), size in zip(batch, sizes):
+                if not size:
+                    continue
+                similarity = common / (own_size + size - common)
+                entry = (similarity, common, int(candidate))
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+        return [(candidate, similarity, common) for similarity, common, candidate in sorted(best, reverse=True)]
+
+    async def rebuild(self, build_repo) -> Optional[int]:
+        """
+        Перестроить индекс по связям сборок с компонентами в БД
+
+        Args:
+            build_repo: Репозиторий сборок (BuildRepository)
+
+        Returns:
+            Количество проиндексированных сборок или None, если индекс
+            уже перестраивает другой воркер
+        """
+        if not await self.redis_service.set_nx(SIMILARITY_REBUILD_LOCK_KEY, "1", ttl=SIMILARITY_REBUILD_LOCK_TTL):
+            return None
+        try:
+            await self.redis_service.delete(SIMILARITY_READY_KEY)
+            stale_keys = (
+                await self.redis_service.get_keys(COMPONENT_BUILDS_KEY.format(component_id="*"))
+                + await self.redis_service.get_keys(BUILD_COMPONENTS_KEY.format(build_id="*"))
+            )
+            for start in range(0, len(stale_keys), SIMILARITY_REBUILD_BATCH_SIZE):
+                if not await self.redis_service.update_sets(delete=stale_keys[start:start + SIMILARITY_REBUILD_BATCH_SIZE]):
+                    return 0
+
+            links = await build_repo.get_component_links()
+            build_ids = list(links)
+            for start in range(0, len(build_ids), SIMILARITY_REBUILD_BATCH_SIZE):
+                add: Dict[str, List[str]] = {}
+                for build_id in build_ids[start:start + SIMILARITY_REBUILD_BATCH_SIZE]:
+                    add[_build_key(build_id)] = [str(component_id) for component_id in links[build_id]]
+                    for component_id in links[build_id]:
+                        add.setdefault(_component_key(component_id), []).append(str(build_id))
+                if not await self.redis_service.update_sets(add=add):
+                    return 0
+
+            await self.redis_service.set_raw(SIMILARITY_READY_KEY, "1")
+            return len(build_ids)
+        finally:
+            await self.redis_service.delete(SIMILARITY_REBUILD_LOCK_KEY)
@@ -0,0 +1,220 @@
+"""
+Популярные сейчас сборки (вес активности с экспоненциальным затуханием в Redis)
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Упорядоченное множество ID сборок с весом активности
+TRENDING_KEY = "build_trending:scores"
+# Временный ключ для перестроения (подменяет основной через RENAME)
+TRENDING_REBUILD_KEY = "build_trending:rebuild"
+# Момент (unix time), в единицах которого записаны веса
+TRENDING_EPOCH_KEY = "build_trending:epoch"
+# Блокировка перестроения и перемасштабирования
+TRENDING_LOCK_KEY = "build_trending:lock"
+TRENDING_LOCK_TTL = 300
+
+# Период полураспада: событие недельной давности весит около 9% свежего
+TRENDING_HALF_LIFE = 2 * 24 * 3600
+# Как часто веса приводятся к текущему моменту
+TRENDING_RESCALE_INTERVAL = 24 * 3600
+# Сборки с меньшим весом (в просмотрах на текущий момент) удаляются при перемасштабировании
+TRENDING_MIN_SCORE = 0.01
+# За какой период активность берется из БД при перестроении
+TRENDING_REBUILD_WINDOW = timedelta(days=14)
+# Сколько секунд кешируется расчет по БД, пока множество не построено
+TRENDING_FALLBACK_CACHE_TTL = 60
+
+# Веса событий: просмотр, балл оценки, комментарий
+TRENDING_VIEW_WEIGHT = 1.0
+TRENDING_RATING_POINT_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 3.0
+
+# Сколько сборок записывается в Redis за одну команду при перестроении
+TRENDING_REBUILD_BATCH_SIZE = 1000
+
+
+def _growth(seconds: float) -> float:
+    """Во сколько раз событие через seconds секунд весит больше (или меньше при seconds < 0)"""
+    return 2.0 ** (seconds / TRENDING_HALF_LIFE)
+
+
+def _timestamp(value: datetime) -> float:
+    """Unix time для даты из БД (без часового пояса — UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def trending_scores(
+    ratings: Iterable[Tuple[int, int, datetime]],
+    comments: Iterable[Tuple[int, datetime]],
+    epoch: float
+) -> Dict[int, float]:
+    """
+    Веса сборок по оценкам и комментариям
+
+    Args:
+        ratings: (ID сборки, оценка, дата)
+        comments: (ID сборки, дата)
+        epoch: Момент, в единицах которого считаются веса
+
+    Returns:
+        Словарь ID сборки -> вес
+    """
+    scores: Dict[int, float] = {}
+    for build_id, score, created_at in ratings:
+        weight = TRENDING_RATING_POINT_WEIGHT * score * _growth(_timestamp(created_at) - epoch)
+        scores[build_id] = scores.get(build_id, 0.0) + weight
+    for build_id, created_at in comments:
+        weight = TRENDING_COMMENT_WEIGHT * _growth(_timestamp(created_at) - epoch)
+        scores[build_id] = scores.get(build_id, 0.0) + weight
+    return scores
+
+
+class BuildTrending:
+    """Популярные сейчас сборки
+
+    Вес сборки — сумма весов просмотров, оценок и комментариев, каждый из
+    которых вдвое теряет значимость за TRENDING_HALF_LIFE. Чтобы не
+    пересчитывать все веса со временем, затухание записывается наоборот:
+    событие в момент t добавляет weight * 2^((t - epoch) / half_life), то
+    есть свежие события весят больше, а порядок сборок тот же. Раз в
+    TRENDING_RESCALE_INTERVAL фоновая задача умножает все веса на
+    2^(-(now - epoch) / half_life), переносит epoch на текущий момент и
+    удаляет угасшие сборки, чтобы веса не росли неограниченно.
+
+    Чтение страницы — ZREVRANGE и ZCARD. Пока epoch не записан (пустой
+    Redis), множество перестраивается по оценкам и комментариям из БД
+    (просмотры хранятся только в Redis и при этом теряются), а страница
+    считается по тем же данным.
+    """
+
+    def __init__(self, redis_service: RedisService):
+        self.redis_service = redis_service
+
+    async def get_epoch(self) -> Optional[float]:
+        """Момент, в единицах которого записаны веса, или None, если множество не построено"""
+        epoch = await self.redis_service.get_raw(TRENDING_EPOCH_KEY)
+        return float(epoch) if epoch else None
+
+    async def _record(self, build_id: int, weight: float) -> None:
+        epoch = await self.get_epoch()
+        if epoch is None:
+            return
+        # Событие, записанное одновременно с перемасштабированием по старому
+        # epoch, получит завышенный вес — на одно событие это допустимо
+        await self.redis_service.zincrby(TRENDING_KEY, weight * _growth(time.time() - epoch), str(build_id))
+
+    async def record_view(self, build_id: int) -> None:
+        """Учесть просмотр сборки"""
+        await self._record(build_id, TRENDING_VIEW_WEIGHT)
+
+    async def record_rating(self, build_id: int, score: int) -> None:
+        """Учесть новую оценку сборки"""
+        await self._record(build_id, TRENDING_RATING_POINT_WEIGHT * score)
+
+    async def record_comment(self, build_id: int) -> None:
+        """Учесть новый комментарий к сборке"""
+        await self._record(build_id, TRENDING_COMMENT_WEIGHT)
+
+    async def remove(self, *build_ids: int) -> None:
+        """Удалить сборки из популярных"""
+        await self.redis_service.zrem(TRENDING_KEY, *(str(build_id) for build_id in build_ids))
+
+    async def page(self, skip: int, limit: int) -> Optional[Tuple[List[int], int]]:
+        """
+        Страница популярных сборок
+
+        Args:
+            skip: Количество сборок для пропуска
+            limit: Количество сборок
+
+        Returns:
+            (ID сборок по убыванию веса, всего сборок) или None, если
+            множество не построено или недоступно
+        """
+        if await self.get_epoch() is None:
+            return None
+        members = await self.redis_service.zrevrange(TRENDING_KEY, skip, skip + limit - 1)
+        total = await self.redis_service.zcard(TRENDING_KEY)
+        if members is None or total is None:
+            return None
+        return [int(member) for member in members], total
+
+    async def rescale(self) -> Optional[bool]:
+        """
+        Привести веса к текущему моменту
+
+        Returns:
+            True если веса перемасштабированы, False при ошибке Redis,
+            None если множество не построено или его обрабатывает другой воркер
+        """
+        if not await self.redis_service.set_nx(TRENDING_LOCK_KEY, "1", ttl=TRENDING_LOCK_TTL):
+            return None
+        try:
+            # epoch читается под блокировкой: иначе два воркера уменьшили бы веса дважды
+            epoch = await self.get_epoch()
+            if epoch is None:
+                return None
+            now = time.time()
+            if not await self.redis_service.zscale(TRENDING_KEY, _growth(epoch - now), TRENDING_MIN_SCORE):
+                return False
+            await self.redis_service.set_raw(TRENDING_EPOCH_KEY, repr(now))
+            return True
+        finally:
+            await self.redis_service.delete(TRENDING_LOCK_KEY)
+
+    async def rebuild(self, build_repo) -> Optional[int]:
+        """
+        Перестроить множество по оценкам и комментариям в БД
+
+        Args:
+            build_repo: Репозиторий сборок (BuildRepository)
+
+        Returns:
+            Количество сборок или None, если множество обрабатывает другой воркер
+        """
+        if not await self.redis_service.set_nx(TRENDING_LOCK_KEY, "1", ttl=TRENDING_LOCK_TTL):
+            return None
+        try:
+            now = time.time()
+            scores = await self.scores_from_database(build_repo, now)
+            members = [(str(build_id), score) for build_id, score in scores.items()]
+
+            await self.redis_service.delete(TRENDING_REBUILD_KEY)
+            for start in range(0, len(members), TRENDING_REBUILD_BATCH_SIZE):
+                if not await self.redis_service.zadd(
+                    TRENDING_REBUILD_KEY, dict(members[start:start + TRENDING_REBUILD_BATCH_SIZE])
+                ):
+                    return 0
+
+            await self.redis_service.set_raw(TRENDING_EPOCH_KEY, repr(now))
+            if members:
+                if not await self.redis_service.rename(TRENDING_REBUILD_KEY, TRENDING_KEY):
+                    await self.redis_service.delete(TRENDING_EPOCH_KEY)
+                    return 0
+            else:
+                await self.redis_service.delete(TRENDING_KEY)
+            return len(members)
+        finally:
+            await self.redis_service.delete(TRENDING_LOCK_KEY)
+
+    @staticmethod
+    async def scores_from_database(build_repo, now: Optional[float] = None) -> Dict[int, float]:
+        """
+        Веса сборок по оценкам и комментариям из БД за TRENDING_REBUILD_WINDOW
+
+        Args:
+            build_repo: Репозиторий сборок (BuildRepository)
+            now: Момент, в единицах которого считаются веса (по умолчанию — текущий)
+        """
+        now = time.time() if now is None else now
+        since = datetime.fromtimestamp(now, tz=timezone.utc) - TRENDING_REBUILD_WINDOW
+        ratings, comments = await build_repo.get_activity_since(since)
+        return trending_scores(ratings, comments, now)
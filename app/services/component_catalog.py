@@ -0,0 +1,320 @@
+"""
+Снимок каталога компонентов в памяти процесса
+
+Каталог небольшой (тысячи строк), но читается почти на каждой странице,
+поэтому каждый воркер держит неизменяемый снимок с индексами по ID,
+категории и префиксу названия. Снимок пересобирается по окончании
+парсинга: новая версия объявляется через Redis pub/sub, и каждый воркер
+загружает каталог и подменяет снимок одной операцией присваивания.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from fastapi import status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.component import Component, ComponentCategory
+from app.schemas.component import ComponentResponse
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Последняя объявленная версия каталога и канал объявлений
+CATALOG_VERSION_KEY = "component_catalog:version"
+CATALOG_CHANNEL = "component_catalog:updates"
+
+_components_adapter = TypeAdapter(List[ComponentResponse])
+
+# Категория и характеристики компонента (для проверки совместимости)
+ComponentProfile = Tuple[ComponentCategory, Optional[Dict[str, Any]]]
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок каталога компонентов
+
+    Версия — хеш содержимого: воркеры, загрузившие одинаковые данные,
+    получают одинаковую версию и отдают одинаковый ETag.
+    """
+
+    def __init__(self, components: Iterable[ComponentResponse]):
+        ordered = sorted(components, key=lambda c: (c.category.value, c.name, c.id))
+
+        self._by_id: Dict[int, ComponentResponse] = {c.id: c for c in ordered}
+        by_category: Dict[ComponentCategory, List[ComponentResponse]] = {}
+        for component in ordered:
+            by_category.setdefault(component.category, []).append(component)
+        self._by_category: Dict[ComponentCategory, Tuple[ComponentResponse, ...]] = {
+            category: tuple(items) for category, items in by_category.items()
+        }
+        # Названия в нижнем регистре для поиска без учета регистра
+        self._folded_names: Dict[int, str] = {c.id: c.name.casefold() for c in ordered}
+        # Отсортированные (название, ID) для поиска по префиксу бинарным поиском
+        self._prefix_index: Dict[Optional[ComponentCategory], List[Tuple[str, int]]] = {
+            None: sorted((self._folded_names[c.id], c.id) for c in ordered)
+        }
+        for category, items in self._by_category.items():
+            self._prefix_index[category] = sorted((self._folded_names[c.id], c.id) for c in items)
+
+        digest = hashlib.sha256()
+        for component in ordered:
+            digest.update(component.model_dump_json().encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self._unique_json: Optional[bytes] = None
+        self._price_arrays: Dict[ComponentCategory, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def etag(self) -> str:
+        return f'"catalog-{self.version}"'
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, component_id: int) -> Optional[ComponentResponse]:
+        """Получить компонент по ID"""
+        return self._by_id.get(component_id)
+
+    def get_profiles(self, component_ids: Iterable[int]) -> Dict[int, ComponentProfile]:
+        """Категории и характеристики компонентов по ID (отсутствующие в снимке ID пропускаются)"""
+        return {
+            component_id: (self._by_id[component_id].category, self._by_id[component_id].specs)
+            for component_id in component_ids
+            if component_id in self._by_id
+        }
+
+    def by_category(
+        self,
+        category: ComponentCategory,
+        query: str = "",
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ComponentResponse]:
+        """
+        Компоненты категории, отсортированные по названию
+
+        Args:
+            category: Категория
+            query: Подстрока названия (без учета регистра)
+            skip: Количество записей для пропуска
+            limit: Максимальное количество записей
+        """
+        items = self._by_category.get(category, ())
+        if query:
+            folded = query.casefold()
+            items = [c for c in items if folded in self._folded_names[c.id]]
+        return list(items[skip:skip + limit])
+
+    def search_prefix(
+        self,
+        prefix: str,
+        category: Optional[ComponentCategory] = None,
+        limit: int = 20
+    ) -> List[ComponentResponse]:
+        """
+        Компоненты, название которых начинается с префикса (без учета регистра)
+
+        Args:
+            prefix: Начало названия
+            category: Категория (None — все категории)
+            limit: Максимальное количество записей
+        """
+        index = self._prefix_index.get(category, [])
+        folded = prefix.casefold()
+        start = bisect.bisect_left(index, (folded, -1))
+        result = []
+        for name, component_id in index[start:]:
+            if not name.startswith(folded) or len(result) >= limit:
+                break
+            result.append(self._by_id[component_id])
+        return result
+
+    def price_arrays(self, category: ComponentCategory) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Массивы ID и цен компонентов категории с известной ценой (вычисляются один раз на снимок)
+
+        Returns:
+            (ids, prices): массивы int64 одинаковой длины
+        """
+        arrays = self._price_arrays.get(category)
+        if arrays is None:
+            priced = [c for c in self._by_category.get(category, ()) if c.price and c.price > 0]
+            arrays = (
+                np.fromiter((c.id for c in priced), dtype=np.int64, count=len(priced)),
+                np.fromiter((c.price for c in priced), dtype=np.int64, count=len(priced))
+            )
+            self._price_arrays[category] = arrays
+        return arrays
+
+    def by_category_json(self, category: ComponentCategory, query: str, skip: int, limit: int) -> bytes:
+        """Сериализованный ответ by_category"""
+        return _components_adapter.dump_json(self.by_category(category, query, skip, limit))
+
+    def unique_json(self) -> bytes:
+        """Сериализованный BuildComponentsResponse (вычисляется один раз на снимок)"""
+        if self._unique_json is None:
+            from app.schemas.build import BuildComponentsResponse
+            self._unique_json = BuildComponentsResponse(
+                components_by_category={
+                    category.value: list(items) for category, items in self._by_category.items()
+                }
+            ).model_dump_json().encode("utf-8")
+        return self._unique_json
+
+
+class ComponentCatalog:
+    """Текущий снимок каталога процесса
+
+    Снимок загружается лениво при первом обращении (или при старте
+    приложения) и заменяется целиком: читатели всегда видят либо
+    старый, либо новый снимок, но не их смесь. Компоненты, пропавшие
+    из магазина, в снимок не попадают.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def reset(self) -> None:
+        """Сбросить снимок (следующее обращение загрузит каталог заново)"""
+        self._snapshot = None
+
+    async def get_snapshot(self, db: AsyncSession) -> CatalogSnapshot:
+        """Получить снимок, загрузив каталог при первом обращении"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        async with self._lock:
+            if self._snapshot is None:
+                await self.reload(db)
+            return self._snapshot
+
+    async def reload(self, db: AsyncSession) -> CatalogSnapshot:
+        """Загрузить каталог из БД и подменить снимок"""
+        result = await db.execute(
+            select(
+                Component.id,
+                Component.name,
+                Component.link,
+                Component.price,
+                Component.image,
+                Component.category,
+                Component.created_at,
+                Component.updated_at,
+                Component.specs,
+                Component.is_available
+            )
+            .where(Component.is_available)
+        )
+        snapshot = CatalogSnapshot(ComponentResponse.model_validate(row) for row in result)
+        previous = self._snapshot
+        self._snapshot = snapshot
+        if previous is None or previous.version != snapshot.version:
+            logger.info(f"Загружен каталог компонентов версии {snapshot.version}: {len(snapshot)} шт.")
+        return snapshot
+
+    async def get_profiles(
+        self,
+        db: AsyncSession,
+        component_ids: Iterable[int],
+        linked_ids: Iterable[int] = ()
+    ) -> Dict[int, ComponentProfile]:
+        """
+        Получить категории и характеристики компонентов
+
+        Компоненты, добавленные после сборки снимка (например, во время
+        парсинга), дочитываются точечным запросом по первичному ключу.
+        Недоступные компоненты возвращаются только из linked_ids — уже
+        входящие в изменяемую сборку; в новые сборки они не попадают.
+
+        Args:
+            db: Сессия БД
+            component_ids: ID компонентов
+            linked_ids: ID компонентов, допустимых и в недоступном состоянии
+
+        Returns:
+            Словарь ID -> (категория, характеристики) (несуществующие и
+            недоступные ID отсутствуют)
+        """
+        ids = set(component_ids)
+        profiles = (await self.get_snapshot(db)).get_profiles(ids)
+        missing_ids = ids - profiles.keys()
+        if missing_ids:
+            allowed_ids = missing_ids & set(linked_ids)
+            available = or_(Component.is_available, Component.id.in_(allowed_ids)) if allowed_ids \
+                else Component.is_available
+            result = await db.execute(
+                select(Component.id, Component.category, Component.specs)
+                .where(Component.id.in_(missing_ids), available)
+            )
+            profiles.update({row.id: (row.category, row.specs) for row in result})
+        return profiles
+
+    async def publish(self, redis_service: RedisService, db: AsyncSession) -> CatalogSnapshot:
+        """
+        Пересобрать снимок и объявить новую версию остальным воркерам
+
+        Args:
+            redis_service: Сервис Redis
+            db: Сессия БД
+        """
+        snapshot = await self.reload(db)
+        await redis_service.set_raw(CATALOG_VERSION_KEY, snapshot.version)
+        if not await redis_service.publish(CATALOG_CHANNEL, snapshot.version):
+            logger.warning("Не удалось объявить новую версию каталога компонентов")
+        return snapshot
+
+    async def listen(
+        self,
+        redis_service: RedisService,
+        session_factory: Callable[[], AsyncSession]
+    ) -> None:
+        """
+        Подписаться на объявления версий и перезагружать снимок
+
+        Работает до отмены или обрыва соединения с Redis. После подписки
+        сверяет последнюю объявленную версию, чтобы не пропустить
+        объявления, сделанные пока подписки не было.
+
+        Args:
+            redis_service: Сервис Redis
+            session_factory: Фабрика сессий БД (AsyncSessionLocal)
+        """
+        async def sync(version: Optional[str]) -> None:
+            if version and (self._snapshot is None or self._snapshot.version != version):
+                async with session_factory() as db:
+                    await self.reload(db)
+
+        async with redis_service.subscribe(CATALOG_CHANNEL) as messages:
+            await sync(await redis_service.get_raw(CATALOG_VERSION_KEY))
+            async for version in messages:
+                await sync(version)
+
+
+def catalog_response(snapshot: CatalogSnapshot, if_none_match: Optional[str], render: Callable[[], bytes]) -> Response:
+    """
+    Ответ из снимка каталога с ETag версии
+
+    Args:
+        snapshot: Снимок каталога
+        if_none_match: Значение заголовка If-None-Match
+        render: Сериализация тела ответа (вызывается только без совпадения ETag)
+
+    Returns:
+        Response с JSON или 304 без тела
+    """
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if if_none_match and snapshot.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=render(), media_type="application/json", headers=headers)
+
+
+# Глобальный снимок каталога процесса
+component_catalog = ComponentCatalog()
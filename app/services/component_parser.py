@@ -5,10 +5,13 @@
 import asyncio
 import logging
 from typing import Dict, Optional
-from app.services.shop_parser import ShopParser, ComponentsCategory
+from app.services.shop_parser import ShopParser, ComponentsCategory, PageFetchError
 from app.models.component import ComponentCategory
 from app.repositories.component_repository import ComponentRepository
+from app.repositories.build_repository import BuildRepository
 from app.services.redis_service import RedisService
+from app.services.response_cache import ResponseCache, BUILDS_NAMESPACE
+from app.services.component_catalog import component_catalog
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.config import settings
 
@@ -36,6 +39,7 @@ class ComponentParserService:
     
     def __init__(self, redis_service: RedisService, shop_parser: ShopParser):
         self.redis_service = redis_service
+        self.response_cache = ResponseCache(redis_service)
         self._parsing_task: Optional[asyncio.Task] = None
         self._parser: Optional[ShopParser] = shop_parser
     
@@ -45,7 +49,8 @@ class ComponentParserService:
         
         Args:
             component_repo: Репозиторий компонентов
-            clear_existing: Очистить существующие данные перед парсингом
+            clear_existing: Полная синхронизация: каталог заменяется результатами
+                парсинга, пропавшие товары помечаются недоступными
         """
         # Проверяем, не запущен ли уже парсинг
         status = await self.get_status()
@@ -63,12 +68,23 @@ class ComponentParserService:
         component_repo: ComponentRepository, 
         clear_existing: bool = True
     ) -> None:
-        """Парсинг всех категорий"""
+        """Парсинг всех категорий
+        
+        При полной синхронизации (clear_existing) товары копятся в
+        промежуточной таблице и переносятся в каталог одной транзакцией
+        после парсинга всех категорий, поэтому каталог не бывает пустым
+        или частичным, а сборки не теряют компоненты. Иначе товары каждой
+        категории сразу создаются или обновляются в каталоге.
+        """
         categories = list(ComponentsCategory)
         total_categories = len(categories)
         processed_categories = 0
         processed_products = 0
         errors = []
+        # Категории, товары которых получены полностью (только для них пропавшие товары становятся недоступными)
+        synced_categories = []
+        stopped = False
+        fetch_tasks: Dict[ComponentsCategory, asyncio.Task] = {}
         
         try:
             # Инициализируем статус
@@ -83,11 +99,6 @@ class ComponentParserService:
             # Устанавливаем timestamp начала парсинга
             await self.redis_service.set(PARSE_STATUS_TIMESTAMP_KEY, asyncio.get_event_loop().time())
             
-            if clear_existing:
-                logger.info("Очищаем существующие компоненты")
-                deleted_count = await component_repo.delete_all()
-                logger.info(f"Удалено компонентов: {deleted_count}")
-            
             # Создаем отдельную сессию БД для парсинга
             database_url = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
             engine = create_async_engine(database_url, echo=False)
@@ -96,6 +107,20 @@ class ComponentParserService:
             try:
                 # Парсер уже инициализирован в конструкторе
                 
+                if clear_existing:
+                    # Остатки прерванной синхронизации не должны попасть в каталог
+                    async with async_session() as session:
+                        await ComponentRepository(session).clear_staging()
+                
+                # Категории загружаются параллельно (частоту и число запросов
+                # ограничивает планировщик парсера), а сохраняются по порядку
+                fetch_tasks = {
+                    category: asyncio.create_task(
+                        asyncio.wait_for(self._parser.get_category(category), timeout=CATEGORY_PARSE_TIMEOUT)
+                    )
+                    for category in categories
+                }
+                
                 # Парсим каждую категорию
                 for category in categories:
                     # Проверяем флаг остановки перед каждой категорией
@@ -115,10 +140,13 @@ class ComponentParserService:
                         })
                         await self.redis_service.delete(PARSE_STATUS_TIMESTAMP_KEY)
                         logger.info(f"Парсинг остановлен пользователем. Обработано категорий: {processed_categories}/{total_categories}, товаров: {processed_products}")
-                        # Закрываем парсер при остановке
+                        # Отменяем загрузку оставшихся категорий и закрываем парсер
+                        for task in fetch_tasks.values():
+                            task.cancel()
                         if self._parser:
                             await self._parser.close()
                             self._parser = None
+                        stopped = True
                         break
                     
                     try:
@@ -136,37 +164,51 @@ class ComponentParserService:
                         # Обновляем timestamp статуса перед началом парсинга
                         await self.redis_service.set(PARSE_STATUS_TIMESTAMP_KEY, asyncio.get_event_loop().time())
                         
-                        # Запускаем асинхронный парсинг с таймаутом
+                        # Дожидаемся загрузки категории (с таймаутом). Полнота
+                        # определяется парсером: категория получена до конца
+                        # списка, только если не было ошибки загрузки страницы
+                        complete = False
                         try:
-                            products = await asyncio.wait_for(
-                                self._parser.get_category(category),
-                                timeout=CATEGORY_PARSE_TIMEOUT
-                            )
+                            products = await fetch_tasks[category]
                             logger.info(f"Получено {len(products)} товаров из категории {category.display_name}")
+                            if products:
+                                complete = True
+                            else:
+                                # Пустая первая страница скорее означает блокировку магазина, чем пустую категорию
+                                logger.warning(f"Категория {category.display_name} пуста, ее товары не помечаются недоступными")
                         except asyncio.TimeoutError:
                             error_msg = f"Таймаут парсинга категории {category.display_name} (превышен лимит {CATEGORY_PARSE_TIMEOUT} секунд)"
                             logger.error(error_msg)
                             errors.append(error_msg)
                             products = []  # Продолжаем со следующей категорией
+                        except PageFetchError as e:
+                            error_msg = f"Категория {category.display_name} получена не полностью: {str(e)}"
+                            logger.error(error_msg)
+                            errors.append(error_msg)
+                            products = []  # Товары категории остаются как есть
                         
-                        # Сохраняем товары в базу асинхронно
-                        async with async_session() as session:
-                            parse_repo = ComponentRepository(session)
-                            category_enum = self._map_category(category)
-                            for product in products:
-                                try:
-                                    await parse_repo.create_or_update(
-                                        name=product.get("name", ""),
-                                        link=product.get("link", ""),
-                                        price=product.get("price"),
-                                        image=product.get("image"),
-                                        category=category_enum
+                        try:
+                            async with async_session() as session:
+                                parse_repo = ComponentRepository(session)
+                                category_enum = self._map_category(category)
+                                if clear_existing:
+                                    # Каталог не изменяется до окончания парсинга
+                                    processed_products += await parse_repo.stage(products, category_enum)
+                                    if complete:
+                                        synced_categories.append(category_enum)
+                                else:
+                                    # Сохраняем товары категории пакетами INSERT ... ON CONFLICT (link)
+                                    counts = await parse_repo.bulk_upsert(products, category_enum)
+                                    processed_products += sum(counts.values())
+                                    logger.info(
+                                        f"Сохранены товары категории {category.display_name}: "
+                                        f"новых {counts['inserted']}, обновлено {counts['updated']}, "
+                                        f"без изменений {counts['unchanged']}"
                                     )
-                                    processed_products += 1
-                                except Exception as e:
-                                    error_msg = f"Ошибка при сохранении товара '{product.get('name', 'unknown')}': {str(e)}"
-                                    logger.error(error_msg)
-                                    errors.append(error_msg)
+                        except Exception as e:
+                            error_msg = f"Ошибка при сохранении товаров категории {category.display_name}: {str(e)}"
+                            logger.error(error_msg)
+                            errors.append(error_msg)
                         
                         processed_categories += 1
                         # Обновляем timestamp после обработки категории
@@ -179,6 +221,54 @@ class ComponentParserService:
                         errors.append(error_msg)
                         processed_categories += 1
                 
+                # Переносим результаты полной синхронизации в каталог одной транзакцией
+                if clear_existing and not stopped:
+                    try:
+                        async with async_session() as session:
+                            counts = await ComponentRepository(session).apply_staging(synced_categories)
+                        logger.info(
+                            f"Каталог синхронизирован: новых {counts['inserted']}, обновлено {counts['updated']}, "
+                            f"без изменений {counts['unchanged']}, недоступно {counts['unavailable']}"
+                        )
+                    except Exception as e:
+                        error_msg = f"Ошибка при синхронизации каталога: {str(e)}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
+                
+                # Извлекаем характеристики новых и измененных компонентов для проверки совместимости
+                try:
+                    async with async_session() as session:
+                        updated_specs = await ComponentRepository(session).refresh_specs()
+                        await session.commit()
+                    logger.info(f"Обновлены характеристики компонентов: {updated_specs}")
+                except Exception as e:
+                    error_msg = f"Ошибка при извлечении характеристик компонентов: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                
+                # Пересчитываем сохраненную стоимость сборок по обновленным ценам
+                try:
+                    async with async_session() as session:
+                        updated_builds = await BuildRepository(session).update_total_prices()
+                        await session.commit()
+                    logger.info(f"Пересчитана стоимость сборок: {updated_builds}")
+                except Exception as e:
+                    error_msg = f"Ошибка при пересчете стоимости сборок: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                
+                # Пересобираем снимок каталога и объявляем новую версию всем воркерам
+                try:
+                    async with async_session() as session:
+                        snapshot = await component_catalog.publish(self.redis_service, session)
+                    logger.info(f"Опубликован каталог компонентов версии {snapshot.version}")
+                except Exception as e:
+                    error_msg = f"Ошибка при обновлении каталога компонентов: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                
+                await self.response_cache.invalidate(BUILDS_NAMESPACE)
+                
                 # Финальный статус
                 await self.redis_service.set(PARSE_STATUS_KEY, {
                     "is_running": False,
@@ -194,6 +284,9 @@ class ComponentParserService:
                 logger.info(f"Парсинг завершен. Обработано категорий: {processed_categories}/{total_categories}, товаров: {processed_products}")
                 
             finally:
+                # Отменяем загрузку категорий, оставшихся после остановки или ошибки
+                for task in fetch_tasks.values():
+                    task.cancel()
                 await engine.dispose()
                 # Закрываем парсер после завершения всех категорий
                 if self._parser:
@@ -0,0 +1,334 @@
+"""
+Характеристики компонентов и проверка совместимости
+
+Магазин отдает только названия товаров, поэтому сокет, тип памяти,
+форм-фактор, TDP и мощность блока питания извлекаются из названия
+регулярными выражениями и справочными таблицами. Извлечение выполняется
+после парсинга и сохраняется в components.specs; проверка сборки — один
+проход по компонентам с поиском в заранее построенных таблицах.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.models.component import ComponentCategory
+
+# Ключи характеристик
+SPEC_SOCKET = "socket"
+SPEC_MEMORY_TYPE = "memory_type"
+SPEC_FORM_FACTOR = "form_factor"
+SPEC_TDP = "tdp"
+SPEC_WATTAGE = "wattage"
+
+# Версия правил извлечения: при изменении правил характеристики пересчитываются
+SPECS_VERSION = 1
+SPEC_VERSION_KEY = "v"
+
+# Форм-факторы плат по размеру: корпус вмещает плату своего размера и меньше
+FORM_FACTOR_RANK = {
+    "Mini-ITX": 0,
+    "Micro-ATX": 1,
+    "ATX": 2,
+    "E-ATX": 3,
+}
+
+# Чипсет материнской платы -> сокет
+CHIPSET_SOCKETS = {
+    **{chipset: "LGA1851" for chipset in ("Z890", "B860", "H810")},
+    **{chipset: "LGA1700" for chipset in ("Z790", "H770", "B760", "Z690", "H670", "B660", "H610", "Q670")},
+    **{chipset: "LGA1200" for chipset in ("Z590", "H570", "B560", "H510", "Z490", "H470", "B460", "H410")},
+    **{chipset: "LGA1151" for chipset in ("Z390", "Z370", "H370", "B365", "B360", "H310")},
+    **{chipset: "AM5" for chipset in ("X870", "B850", "B840", "X670", "B650", "A620")},
+    **{chipset: "AM4" for chipset in ("X570", "B550", "A520", "X470", "B450", "X370", "B350", "A320")},
+}
+
+# Сокет -> тип памяти, если плата поддерживает только один
+SOCKET_MEMORY_TYPES = {
+    "LGA1851": "DDR5",
+    "AM5": "DDR5",
+    "LGA1200": "DDR4",
+    "LGA1151": "DDR4",
+    "AM4": "DDR4",
+}
+
+# Поколение Intel Core -> сокет
+INTEL_GENERATION_SOCKETS = {
+    8: "LGA1151", 9: "LGA1151",
+    10: "LGA1200", 11: "LGA1200",
+    12: "LGA1700", 13: "LGA1700", 14: "LGA1700",
+}
+
+# Видеокарта -> типичное энергопотребление (Вт)
+GPU_TDP = {
+    "RTX 5090": 575, "RTX 5080": 360, "RTX 5070 TI": 300, "RTX 5070": 250, "RTX 5060 TI": 180, "RTX 5060": 145,
+    "RTX 4090": 450, "RTX 4080 SUPER": 320, "RTX 4080": 320, "RTX 4070 TI SUPER": 285, "RTX 4070 TI": 285,
+    "RTX 4070 SUPER": 220, "RTX 4070": 200, "RTX 4060 TI": 165, "RTX 4060": 115,
+    "RTX 3090 TI": 450, "RTX 3090": 350, "RTX 3080 TI": 350, "RTX 3080": 320, "RTX 3070 TI": 290,
+    "RTX 3070": 220, "RTX 3060 TI": 200, "RTX 3060": 170, "RTX 3050": 130,
+    "GTX 1660 SUPER": 125, "GTX 1660 TI": 120, "GTX 1660": 120, "GTX 1650": 75, "GT 1030": 30,
+    "RX 9070 XT": 304, "RX 9070": 220, "RX 9060 XT": 160,
+    "RX 7900 XTX": 355, "RX 7900 XT": 315, "RX 7900 GRE": 260, "RX 7800 XT": 263, "RX 7700 XT": 245,
+    "RX 7600 XT": 190, "RX 7600": 165,
+    "RX 6950 XT": 335, "RX 6900 XT": 300, "RX 6800 XT": 300, "RX 6800": 250, "RX 6750 XT": 250,
+    "RX 6700 XT": 230, "RX 6650 XT": 180, "RX 6600 XT": 160, "RX 6600": 132, "RX 6500 XT": 107, "RX 6400": 53,
+    "ARC B580": 190, "ARC A770": 225, "ARC A750": 225, "ARC A380": 75,
+}
+
+# Запас мощности блока питания на плату, память, накопители и вентиляторы (Вт)
+PSU_BASE_LOAD = 150
+
+_SOCKET_RE = re.compile(r"\b(?:AM([45])|(?:LGA|Socket|s)\s?-?(1851|1700|1200|1151))\b", re.IGNORECASE)
+_INTEL_CORE_RE = re.compile(r"\bi[3579][\s-]?(\d{4,5})([A-Z]*)\b", re.IGNORECASE)
+_INTEL_ULTRA_RE = re.compile(r"\bUltra\s*[3579]\s*2\d{2}([A-Z]*)\b", re.IGNORECASE)
+_INTEL_BUDGET_RE = re.compile(r"\b(?:Pentium|Celeron)\s*(?:Gold\s*)?G(\d)\d{3}", re.IGNORECASE)
+_RYZEN_RE = re.compile(r"\bRyzen\s*(?:[3579]\s+)?(\d)(\d{3})(X3D|XT|X|GT|GE|G|F)?\b", re.IGNORECASE)
+_CHIPSET_RE = re.compile(r"\b([ABHQXZ]\d{3})([EMI]?)(?=\b|-)", re.IGNORECASE)
+_MEMORY_RE = re.compile(r"\b(?:DDR([345])|D([45]))\b", re.IGNORECASE)
+_FORM_FACTOR_RE = re.compile(
+    r"(?P<eatx>\bE-?ATX\b)|(?P<itx>\bMini[\s-]?ITX\b|\bITX\b)|"
+    r"(?P<matx>\bMicro[\s-]?ATX\b|\bm-?ATX\b|\bmicroATX\b)|(?P<atx>\bATX\b)",
+    re.IGNORECASE
+)
+_WATTS_RE = re.compile(r"(\d{2,4})\s*(?:W|Вт)\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"(?<!\d)(\d{3,4})(?!\d)")
+_GPU_RE = re.compile(
+    r"\b(RTX|GTX|GT|RX|ARC)\s*([AB]?\d{3,4})\s*(TI\s*SUPER|TI|SUPER|XTX|XT|GRE)?\b",
+    re.IGNORECASE
+)
+
+
+def _explicit_socket(name: str) -> Optional[str]:
+    match = _SOCKET_RE.search(name)
+    if not match:
+        return None
+    if match.group(1):
+        return f"AM{match.group(1)}"
+    return f"LGA{match.group(2)}"
+
+
+def _memory_type(name: str) -> Optional[str]:
+    match = _MEMORY_RE.search(name)
+    if not match:
+        return None
+    return f"DDR{match.group(1) or match.group(2)}"
+
+
+def _form_factors(name: str) -> List[str]:
+    """Все форм-факторы, упомянутые в названии"""
+    found = []
+    for match in _FORM_FACTOR_RE.finditer(name):
+        if match.group("eatx"):
+            found.append("E-ATX")
+        elif match.group("itx"):
+            found.append("Mini-ITX")
+        elif match.group("matx"):
+            found.append("Micro-ATX")
+        else:
+            found.append("ATX")
+    return found
+
+
+def _processor_specs(name: str) -> Dict[str, Any]:
+    specs: Dict[str, Any] = {}
+    socket = _explicit_socket(name)
+    tdp = None
+
+    intel = _INTEL_CORE_RE.search(name)
+    ultra = _INTEL_ULTRA_RE.search(name)
+    budget = _INTEL_BUDGET_RE.search(name)
+    ryzen = _RYZEN_RE.search(name)
+    if intel:
+        model, suffix = intel.group(1), intel.group(2).upper()
+        generation = int(model[:2]) if len(model) == 5 else int(model[0])
+        socket = socket or INTEL_GENERATION_SOCKETS.get(generation)
+        tdp = 125 if suffix.startswith("K") else 35 if suffix.startswith("T") else 65
+    elif ultra:
+        socket = socket or "LGA1851"
+        tdp = 125 if ultra.group(1).upper().startswith("K") else 65
+    elif budget:
+        socket = socket or {7: "LGA1700", 6: "LGA1200", 5: "LGA1151"}.get(int(budget.group(1)))
+        tdp = 46
+    elif ryzen:
+        series, suffix = int(ryzen.group(1)), (ryzen.group(3) or "").upper()
+        socket = socket or ("AM5" if series >= 7 else "AM4")
+        tdp = 120 if suffix == "X3D" else 105 if suffix in ("X", "XT") else 65
+
+    watts = _WATTS_RE.search(name)
+    if watts:
+        tdp = int(watts.group(1))
+    if socket:
+        specs[SPEC_SOCKET] = socket
+    if tdp:
+        specs[SPEC_TDP] = tdp
+    return specs
+
+
+def _motherboard_specs(name: str) -> Dict[str, Any]:
+    specs: Dict[str, Any] = {}
+    socket = _explicit_socket(name)
+    form_factors = _form_factors(name)
+    form_factor = form_factors[0] if form_factors else None
+
+    chipset = _CHIPSET_RE.search(name)
+    if chipset:
+        socket = socket or CHIPSET_SOCKETS.get(chipset.group(1).upper())
+        suffix = chipset.group(2).upper()
+        if not form_factor:
+            form_factor = "Micro-ATX" if suffix == "M" else "Mini-ITX" if suffix == "I" else None
+        if not form_factor and re.search(r"\bITX\b|-I\b", name, re.IGNORECASE):
+            form_factor = "Mini-ITX"
+        if not form_factor and socket:
+            form_factor = "ATX"
+
+    memory_type = _memory_type(name) or (SOCKET_MEMORY_TYPES.get(socket) if socket else None)
+    if socket:
+        specs[SPEC_SOCKET] = socket
+    if memory_type:
+        specs[SPEC_MEMORY_TYPE] = memory_type
+    if form_factor:
+        specs[SPEC_FORM_FACTOR] = form_factor
+    return specs
+
+
+def _memory_specs(name: str) -> Dict[str, Any]:
+    memory_type = _memory_type(name)
+    return {SPEC_MEMORY_TYPE: memory_type} if memory_type else {}
+
+
+def _case_specs(name: str) -> Dict[str, Any]:
+    form_factors = _form_factors(name)
+    if not form_factors:
+        return {}
+    # Корпус описывается самой большой поддерживаемой платой
+    return {SPEC_FORM_FACTOR: max(form_factors, key=FORM_FACTOR_RANK.__getitem__)}
+
+
+def _power_supply_specs(name: str) -> Dict[str, Any]:
+    watts = _WATTS_RE.search(name)
+    if watts and 200 <= int(watts.group(1)) <= 2000:
+        return {SPEC_WATTAGE: int(watts.group(1))}
+    # Мощность в модели: VX-550, PF600, RM850e
+    for match in _NUMBER_RE.finditer(name):
+        value = int(match.group(1))
+        if 300 <= value <= 2000 and value % 50 == 0:
+            return {SPEC_WATTAGE: value}
+    return {}
+
+
+def _video_card_specs(name: str) -> Dict[str, Any]:
+    match = _GPU_RE.search(name)
+    if not match:
+        return {}
+    series, model, variant = match.group(1).upper(), match.group(2).upper(), (match.group(3) or "").upper()
+    variant = " ".join(variant.split())
+    key = f"{series} {model}" + (f" {variant}" if variant else "")
+    tdp = GPU_TDP.get(key) or GPU_TDP.get(f"{series} {model}")
+    return {SPEC_TDP: tdp} if tdp else {}
+
+
+_EXTRACTORS = {
+    ComponentCategory.PROCESSORY: _processor_specs,
+    ComponentCategory.MATERINSKIE_PLATY: _motherboard_specs,
+    ComponentCategory.OPERATIVNAYA_PAMYAT: _memory_specs,
+    ComponentCategory.KORPUSA: _case_specs,
+    ComponentCategory.BLOKI_PITANIYA: _power_supply_specs,
+    ComponentCategory.VIDEOKARTY: _video_card_specs,
+}
+
+
+def extract_specs(name: str, category: ComponentCategory) -> Dict[str, Any]:
+    """
+    Извлечь характеристики компонента из названия
+
+    Args:
+        name: Название товара
+        category: Категория компонента
+
+    Returns:
+        Словарь характеристик (неизвестные характеристики отсутствуют)
+        с версией правил извлечения
+    """
+    extractor = _EXTRACTORS.get(category)
+    specs = extractor(name) if extractor else {}
+    specs[SPEC_VERSION_KEY] = SPECS_VERSION
+    return specs
+
+
+def check_compatibility(components: Iterable[Tuple[ComponentCategory, Optional[Dict[str, Any]]]]) -> List[str]:
+    """
+    Проверить совместимость компонентов сборки
+
+    Неизвестные характеристики считаются совместимыми: проверяется
+    только то, что удалось извлечь из названий.
+
+    Args:
+        components: Пары (категория, характеристики) компонентов сборки
+
+    Returns:
+        Список описаний несовместимостей (пустой, если сборка совместима)
+    """
+    by_category: Dict[ComponentCategory, List[Dict[str, Any]]] = {}
+    for category, specs in components:
+        by_category.setdefault(category, []).append(specs or {})
+
+    problems = []
+    boards = by_category.get(ComponentCategory.MATERINSKIE_PLATY, [])
+    processors = by_category.get(ComponentCategory.PROCESSORY, [])
+    memory = by_category.get(ComponentCategory.OPERATIVNAYA_PAMYAT, [])
+    cases = by_category.get(ComponentCategory.KORPUSA, [])
+    video_cards = by_category.get(ComponentCategory.VIDEOKARTY, [])
+    power_supplies = by_category.get(ComponentCategory.BLOKI_PITANIYA, [])
+
+    for board in boards:
+        board_socket = board.get(SPEC_SOCKET)
+        board_memory = board.get(SPEC_MEMORY_TYPE)
+        board_form_factor = board.get(SPEC_FORM_FACTOR)
+        for processor in processors:
+            socket = processor.get(SPEC_SOCKET)
+            if board_socket and socket and socket != board_socket:
+                problems.append(f"Процессор с сокетом {socket} не подходит к материнской плате с сокетом {board_socket}")
+        for module in memory:
+            memory_type = module.get(SPEC_MEMORY_TYPE)
+            if board_memory and memory_type and memory_type != board_memory:
+                problems.append(f"Оперативная память {memory_type} не поддерживается материнской платой ({board_memory})")
+        for case in cases:
+            case_form_factor = case.get(SPEC_FORM_FACTOR)
+            if (
+                board_form_factor and case_form_factor
+                and FORM_FACTOR_RANK[board_form_factor] > FORM_FACTOR_RANK[case_form_factor]
+            ):
+                problems.append(f"Материнская плата {board_form_factor} не помещается в корпус {case_form_factor}")
+
+    load = sum(c.get(SPEC_TDP, 0) for c in processors) + sum(c.get(SPEC_TDP, 0) for c in video_cards)
+    if load:
+        required = load + PSU_BASE_LOAD
+        for power_supply in power_supplies:
+            wattage = power_supply.get(SPEC_WATTAGE)
+            if wattage and wattage < required:
+                problems.append(f"Мощности блока питания {wattage} Вт недостаточно: требуется не менее {required} Вт")
+    return problems
+
+
+def platform_key(board_specs: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Платформа материнской платы: (сокет, тип памяти, форм-фактор)"""
+    specs = board_specs or {}
+    return specs.get(SPEC_SOCKET), specs.get(SPEC_MEMORY_TYPE), specs.get(SPEC_FORM_FACTOR)
+
+
+def fits_platform(
+    category: ComponentCategory,
+    specs: Optional[Dict[str, Any]],
+    platform: Tuple[Optional[str], Optional[str], Optional[str]]
+) -> bool:
+    """Совместим ли компонент с платформой материнской платы (те же правила, что в check_compatibility)"""
+    socket, memory_type, form_factor = platform
+    specs = specs or {}
+    if category == ComponentCategory.PROCESSORY:
+        return not (socket and specs.get(SPEC_SOCKET) and specs[SPEC_SOCKET] != socket)
+    if category == ComponentCategory.OPERATIVNAYA_PAMYAT:
+        return not (memory_type and specs.get(SPEC_MEMORY_TYPE) and specs[SPEC_MEMORY_TYPE] != memory_type)
+    if category == ComponentCategory.KORPUSA:
+        case_form_factor = specs.get(SPEC_FORM_FACTOR)
+        return not (
+            form_factor and case_form_factor
+            and FORM_FACTOR_RANK[form_factor] > FORM_FACTOR_RANK[case_form_factor]
+        )
+    return True
@@ -0,0 +1,272 @@
+"""
+Ресурсы для верстки PDF: шрифты, логотип и стили абзацев
+
+Загружаются один раз на процесс (при старте приложения, в инициализаторе
+процессов пула верстки или лениво при первом экспорте) и дальше
+переиспользуются всеми PDF.
+"""
+import io
+import os
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+from reportlab.lib.units import mm
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
+from reportlab.platypus import Image
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from PIL import Image as PILImage
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DEFAULT_FONTS_DIR = os.path.join(_PROJECT_ROOT, 'fonts')
+DEFAULT_LOGO_PATH = os.path.join(_PROJECT_ROOT, 'app', 'assets', 'logo.png')
+
+# Максимальная высота логотипа в PDF
+LOGO_MAX_HEIGHT = 40*mm
+# Размер заглушки для компонентов без изображения в пикселях
+PLACEHOLDER_SIZE_PX = 120
+
+
+class PDFAssets:
+    """Готовые ресурсы для верстки PDF
+
+    Flowable-объекты ReportLab нельзя переиспользовать между документами,
+    поэтому логотип и заглушка хранятся как уже подготовленные байты PNG,
+    а Image создается на каждый документ без повторного декодирования
+    и масштабирования.
+    """
+
+    def __init__(
+        self,
+        regular_font: str,
+        bold_font: str,
+        styles: Dict[str, ParagraphStyle],
+        logo: Optional[Tuple[bytes, float, float]],
+        placeholder: bytes
+    ):
+        self.regular_font = regular_font
+        self.bold_font = bold_font
+        self.styles = styles
+        self._logo = logo
+        self._placeholder = placeholder
+
+    def logo_image(self) -> Optional[Image]:
+        """Логотип для нового документа или None, если логотипа нет"""
+        if not self._logo:
+            return None
+        data, width, height = self._logo
+        return Image(io.BytesIO(data), width=width, height=height)
+
+    def placeholder_image(self, size: float) -> Image:
+        """Заглушка для компонента без изображения"""
+        return Image(io.BytesIO(self._placeholder), width=size, height=size)
+
+
+def _register_fonts(fonts_dir: str) -> Tuple[str, str]:
+    """Регистрирует шрифты NetflixSans из локальной папки fonts"""
+    fonts = {}
+    for name, filename in (('NetflixSans', 'NetflixSans-Rg.ttf'), ('NetflixSansBold', 'NetflixSans-Bd.ttf')):
+        path = os.path.join(fonts_dir, filename)
+        if not os.path.exists(path):
+            logger.error(f"Файл шрифта {path} не найден")
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+            fonts[name] = name
+            logger.info(f"Зарегистрирован шрифт для PDF: {filename}")
+        except Exception as e:
+            logger.error(f"Ошибка при регистрации шрифта {filename}: {e}")
+
+    if len(fonts) < 2:
+        raise FileNotFoundError(
+            f"Шрифты NetflixSans не найдены в папке {fonts_dir}. "
+            f"Убедитесь, что файлы NetflixSans-Rg.ttf и NetflixSans-Bd.ttf существуют."
+        )
+    return fonts['NetflixSans'], fonts['NetflixSansBold']
+
+
+def _build_styles(regular_font: str, bold_font: str) -> Dict[str, ParagraphStyle]:
+    """Стили абзацев с кириллическими шрифтами и уменьшенным межбуквенным интервалом"""
+    sample = getSampleStyleSheet()
+    styles: Dict[str, ParagraphStyle] = {}
+
+    styles['title'] = ParagraphStyle(
+        'CustomTitle',
+        parent=sample['Heading1'],
+        fontSize=26,
+        textColor=colors.HexColor('#1e40af'),
+        spaceAfter=14,
+        alignment=TA_LEFT,
+        fontName=bold_font,
+        leading=30,
+        wordWrap='CJK'  # Правильный перенос слов
+    )
+
+    styles['heading'] = ParagraphStyle(
+        'CustomHeading',
+        parent=sample['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#1e3a8a'),
+        spaceAfter=6,
+        spaceBefore=10,
+        fontName=bold_font,
+        leading=16,
+        wordWrap='CJK'
+    )
+
+    styles['stats_header'] = ParagraphStyle(
+        'StatsHeader',
+        parent=styles['heading'],
+        textColor=colors.white,
+        alignment=TA_CENTER
+    )
+
+    styles['total_price'] = ParagraphStyle(
+        'TotalPrice',
+        parent=styles['heading'],
+        fontSize=20,
+        textColor=colors.HexColor('#059669')
+    )
+
+    styles['normal'] = ParagraphStyle(
+        'CustomNormal',
+        parent=sample['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#1f2937'),
+        alignment=TA_JUSTIFY,
+        spaceAfter=5,
+        fontName=regular_font,
+        leading=12,
+        wordWrap='CJK'
+    )
+
+    styles['info'] = ParagraphStyle(
+        'InfoStyle',
+        parent=sample['Normal'],
+        fontSize=9,
+        textColor=colors.HexColor('#4b5563'),
+        spaceAfter=3,
+        fontName=regular_font,
+        leading=11,
+        wordWrap='CJK'
+    )
+
+    styles['icon'] = ParagraphStyle('Icon', parent=styles['info'], fontSize=12)
+
+    # Стили для таблиц
+    styles['table_text'] = ParagraphStyle(
+        'TableText',
+        parent=sample['Normal'],
+        fontSize=9,
+        textColor=colors.HexColor('#1f2937'),
+        fontName=regular_font,
+        leading=11,
+        wordWrap='CJK'
+    )
+
+    styles['table_header'] = ParagraphStyle(
+        'TableHeader',
+        parent=sample['Normal'],
+        fontSize=10,
+        textColor=colors.white,
+        fontName=bold_font,
+        leading=12,
+        alignment=TA_CENTER,
+        wordWrap='CJK'
+    )
+    return styles
+
+
+def _load_logo(logo_path: str) -> Optional[Tuple[bytes, float, float]]:
+    """Подготовить логотип: PNG без прозрачности, уменьшенный до LOGO_MAX_HEIGHT"""
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    try:
+        pil_logo = PILImage.open(logo_path)
+        # Конвертируем RGBA в RGB если нужно
+        if pil_logo.mode == 'RGBA':
+            rgb_logo = PILImage.new('RGB', pil_logo.size, (255, 255, 255))
+            rgb_logo.paste(pil_logo, mask=pil_logo.split()[3])
+            pil_logo = rgb_logo
+
+        img_width, img_height = pil_logo.size
+
+        # Вычисляем размеры для PDF (предполагаем 96 DPI: 1 пиксель ≈ 0.264583 мм)
+        pixels_per_mm = 96 / 25.4
+        img_height_mm = img_height / pixels_per_mm
+
+        # Если логотип больше максимальной высоты, уменьшаем
+        if img_height_mm > LOGO_MAX_HEIGHT:
+            ratio = LOGO_MAX_HEIGHT / img_height_mm
+            logo_height_mm = LOGO_MAX_HEIGHT
+            logo_width_mm = (img_width / pixels_per_mm) * ratio
+            new_size = (int(img_width * ratio), int(img_height * ratio))
+            pil_logo = pil_logo.resize(new_size, PILImage.Resampling.LANCZOS)
+        else:
+            logo_height_mm = img_height_mm
+            logo_width_mm = img_width / pixels_per_mm
+
+        buffer = io.BytesIO()
+        pil_logo.save(buffer, format='PNG')
+        return buffer.getvalue(), logo_width_mm, logo_height_mm
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке логотипа {logo_path}: {e}")
+        return None
+
+
+def _make_placeholder() -> bytes:
+    placeholder = PILImage.new('RGB', (PLACEHOLDER_SIZE_PX, PLACEHOLDER_SIZE_PX), color=(245, 245, 245))
+    buffer = io.BytesIO()
+    placeholder.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+_assets: Dict[Tuple[str, str], PDFAssets] = {}
+_assets_lock = threading.Lock()
+
+
+def get_pdf_assets(fonts_dir: str = DEFAULT_FONTS_DIR, logo_path: str = DEFAULT_LOGO_PATH) -> PDFAssets:
+    """
+    Получить ресурсы для верстки, загрузив их при первом обращении
+
+    Потокобезопасно: при одновременных первых экспортах ресурсы
+    загружаются один раз.
+
+    Args:
+        fonts_dir: Путь к папке со шрифтами
+        logo_path: Путь к логотипу
+
+    Returns:
+        PDFAssets: Ресурсы процесса
+
+    Raises:
+        FileNotFoundError: Если не найдены шрифты
+    """
+    key = (fonts_dir, logo_path)
+    assets = _assets.get(key)
+    if assets:
+        return assets
+
+    with _assets_lock:
+        assets = _assets.get(key)
+        if assets is None:
+            regular_font, bold_font = _register_fonts(fonts_dir)
+            assets = PDFAssets(
+                regular_font=regular_font,
+                bold_font=bold_font,
+                styles=_build_styles(regular_font, bold_font),
+                logo=_load_logo(logo_path),
+                placeholder=_make_placeholder()
+            )
+            _assets[key] = assets
+            logger.info("Ресурсы для верстки PDF загружены")
+    return assets
+
+
+def warmup_pdf_assets(fonts_dir: str = DEFAULT_FONTS_DIR, logo_path: str = DEFAULT_LOGO_PATH) -> None:
+    """Загрузить ресурсы заранее (при старте приложения и процессов пула верстки)"""
+    get_pdf_assets(fonts_dir, logo_path)
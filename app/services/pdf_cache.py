@@ -0,0 +1,185 @@
+"""
+Дисковый кеш сгенерированных PDF сборок
+"""
+import os
+import glob
+import hashlib
+import tempfile
+import asyncio
+import logging
+from typing import Optional, Callable, Awaitable, BinaryIO
+from app.models.build import Build
+
+logger = logging.getLogger(__name__)
+
+# Меняется при изменении оформления PDF, чтобы не отдавать файлы старого вида
+PDF_LAYOUT_VERSION = 1
+
+
+class PDFCache:
+    """Кеш PDF на диске с адресацией по содержимому
+
+    Имя файла — `<build_id>_<hash>.pdf`, где hash вычисляется по дате изменения
+    сборки, оценкам и составу/ценам компонентов. Просмотры в ключ не входят:
+    счетчик в PDF может отставать до следующего изменения сборки. Любое изменение дает новый ключ, а старые
+    файлы сборки удаляются при сохранении нового и при явной инвалидации.
+    Общий размер ограничен: при превышении удаляются давно не читавшиеся файлы.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(build: Build) -> str:
+        """
+        Вычислить ключ PDF для текущего состояния сборки
+
+        Args:
+            build: Сборка с загруженными компонентами
+
+        Returns:
+            Хеш содержимого (используется и как ETag)
+        """
+        parts = [
+            f"v{PDF_LAYOUT_VERSION}",
+            str(build.id),
+            build.updated_at.isoformat() if build.updated_at else "",
+            build.title or "",
+            # Оценки не меняют updated_at, но выводятся в PDF
+            f"{build.ratings_count}:{build.rating_sum}",
+        ]
+        for component in sorted(build.components, key=lambda c: c.id):
+            parts.append(
+                f"{component.id}:{component.price}:"
+                f"{component.updated_at.isoformat() if component.updated_at else ''}"
+            )
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, build_id: int, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{build_id}_{key}.pdf")
+
+    def get(self, build_id: int, key: str) -> Optional[BinaryIO]:
+        """
+        Открыть закешированный PDF
+
+        Файл открывается сразу, а не возвращается путем: открытый файл
+        дочитывается, даже если его удалит инвалидация или вытеснение
+        (в том числе в другом воркере).
+
+        Args:
+            build_id: ID сборки
+            key: Ключ PDF
+
+        Returns:
+            Файл, открытый на чтение, или None, если PDF нет в кеше
+        """
+        path = self._path(build_id, key)
+        try:
+            pdf_file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            # Время изменения файла — метка последнего использования для LRU
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return pdf_file
+
+    async def get_or_create(
+        self,
+        build_id: int,
+        key: str,
+        render: Callable[[BinaryIO], Awaitable[None]]
+    ) -> BinaryIO:
+        """
+        Открыть PDF, при отсутствии сгенерировав его прямо в файл
+
+        Args:
+            build_id: ID сборки
+            key: Ключ PDF
+            render: Функция, записывающая PDF в переданный файл
+
+        Returns:
+            Файл PDF, открытый на чтение (закрывает вызывающий код)
+        """
+        pdf_file = self.get(build_id, key)
+        if pdf_file:
+            return pdf_file
+
+        path = self._path(build_id, key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        # Файл остается открытым после записи и отдается на чтение
+        pdf_file = os.fdopen(fd, "w+b")
+        try:
+            await render(pdf_file)
+            pdf_file.flush()
+            pdf_file.seek(0)
+            # Атомарная замена: читатели никогда не видят недописанный файл
+            os.replace(tmp_path, path)
+        except BaseException:
+            pdf_file.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        try:
+            await asyncio.to_thread(self._remove_stale, build_id, path)
+            await asyncio.to_thread(self._evict, path)
+        except BaseException:
+            # Отмена во время уборки не должна оставлять открытый файл
+            pdf_file.close()
+            raise
+        return pdf_file
+
+    def invalidate(self, build_id: int) -> int:
+        """
+        Удалить все закешированные PDF сборки
+
+        Args:
+            build_id: ID сборки
+
+        Returns:
+            Количество удаленных файлов
+        """
+        return self._remove_stale(build_id, keep=None)
+
+    def _remove_stale(self, build_id: int, keep: Optional[str]) -> int:
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, f"{build_id}_*.pdf")):
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Удалить давно не использованные файлы (кроме keep), пока кеш превышает лимит"""
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.cache_dir, "*.pdf")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            logger.info(f"PDF удален из кеша по лимиту размера: {path}")
+            if total <= self.max_bytes:
+                break
@@ -4,20 +4,35 @@
 
 import io
 import aiohttp
-import os
-import platform
-from typing import Optional, List
+import asyncio
+import logging
+from typing import Optional, Dict, Any, BinaryIO, TYPE_CHECKING
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from PIL import Image as PILImage
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
 from app.models.build import Build
-from app.models.component import Component, ComponentCategory
+from app.models.component import ComponentCategory
+from app.services.thumbnail_cache import make_thumbnail
+from app.services.pdf_assets import get_pdf_assets, DEFAULT_FONTS_DIR, DEFAULT_LOGO_PATH
+
+if TYPE_CHECKING:
+    from app.services.pdf_render_pool import PDFRenderPool
+    from app.services.thumbnail_cache import ThumbnailCache
+
+logger = logging.getLogger(__name__)
+
+
+def _render_in_worker(
+    site_name: str,
+    fonts_dir: str,
+    logo_path: str,
+    snapshot: Dict[str, Any],
+    images: Dict[int, bytes]
+) -> bytes:
+    """Точка входа для процесса пула: верстка PDF без доступа к БД и сети"""
+    generator = PDFGenerator(site_name=site_name, fonts_dir=fonts_dir, logo_path=logo_path)
+    return generator.render(snapshot, images)
 
 
 class PDFGenerator:
@@ -40,7 +55,11 @@ class PDFGenerator:
         self,
         site_name: str = "Компьютер.ок",
         fonts_dir: Optional[str] = None,
-        logo_path: Optional[str] = None
+        logo_path: Optional[str] = None,
+        render_pool: Optional["PDFRenderPool"] = None,
+        thumbnail_cache: Optional["ThumbnailCache"] = None,
+        image_concurrency: int = 8,
+        image_timeout: float = 5.0
     ):
         """
         Инициализация генератора PDF
@@ -49,89 +68,172 @@ class PDFGenerator:
             site_name: Название сайта
             fonts_dir: Путь к папке со шрифтами (по умолчанию 'fonts' в корне проекта)
             logo_path: Путь к логотипу (по умолчанию 'app/assets/logo.png')
+            render_pool: Пул процессов для верстки (без пула верстка идет в потоке)
+            thumbnail_cache: Дисковый кеш миниатюр изображений компонентов
+            image_concurrency: Максимум одновременных загрузок изображений
+            image_timeout: Таймаут загрузки одного изображения в секундах
         """
         self.site_name = site_name
+        self.render_pool = render_pool
+        self.thumbnail_cache = thumbnail_cache
+        self.image_concurrency = image_concurrency
+        self.image_timeout = image_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        self.fonts_dir = fonts_dir or DEFAULT_FONTS_DIR
+        self.logo_path = logo_path or DEFAULT_LOGO_PATH
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Общая HTTP-сессия для загрузки изображений (переиспользует соединения)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+    
+    async def close(self) -> None:
+        """Закрыть HTTP-сессию"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _download_image(self, url: str) -> Optional[bytes]:
+        """Загружает изображение по URL и возвращает его байты"""
+        async with self._get_session().get(url) as response:
+            if response.status == 200:
+                return await response.read()
+        return None
+    
+    async def _get_thumbnail(self, url: str, semaphore: asyncio.Semaphore) -> Optional[bytes]:
+        """
+        Получить миниатюру изображения из кеша или загрузить и уменьшить ее
         
-        # Определяем пути по умолчанию
-        if fonts_dir is None:
-            self.fonts_dir = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                'fonts'
-            )
-        else:
-            self.fonts_dir = fonts_dir
+        Args:
+            url: URL изображения
+            semaphore: Ограничение одновременных загрузок
+            
+        Returns:
+            Байты JPEG или None, если изображение недоступно
+        """
+        if self.thumbnail_cache:
+            cached = await asyncio.to_thread(self.thumbnail_cache.get, url)
+            if cached:
+                return cached
         
-        if logo_path is None:
-            self.logo_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                'app', 'assets', 'logo.png'
-            )
-        else:
-            self.logo_path = logo_path
+        try:
+            async with semaphore:
+                image_bytes = await asyncio.wait_for(self._download_image(url), timeout=self.image_timeout)
+            if not image_bytes:
+                return None
+            thumbnail = await asyncio.to_thread(make_thumbnail, image_bytes)
+        except Exception as e:
+            logger.warning(f"Ошибка при загрузке изображения {url}: {e!r}")
+            return None
+        
+        if self.thumbnail_cache:
+            await asyncio.to_thread(self.thumbnail_cache.set, url, thumbnail)
+        return thumbnail
     
-    def _register_cyrillic_font(self):
-        """Регистрирует шрифты NetflixSans из локальной папки fonts"""
-        
-        regular_font = None
-        bold_font = None
-        
-        # Пути к шрифтам NetflixSans
-        regular_font_path = os.path.join(self.fonts_dir, 'NetflixSans-Rg.ttf')
-        bold_font_path = os.path.join(self.fonts_dir, 'NetflixSans-Bd.ttf')
-        
-        # Регистрируем обычный шрифт
-        if os.path.exists(regular_font_path):
-            try:
-                pdfmetrics.registerFont(TTFont('NetflixSans', regular_font_path))
-                regular_font = 'NetflixSans'
-                print(f"✓ Зарегистрирован обычный шрифт: NetflixSans-Rg.ttf")
-            except Exception as e:
-                print(f"✗ Ошибка при регистрации шрифта NetflixSans-Rg.ttf: {e}")
-        else:
-            print(f"✗ ОШИБКА: Файл {regular_font_path} не найден!")
-        
-        # Регистрируем жирный шрифт
-        if os.path.exists(bold_font_path):
-            try:
-                pdfmetrics.registerFont(TTFont('NetflixSansBold', bold_font_path))
-                bold_font = 'NetflixSansBold'
-                print(f"✓ Зарегистрирован жирный шрифт: NetflixSans-Bd.ttf")
-            except Exception as e:
-                print(f"✗ Ошибка при регистрации шрифта NetflixSans-Bd.ttf: {e}")
-        else:
-            print(f"✗ ОШИБКА: Файл {bold_font_path} не найден!")
+    def build_snapshot(self, build: Build) -> Dict[str, Any]:
+        """
+        Снимок данных сборки для верстки
         
-        # Если не найдены оба шрифта, выбрасываем исключение
-        if not regular_font or not bold_font:
-            raise FileNotFoundError(
-                f"Шрифты NetflixSans не найдены в папке {self.fonts_dir}. "
-                f"Убедитесь, что файлы NetflixSans-Rg.ttf и NetflixSans-Bd.ttf существуют."
-            )
+        Содержит только простые типы, поэтому передается в процесс пула
+        и не требует доступа к сессии БД.
         
-        print(f"\n📝 Итог: regular={regular_font}, bold={bold_font}\n")
-        return regular_font, bold_font
+        Args:
+            build: Модель сборки с загруженными автором и компонентами
+        """
+        return {
+            "title": build.title,
+            "description": build.description,
+            "additional_info": build.additional_info,
+            "author_name": build.author.name if build.author else None,
+            "created_at": build.created_at.strftime('%d.%m.%Y %H:%M'),
+            "total_price": build.total_price or 0,
+            "average_rating": build.average_rating,
+            "ratings_count": build.ratings_count,
+            "views_count": build.views_count,
+            "components": [
+                {
+                    "id": component.id,
+                    "name": component.name,
+                    "price": component.price,
+                    "image": component.image,
+                    "category_name": self.CATEGORY_NAMES.get(component.category, component.category.value)
+                }
+                for component in build.components
+            ]
+        }
     
-    async def _download_image(self, url: str, session: aiohttp.ClientSession) -> Optional[io.BytesIO]:
-        """Загружает изображение по URL и возвращает BytesIO"""
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    return io.BytesIO(image_data)
-        except Exception as e:
-            print(f"Ошибка при загрузке изображения {url}: {e}")
-        return None
+    async def fetch_images(self, snapshot: Dict[str, Any]) -> Dict[int, bytes]:
+        """
+        Загрузить миниатюры изображений компонентов до верстки
+        
+        Изображения загружаются параллельно (не больше image_concurrency
+        одновременно, каждое с таймаутом image_timeout), одинаковые URL
+        загружаются один раз.
+        
+        Args:
+            snapshot: Снимок сборки (build_snapshot)
+            
+        Returns:
+            Словарь ID компонента -> байты JPEG (только успешно загруженные)
+        """
+        urls = list(dict.fromkeys(c["image"] for c in snapshot["components"] if c["image"]))
+        if not urls:
+            return {}
+        
+        semaphore = asyncio.Semaphore(self.image_concurrency)
+        thumbnails = await asyncio.gather(*(self._get_thumbnail(url, semaphore) for url in urls))
+        by_url = dict(zip(urls, thumbnails))
+        
+        return {
+            c["id"]: by_url[c["image"]]
+            for c in snapshot["components"]
+            if c["image"] and by_url[c["image"]]
+        }
     
-    async def create_build_pdf(self, build: Build, output: io.BytesIO) -> None:
+    async def create_build_pdf(self, build: Build, output: BinaryIO) -> None:
         """
         Создает PDF файл со сборкой
         
+        Изображения загружаются асинхронно, затем верстка (ReportLab и PIL)
+        выполняется в пуле процессов, чтобы не блокировать event loop.
+        
         Args:
             build: Модель сборки с загруженными компонентами
-            output: BytesIO объект для записи PDF
+            output: Файловый объект для записи PDF
+            
+        Raises:
+            PDFRenderBusyError: Если очередь пула верстки переполнена
+        """
+        snapshot = self.build_snapshot(build)
+        images = await self.fetch_images(snapshot)
+        
+        args = (self.site_name, self.fonts_dir, self.logo_path, snapshot, images)
+        if self.render_pool:
+            pdf_bytes = await self.render_pool.run(_render_in_worker, *args)
+        else:
+            pdf_bytes = await asyncio.to_thread(_render_in_worker, *args)
+        
+        output.write(pdf_bytes)
+        output.seek(0)
+    
+    def render(self, snapshot: Dict[str, Any], images: Dict[int, bytes]) -> bytes:
+        """
+        Сверстать PDF по снимку сборки (синхронно, нагружает CPU)
+        
+        Args:
+            snapshot: Снимок сборки (build_snapshot)
+            images: Загруженные изображения компонентов
+            
+        Returns:
+            Содержимое PDF
         """
-        # Регистрируем шрифты с поддержкой кириллицы
-        regular_font, bold_font = self._register_cyrillic_font()
+        output = io.BytesIO()
+        
+        # Шрифты, стили и логотип загружаются один раз на процесс
+        assets = get_pdf_assets(self.fonts_dir, self.logo_path)
+        bold_font = assets.bold_font
         
         # Создаем документ
         doc = SimpleDocTemplate(
@@ -144,126 +246,20 @@ class PDFGenerator:
         )
         
         # Стили
-        styles = getSampleStyleSheet()
-        
-        # Настраиваем стили с кириллическими шрифтами и уменьшенным межбуквенным интервалом
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=26,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=14,
-            alignment=TA_LEFT,
-            fontName=bold_font,
-            leading=30,
-            wordWrap='CJK'  # Правильный перенос слов
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1e3a8a'),
-            spaceAfter=6,
-            spaceBefore=10,
-            fontName=bold_font,
-            leading=16,
-            wordWrap='CJK'
-        )
-        
-        stats_header_style = ParagraphStyle(
-            'StatsHeader',
-            parent=heading_style,
-            textColor=colors.white,
-            alignment=TA_CENTER
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#1f2937'),
-            alignment=TA_JUSTIFY,
-            spaceAfter=5,
-            fontName=regular_font,
-            leading=12,
-            wordWrap='CJK'
-        )
-        
-        info_style = ParagraphStyle(
-            'InfoStyle',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor('#4b5563'),
-            spaceAfter=3,
-            fontName=regular_font,
-            leading=11,
-            wordWrap='CJK'
-        )
-        
-        # Стиль для таблиц
-        table_text_style = ParagraphStyle(
-            'TableText',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor('#1f2937'),
-            fontName=regular_font,
-            leading=11,
-            wordWrap='CJK'
-        )
-        
-        table_header_style = ParagraphStyle(
-            'TableHeader',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.white,
-            fontName=bold_font,
-            leading=12,
-            alignment=TA_CENTER,
-            wordWrap='CJK'
-        )
+        styles = assets.styles
+        title_style = styles['title']
+        heading_style = styles['heading']
+        stats_header_style = styles['stats_header']
+        normal_style = styles['normal']
+        info_style = styles['info']
+        table_text_style = styles['table_text']
+        table_header_style = styles['table_header']
         
         # Список элементов для PDF
         story = []
         
         # Заголовок с логотипом (если есть) или название сайта - красивый дизайн
-        logo_image = None
-        if self.logo_path and os.path.exists(self.logo_path):
-            try:
-                pil_logo = PILImage.open(self.logo_path)
-                # Конвертируем RGBA в RGB если нужно
-                if pil_logo.mode == 'RGBA':
-                    rgb_logo = PILImage.new('RGB', pil_logo.size, (255, 255, 255))
-                    rgb_logo.paste(pil_logo, mask=pil_logo.split()[3])
-                    pil_logo = rgb_logo
-                
-                # Изменяем размер логотипа (максимальная высота 40mm)
-                logo_max_height = 40*mm
-                img_width, img_height = pil_logo.size
-                
-                # Вычисляем размеры для PDF (предполагаем 96 DPI: 1 пиксель ≈ 0.264583 мм)
-                pixels_per_mm = 96 / 25.4
-                img_height_mm = img_height / pixels_per_mm
-                
-                # Если логотип больше максимальной высоты, уменьшаем
-                if img_height_mm > logo_max_height:
-                    ratio = logo_max_height / img_height_mm
-                    logo_height_mm = logo_max_height
-                    logo_width_mm = (img_width / pixels_per_mm) * ratio
-                    new_width_px = int(img_width * ratio)
-                    new_height_px = int(img_height * ratio)
-                    pil_logo = pil_logo.resize((new_width_px, new_height_px), PILImage.Resampling.LANCZOS)
-                else:
-                    logo_height_mm = img_height_mm
-                    logo_width_mm = img_width / pixels_per_mm
-                
-                logo_buffer = io.BytesIO()
-                pil_logo.save(logo_buffer, format='PNG')
-                logo_buffer.seek(0)
-                logo_image = Image(logo_buffer, width=logo_width_mm, height=logo_height_mm)
-            except Exception as e:
-                print(f"Ошибка при загрузке логотипа {self.logo_path}: {e}")
-                logo_image = None
+        logo_image = assets.logo_image()
         
         # Формируем заголовок с логотипом и названием
         if logo_image:
@@ -286,19 +282,19 @@ class PDFGenerator:
         story.append(Spacer(1, 8*mm))
         
         # Название сборки
-        story.append(Paragraph(f"<b>{build.title}</b>", title_style))
+        story.append(Paragraph(f"<b>{snapshot['title']}</b>", title_style))
         story.append(Spacer(1, 6*mm))
         
         # Информация об авторе и дате - красивый блок
-        author_info = f"Автор: {build.author.name if build.author else 'Неизвестно'}"
-        date_info = f"Дата создания: {build.created_at.strftime('%d.%m.%Y %H:%M')}"
+        author_info = f"Автор: {snapshot['author_name'] or 'Неизвестно'}"
+        date_info = f"Дата создания: {snapshot['created_at']}"
         
         table_width = A4[0] - 40*mm
         info_data = [
             [
-                Paragraph("👤", ParagraphStyle('Icon', parent=info_style, fontSize=12)),
+                Paragraph("👤", styles['icon']),
                 Paragraph(author_info, info_style),
-                Paragraph("📅", ParagraphStyle('Icon', parent=info_style, fontSize=12)),
+                Paragraph("📅", styles['icon']),
                 Paragraph(date_info, info_style)
             ]
         ]
@@ -322,7 +318,7 @@ class PDFGenerator:
         # Описание сборки - в красивом блоке
         desc_data = [
             [Paragraph("<b>Описание</b>", heading_style)],
-            [Paragraph(build.description, normal_style)]
+            [Paragraph(snapshot["description"], normal_style)]
         ]
         desc_table = Table(desc_data, colWidths=[A4[0] - 40*mm])
         desc_table.setStyle(TableStyle([
@@ -338,10 +334,10 @@ class PDFGenerator:
         story.append(Spacer(1, 6*mm))
         
         # Дополнительная информация (если есть) - в красивом блоке
-        if build.additional_info:
+        if snapshot["additional_info"]:
             add_info_data = [
                 [Paragraph("<b>Дополнительная информация</b>", heading_style)],
-                [Paragraph(build.additional_info, normal_style)]
+                [Paragraph(snapshot["additional_info"], normal_style)]
             ]
             add_info_table = Table(add_info_data, colWidths=[A4[0] - 40*mm])
             add_info_table.setStyle(TableStyle([
@@ -360,148 +356,120 @@ class PDFGenerator:
         story.append(Paragraph("Комплектующие", heading_style))
         story.append(Spacer(1, 4*mm))
     
-        if build.components:
-            # Создаем сессию для загрузки изображений
-            async with aiohttp.ClientSession() as session:
-                # Группируем компоненты по категориям
-                components_by_category = {}
-                for component in build.components:
-                    category_name = self.CATEGORY_NAMES.get(component.category, component.category.value)
-                    if category_name not in components_by_category:
-                        components_by_category[category_name] = []
-                    components_by_category[category_name].append(component)
-                
-                table_width = A4[0] - 40*mm
-                image_size = 25*mm  # Уменьшенный размер изображений
-                
-                # Подготавливаем данные для таблицы
-                table_data = []
-                # Заголовок таблицы
-                table_data.append([
-                    Paragraph("<b>Категория</b>", table_header_style),
-                    Paragraph("<b>Изображение</b>", table_header_style),
-                    Paragraph("<b>Название</b>", table_header_style),
-                    Paragraph("<b>Цена</b>", table_header_style)
-                ])
-                
-                # Загружаем изображения для всех компонентов
-                component_images = {}
-                for category_name, components in sorted(components_by_category.items()):
-                    for component in components:
-                        component_image = None
-                        
-                        if component.image:
-                            image_bytes = await self._download_image(component.image, session)
-                            if image_bytes:
-                                try:
-                                    pil_image = PILImage.open(image_bytes)
-                                    img_width, img_height = pil_image.size
-                                    max_size_px = 120  # Уменьшено с 200
-                                    
-                                    if img_width > max_size_px or img_height > max_size_px:
-                                        ratio = min(max_size_px / img_width, max_size_px / img_height)
-                                        new_width = int(img_width * ratio)
-                                        new_height = int(img_height * ratio)
-                                        pil_image = pil_image.resize((new_width, new_height), PILImage.Resampling.LANCZOS)
-                                    
-                                    img_buffer = io.BytesIO()
-                                    if pil_image.mode == 'RGBA':
-                                        rgb_image = PILImage.new('RGB', pil_image.size, (255, 255, 255))
-                                        rgb_image.paste(pil_image, mask=pil_image.split()[3])
-                                        pil_image = rgb_image
-                                    pil_image.save(img_buffer, format='PNG')
-                                    img_buffer.seek(0)
-                                    component_image = Image(img_buffer, width=image_size, height=image_size)
-                                except Exception as e:
-                                    print(f"Ошибка при обработке изображения {component.image}: {e}")
-                        
-                        if component_image is None:
-                            placeholder = PILImage.new('RGB', (120, 120), color=(245, 245, 245))
-                            placeholder_bytes = io.BytesIO()
-                            placeholder.save(placeholder_bytes, format='PNG')
-                            placeholder_bytes.seek(0)
-                            component_image = Image(placeholder_bytes, width=image_size, height=image_size)
-                        
-                        component_images[component.id] = component_image
-                
-                # Заполняем таблицу данными
-                for category_name, components in sorted(components_by_category.items()):
-                    for idx, component in enumerate(components):
-                        # Объединяем ячейку категории для всех компонентов одной категории
-                        category_cell = Paragraph(category_name, table_text_style) if idx == 0 else ''
-                        
-                        component_name = Paragraph(component.name, table_text_style)
-                        price_text = f"{component.price:,} ₽" if component.price else "Не указана"
-                        price_cell = Paragraph(price_text, table_text_style)
-                        
-                        table_data.append([
-                            category_cell,
-                            component_images[component.id],
-                            component_name,
-                            price_cell
-                        ])
-                
-                # Создаем таблицу
-                category_col_width = 40*mm
-                image_col_width = 30*mm
-                name_col_width = table_width - category_col_width - image_col_width - 35*mm
-                price_col_width = 35*mm
-                
-                components_table = Table(
-                    table_data,
-                    colWidths=[category_col_width, image_col_width, name_col_width, price_col_width],
-                    repeatRows=1  # Повторять заголовок на каждой странице
-                )
-                
-                # Красивый стиль таблицы
-                components_table.setStyle(TableStyle([
-                    # Заголовок
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), bold_font),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                    ('TOPPADDING', (0, 0), (-1, 0), 8),
+        if snapshot["components"]:
+            # Группируем компоненты по категориям
+            components_by_category = {}
+            for component in snapshot["components"]:
+                category_name = component["category_name"]
+                if category_name not in components_by_category:
+                    components_by_category[category_name] = []
+                components_by_category[category_name].append(component)
+            
+            table_width = A4[0] - 40*mm
+            image_size = 25*mm  # Уменьшенный размер изображений
+            
+            # Подготавливаем данные для таблицы
+            table_data = []
+            # Заголовок таблицы
+            table_data.append([
+                Paragraph("<b>Категория</b>", table_header_style),
+                Paragraph("<b>Изображение</b>", table_header_style),
+                Paragraph("<b>Название</b>", table_header_style),
+                Paragraph("<b>Цена</b>", table_header_style)
+            ])
+            
+            # Изображения для всех компонентов
+            component_images = {}
+            for category_name, components in sorted(components_by_category.items()):
+                for component in components:
+                    component_image = None
                     
-                    # Границы
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
-                    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#1e3a8a')),
+                    image_bytes = images.get(component["id"])
+                    if image_bytes:
+                        try:
+                            # Миниатюры уже уменьшены при загрузке, встраиваем как есть
+                            component_image = Image(io.BytesIO(image_bytes), width=image_size, height=image_size)
+                        except Exception as e:
+                            logger.warning(f"Ошибка при обработке изображения {component['image']}: {e!r}")
                     
-                    # Чередование фона строк
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+                    if component_image is None:
+                        component_image = assets.placeholder_image(image_size)
                     
-                    # Выравнивание и отступы
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Категория
-                    ('ALIGN', (1, 1), (1, -1), 'CENTER'),  # Изображение
-                    ('ALIGN', (2, 1), (2, -1), 'LEFT'),    # Название
-                    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),   # Цена
+                    component_images[component["id"]] = component_image
+            
+            # Заполняем таблицу данными
+            for category_name, components in sorted(components_by_category.items()):
+                for idx, component in enumerate(components):
+                    # Объединяем ячейку категории для всех компонентов одной категории
+                    category_cell = Paragraph(category_name, table_text_style) if idx == 0 else ''
                     
-                    ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                    ('TOPPADDING', (0, 1), (-1, -1), 5),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+                    component_name = Paragraph(component["name"], table_text_style)
+                    price_text = f"{component['price']:,} ₽" if component['price'] else "Не указана"
+                    price_cell = Paragraph(price_text, table_text_style)
                     
-                    # Минимальная высота строк
-                    ('MINIMUMHEIGHT', (0, 1), (-1, -1), 30*mm),
-                ]))
+                    table_data.append([
+                        category_cell,
+                        component_images[component["id"]],
+                        component_name,
+                        price_cell
+                    ])
+            
+            # Создаем таблицу
+            category_col_width = 40*mm
+            image_col_width = 30*mm
+            name_col_width = table_width - category_col_width - image_col_width - 35*mm
+            price_col_width = 35*mm
+            
+            components_table = Table(
+                table_data,
+                colWidths=[category_col_width, image_col_width, name_col_width, price_col_width],
+                repeatRows=1  # Повторять заголовок на каждой странице
+            )
+            
+            # Красивый стиль таблицы
+            components_table.setStyle(TableStyle([
+                # Заголовок
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), bold_font),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+                ('TOPPADDING', (0, 0), (-1, 0), 8),
+                
+                # Границы
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+                ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#1e3a8a')),
+                
+                # Чередование фона строк
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
                 
-                story.append(components_table)
-                story.append(Spacer(1, 5*mm))
+                # Выравнивание и отступы
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Категория
+                ('ALIGN', (1, 1), (1, -1), 'CENTER'),  # Изображение
+                ('ALIGN', (2, 1), (2, -1), 'LEFT'),    # Название
+                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),   # Цена
+                
+                ('LEFTPADDING', (0, 0), (-1, -1), 6),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+                ('TOPPADDING', (0, 1), (-1, -1), 5),
+                ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+                
+                # Минимальная высота строк
+                ('MINIMUMHEIGHT', (0, 1), (-1, -1), 30*mm),
+            ]))
+            
+            story.append(components_table)
+            story.append(Spacer(1, 5*mm))
         
         # Итоговая стоимость - красивый блок
-        if build.total_price > 0:
+        if snapshot["total_price"] > 0:
             story.append(Spacer(1, 6*mm))
             table_width = A4[0] - 40*mm
             
             total_text = Paragraph("<b>Итоговая стоимость сборки</b>", heading_style)
-            total_price_text = Paragraph(f"<b>{build.total_price:,.0f} ₽</b>", ParagraphStyle(
-                'TotalPrice',
-                parent=heading_style,
-                fontSize=20,
-                textColor=colors.HexColor('#059669')
-            ))
+            total_price_text = Paragraph(f"<b>{snapshot['total_price']:,.0f} ₽</b>", styles['total_price'])
             
             total_data = [
                 [total_text, total_price_text]
@@ -532,13 +500,13 @@ class PDFGenerator:
             ],
             [
                 Paragraph("Средний рейтинг", info_style),
-                Paragraph(f"<b>{build.average_rating:.1f}</b>", table_text_style),
+                Paragraph(f"<b>{snapshot['average_rating']:.1f}</b>", table_text_style),
                 Paragraph("Количество оценок", info_style),
-                Paragraph(f"<b>{build.ratings_count}</b>", table_text_style)
+                Paragraph(f"<b>{snapshot['ratings_count']}</b>", table_text_style)
             ],
             [
                 Paragraph("Просмотров", info_style),
-                Paragraph(f"<b>{build.views_count}</b>", table_text_style),
+                Paragraph(f"<b>{snapshot['views_count']}</b>", table_text_style),
                 '',
                 ''
             ]
@@ -575,9 +543,10 @@ class PDFGenerator:
         
         # Футер
         story.append(Spacer(1, 10*mm))
-        footer = Paragraph(f"<i>Сгенерировано {build.created_at.strftime('%d.%m.%Y %H:%M')} | {self.site_name}</i>", info_style)
+        footer = Paragraph(f"<i>Сгенерировано {snapshot['created_at']} | {self.site_name}</i>", info_style)
         story.append(footer)
         
         # Собираем PDF
         doc.build(story)
+        return output.getvalue()
 
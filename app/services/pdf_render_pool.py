@@ -0,0 +1,105 @@
+"""
+Пул процессов для верстки PDF (ReportLab и PIL нагружают CPU и держат GIL)
+"""
+import asyncio
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from prometheus_client import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_SECONDS = Histogram(
+    "build_pdf_render_seconds",
+    "Время верстки PDF сборки в пуле процессов (с учетом ожидания в очереди)",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+PDF_RENDER_IN_FLIGHT = Gauge(
+    "build_pdf_render_in_flight",
+    "Количество PDF, которые верстаются или ждут свободного процесса"
+)
+
+
+class PDFRenderBusyError(RuntimeError):
+    """Очередь верстки PDF заполнена"""
+
+
+class PDFRenderPool:
+    """Ограниченный пул процессов для верстки PDF
+
+    Одновременно принимается не больше max_workers + max_queue задач:
+    при переполнении запрос сразу отклоняется, а не копит очередь
+    и память в воркерах API.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        initializer: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            max_workers: Количество процессов
+            max_queue: Сколько задач может ждать свободного процесса
+            initializer: Функция, выполняемая при старте каждого процесса
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        """Максимальное количество принятых задач (в работе и в очереди)"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Процессы создаются при первой верстке, а не при старте приложения
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=self.initializer
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполнить функцию в пуле процессов
+
+        Args:
+            func: Функция уровня модуля (должна сериализоваться pickle)
+            args: Аргументы функции (простые типы)
+
+        Returns:
+            Результат функции
+
+        Raises:
+            PDFRenderBusyError: Если очередь заполнена
+        """
+        if self._in_flight >= self.capacity:
+            raise PDFRenderBusyError("Очередь генерации PDF заполнена")
+
+        self._in_flight += 1
+        PDF_RENDER_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            PDF_RENDER_SECONDS.observe(time.perf_counter() - started)
+            self._in_flight -= 1
+            PDF_RENDER_IN_FLIGHT.dec()
+
+    def shutdown(self) -> None:
+        """Остановить процессы пула"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Пул верстки PDF остановлен")
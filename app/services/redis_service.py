@@ -3,7 +3,8 @@
 """
 import json
 import asyncio
-from typing import Optional, Any, Dict
+from contextlib import asynccontextmanager
+from typing import Optional, Any, Dict, AsyncIterator, Iterable, List, Set
 from datetime import datetime, timedelta
 import redis.asyncio as redis
 from app.config import settings
@@ -96,6 +97,153 @@ class RedisService:
             logger.error(f"Ошибка при чтении из Redis: {e}")
             return None
     
+    async def get_raw(self, key: str) -> Optional[str]:
+        """
+        Получить значение из Redis без десериализации
+        
+        Args:
+            key: Ключ
+            
+        Returns:
+            Строка или None если не найдено
+        """
+        try:
+            redis_client = await self.get_connection()
+            return await redis_client.get(key)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении из Redis: {e}")
+            return None
+    
+    async def set_raw(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """
+        Установить уже сериализованное значение в Redis
+        
+        Args:
+            key: Ключ
+            value: Строковое значение
+            ttl: Время жизни в секундах
+            
+        Returns:
+            bool: True если успешно
+        """
+        try:
+            redis_client = await self.get_connection()
+            return bool(await redis_client.set(key, value, ex=ttl))
+        except Exception as e:
+            logger.error(f"Ошибка при записи в Redis: {e}")
+            return False
+    
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """
+        Атомарно увеличить счетчик в Redis
+        
+        Args:
+            key: Ключ счетчика
+            amount: Величина увеличения
+            
+        Returns:
+            Новое значение или None при ошибке
+        """
+        try:
+            redis_client = await self.get_connection()
+            return await redis_client.incrby(key, amount)
+        except Exception as e:
+            logger.error(f"Ошибка при увеличении счетчика в Redis: {e}")
+            return None
+    
+    async def set_nx(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        """
+        Установить значение, только если ключа еще нет (SET NX EX)
+        
+        Args:
+            key: Ключ
+            value: Строковое значение
+            ttl: Время жизни в секундах
+            
+        Returns:
+            bool: True если ключ был установлен этим вызовом
+        """
+        try:
+            redis_client = await self.get_connection()
+            return bool(await redis_client.set(key, value, ex=ttl, nx=True))
+        except Exception as e:
+            logger.error(f"Ошибка при записи в Redis: {e}")
+            return False
+    
+    async def rename(self, key: str, new_key: str) -> bool:
+        """
+        Переименовать ключ (атомарно)
+        
+        Args:
+            key: Текущий ключ
+            new_key: Новый ключ
+            
+        Returns:
+            bool: True если ключ был переименован, False если его нет
+        """
+        try:
+            redis_client = await self.get_connection()
+            return bool(await redis_client.rename(key, new_key))
+        except redis.ResponseError:
+            # Исходного ключа нет
+            return False
+        except Exception as e:
+            logger.error(f"Ошибка при переименовании ключа в Redis: {e}")
+            return False
+    
+    async def publish(self, channel: str, message: str) -> bool:
+        """
+        Опубликовать сообщение в канал (pub/sub)
+        
+        Args:
+            channel: Канал
+            message: Строковое сообщение
+            
+        Returns:
+            bool: True если сообщение отправлено
+        """
+        try:
+            redis_client = await self.get_connection()
+            await redis_client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при публикации в Redis: {e}")
+            return False
+    
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[AsyncIterator[str]]:
+        """
+        Подписаться на канал (pub/sub)
+        
+        Ошибки соединения не перехватываются: вызывающий код сам решает,
+        когда переподписаться.
+        
+        Args:
+            channel: Канал
+            
+        Yields:
+            Асинхронный итератор сообщений канала
+        """
+        redis_client = await self.get_connection()
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        
+        async def messages() -> AsyncIterator[str]:
+            while True:
+                # Короткий таймаут ожидания, чтобы не упираться в socket_timeout соединения
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "message":
+                    yield message["data"]
+        
+        try:
+            yield messages()
+        finally:
+            try:
+                await pubsub.unsubscribe(channel)
+            except Exception:
+                pass
+            await pubsub.aclose()
+    
     async def delete(self, key: str) -> bool:
         """
         Удалить ключ из Redis
@@ -186,6 +334,45 @@ class RedisService:
             logger.error(f"Ошибка при чтении хеша из Redis: {e}")
             return None
     
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> Optional[int]:
+        """
+        Атомарно увеличить числовое поле хеша
+        
+        Args:
+            key: Ключ хеша
+            field: Поле
+            amount: Величина увеличения
+            
+        Returns:
+            Новое значение поля или None при ошибке
+        """
+        try:
+            redis_client = await self.get_connection()
+            return await redis_client.hincrby(key, field, amount)
+        except Exception as e:
+            logger.error(f"Ошибка при увеличении поля хеша в Redis: {e}")
+            return None
+    
+    async def hmget(self, key: str, fields: list[str]) -> list[Optional[str]]:
+        """
+        Получить несколько полей хеша за один запрос
+        
+        Args:
+            key: Ключ хеша
+            fields: Список полей
+            
+        Returns:
+            Список значений (None для отсутствующих полей)
+        """
+        if not fields:
+            return []
+        try:
+            redis_client = await self.get_connection()
+            return await redis_client.hmget(key, fields)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении хеша из Redis: {e}")
+            return [None] * len(fields)
+    
     async def delete_hash_field(self, key: str, field: str) -> bool:
         """
         Удалить поле из хеша в Redis
@@ -205,6 +392,211 @@ class RedisService:
             logger.error(f"Ошибка при удалении поля из хеша в Redis: {e}")
             return False
     
+    async def smembers_many(self, keys: List[str]) -> Optional[List[Set[str]]]:
+        """
+        Получить элементы нескольких множеств за один запрос (pipeline)
+        
+        Args:
+            keys: Ключи множеств
+            
+        Returns:
+            Список множеств в порядке ключей (пустое для отсутствующих) или None при ошибке
+        """
+        if not keys:
+            return []
+        try:
+            redis_client = await self.get_connection()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.smembers(key)
+                return [set(members) for members in await pipe.execute()]
+        except Exception as e:
+            logger.error(f"Ошибка при чтении множеств из Redis: {e}")
+            return None
+    
+    async def scard_many(self, keys: List[str]) -> Optional[List[int]]:
+        """
+        Получить размеры нескольких множеств за один запрос (pipeline)
+        
+        Args:
+            keys: Ключи множеств
+            
+        Returns:
+            Список размеров в порядке ключей или None при ошибке
+        """
+        if not keys:
+            return []
+        try:
+            redis_client = await self.get_connection()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.scard(key)
+                return list(await pipe.execute())
+        except Exception as e:
+            logger.error(f"Ошибка при чтении размеров множеств из Redis: {e}")
+            return None
+    
+    async def update_sets(
+        self,
+        add: Optional[Dict[str, Iterable[str]]] = None,
+        remove: Optional[Dict[str, Iterable[str]]] = None,
+        delete: Iterable[str] = ()
+    ) -> bool:
+        """
+        Атомарно изменить несколько множеств (MULTI/EXEC)
+        
+        Сначала удаляются ключи из delete, затем элементы из remove,
+        затем добавляются элементы из add.
+        
+        Args:
+            add: Ключ -> элементы для SADD
+            remove: Ключ -> элементы для SREM
+            delete: Ключи для удаления
+            
+        Returns:
+            bool: True если изменения применены
+        """
+        try:
+            redis_client = await self.get_connection()
+            async with redis_client.pipeline(transaction=True) as pipe:
+                delete = list(delete)
+                if delete:
+                    pipe.delete(*delete)
+                for key, members in (remove or {}).items():
+                    members = list(members)
+                    if members:
+                        pipe.srem(key, *members)
+                for key, members in (add or {}).items():
+                    members = list(members)
+                    if members:
+                        pipe.sadd(key, *members)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при изменении множеств в Redis: {e}")
+            return False
+    
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> bool:
+        """
+        Добавить элементы в упорядоченное множество (или обновить их вес)
+        
+        Args:
+            key: Ключ множества
+            mapping: Элемент -> вес
+            
+        Returns:
+            bool: True если команда выполнена
+        """
+        if not mapping:
+            return True
+        try:
+            redis_client = await self.get_connection()
+            await redis_client.zadd(key, mapping)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при записи в упорядоченное множество Redis: {e}")
+            return False
+    
+    async def zrem(self, key: str, *members: str) -> bool:
+        """
+        Удалить элементы из упорядоченного множества
+        
+        Args:
+            key: Ключ множества
+            members: Элементы
+            
+        Returns:
+            bool: True если команда выполнена
+        """
+        if not members:
+            return True
+        try:
+            redis_client = await self.get_connection()
+            await redis_client.zrem(key, *members)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при удалении из упорядоченного множества Redis: {e}")
+            return False
+    
+    async def zrevrange(self, key: str, start: int, stop: int) -> Optional[List[str]]:
+        """
+        Получить элементы упорядоченного множества по убыванию веса
+        
+        Args:
+            key: Ключ множества
+            start: Начальная позиция (с 0)
+            stop: Конечная позиция включительно
+            
+        Returns:
+            Список элементов или None при ошибке
+        """
+        try:
+            redis_client = await self.get_connection()
+            return await redis_client.zrevrange(key, start, stop)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении упорядоченного множества Redis: {e}")
+            return None
+    
+    async def zincrby(self, key: str, amount: float, member: str) -> Optional[float]:
+        """
+        Увеличить вес элемента упорядоченного множества
+        
+        Args:
+            key: Ключ множества
+            amount: Приращение веса
+            member: Элемент
+            
+        Returns:
+            Новый вес или None при ошибке
+        """
+        try:
+            redis_client = await self.get_connection()
+            return float(await redis_client.zincrby(key, amount, member))
+        except Exception as e:
+            logger.error(f"Ошибка при записи в упорядоченное множество Redis: {e}")
+            return None
+    
+    async def zcard(self, key: str) -> Optional[int]:
+        """
+        Получить количество элементов упорядоченного множества
+        
+        Args:
+            key: Ключ множества
+            
+        Returns:
+            Количество элементов или None при ошибке
+        """
+        try:
+            redis_client = await self.get_connection()
+            return await redis_client.zcard(key)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении упорядоченного множества Redis: {e}")
+            return None
+    
+    async def zscale(self, key: str, factor: float, min_score: Optional[float] = None) -> bool:
+        """
+        Умножить веса всех элементов упорядоченного множества (атомарно)
+        
+        Args:
+            key: Ключ множества
+            factor: Множитель
+            min_score: Элементы с весом меньше этого после умножения удаляются
+            
+        Returns:
+            bool: True если транзакция выполнена
+        """
+        try:
+            redis_client = await self.get_connection()
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.zunionstore(key, {key: factor})
+            if min_score is not None:
+                pipe.zremrangebyscore(key, "-inf", f"({min_score}")
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при масштабировании упорядоченного множества Redis: {e}")
+            return False
+    
     async def get_keys(self, pattern: str = "*") -> list[str]:
         """
         Получить список ключей по паттерну
@@ -0,0 +1,67 @@
+"""
+Кеш готовых ответов API в Redis с инвалидацией по версиям
+"""
+from typing import Optional
+import logging
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Пространства имен кеша (у каждого свой счетчик версии)
+BUILDS_NAMESPACE = "builds"
+
+# Страховочное время жизни записей: устаревшие версии удаляет сам Redis
+RESPONSE_CACHE_TTL = 600
+
+
+class ResponseCache:
+    """Кеш сериализованных ответов
+
+    Ключ записи включает текущую версию пространства имен, поэтому
+    инвалидация — это один INCR счетчика версии: старые записи больше
+    не читаются и истекают по TTL.
+    """
+
+    def __init__(self, redis_service: RedisService):
+        self.redis_service = redis_service
+
+    @staticmethod
+    def _version_key(namespace: str) -> str:
+        return f"response_cache_version:{namespace}"
+
+    async def _get_version(self, namespace: str) -> int:
+        version = await self.redis_service.get_raw(self._version_key(namespace))
+        return int(version) if version else 0
+
+    async def key(self, namespace: str, name: str) -> str:
+        """
+        Получить ключ записи для текущей версии пространства имен
+
+        Ключ вычисляется до чтения данных из БД: если инвалидация произойдет
+        во время вычисления ответа, он сохранится под уже неактуальной версией.
+
+        Args:
+            namespace: Пространство имен (BUILDS_NAMESPACE)
+            name: Имя ответа с параметрами (например, "similar:1:6")
+        """
+        version = await self._get_version(namespace)
+        return f"response_cache:{namespace}:v{version}:{name}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """Получить сериализованный ответ (JSON) или None"""
+        return await self.redis_service.get_raw(key)
+
+    async def set(self, key: str, payload: str, ttl: int = RESPONSE_CACHE_TTL) -> bool:
+        """Сохранить сериализованный ответ (JSON)"""
+        return await self.redis_service.set_raw(key, payload, ttl=ttl)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """
+        Инвалидировать все ответы пространств имен (O(1) на пространство)
+
+        Args:
+            namespaces: Пространства имен для инвалидации
+        """
+        for namespace in namespaces:
+            if await self.redis_service.incr(self._version_key(namespace)) is None:
+                logger.warning(f"Не удалось инвалидировать кеш ответов '{namespace}'")
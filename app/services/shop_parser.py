@@ -5,9 +5,11 @@ Shop Parser - Парсер товаров с сайта на aiohttp и Beautifu
 
 import aiohttp
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from enum import Enum
 import asyncio
+import random
 import re
 import urllib.parse
 import logging
@@ -22,6 +24,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Ограничения обхода магазина: запросов в секунду к одному хосту и допустимый всплеск
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 4
+# Повторы при сетевых ошибках, 429 и 5xx: экспоненциальная задержка с джиттером
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 15.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PageFetchError(Exception):
+    """Страница списка не загрузилась после всех повторов
+    
+    Список товаров без этой страницы был бы неполным, поэтому ошибка не
+    превращается в пустую страницу (которая означает конец списка).
+    """
+    
+    def __init__(self, url: str):
+        super().__init__(f"Не удалось загрузить страницу {url}")
+        self.url = url
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов (token bucket)
+    
+    Токены пополняются со скоростью rate в секунду, но не больше capacity.
+    Каждый запрос забирает один токен, а при пустом ведре ждет следующего;
+    ожидающие обслуживаются в порядке очереди.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Дождаться и забрать токен"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CrawlScheduler:
+    """Планировщик запросов парсера
+    
+    Не больше max_concurrent запросов одновременно и не чаще rate
+    запросов в секунду к каждому хосту. Полный обход занимает около
+    (число страниц / rate) секунд, а не сумму задержек всех запросов.
+    """
+    
+    def __init__(self, max_concurrent: int, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._buckets: Dict[str, TokenBucket] = {}
+    
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Занять место для запроса к url"""
+        host = urllib.parse.urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        async with self._semaphore:
+            await bucket.acquire()
+            yield
+
 
 class ComponentsCategory(Enum):
     # Основные категории
@@ -47,7 +126,16 @@ class ComponentsCategory(Enum):
 class ShopParser:
     """Парсер товаров на aiohttp и BeautifulSoup"""
     
-    def __init__(self, timeout: int = 10, max_concurrent: int = 5, use_cache: bool = True, cache_dir: str = "cache"):
+    def __init__(
+        self,
+        timeout: int = 10,
+        max_concurrent: int = 5,
+        use_cache: bool = True,
+        cache_dir: str = "cache",
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES
+    ):
         """
         Инициализация парсера
         
@@ -56,10 +144,15 @@ class ShopParser:
             max_concurrent: Максимальное количество одновременных запросов
             use_cache: Использовать кеширование HTML в файлы
             cache_dir: Директория для сохранения кеша
+            rate: Максимум запросов в секунду к одному хосту
+            burst: Сколько запросов можно отправить подряд без ожидания
+            max_retries: Количество повторов запроса при временной ошибке
         """
         self.base_url = "https://28bit.ru"
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.scheduler = CrawlScheduler(max_concurrent, rate, burst)
         self.session: Optional[aiohttp.ClientSession] = None
         self.use_cache = use_cache
         self.cache_dir = cache_dir
@@ -163,12 +256,17 @@ class ShopParser:
         """
         Получает HTML страницы с использованием сохраненной сессии и cookies
         
+        Запросы проходят через планировщик (ограничение частоты и числа
+        одновременных запросов), временные ошибки повторяются с
+        экспоненциальной задержкой и джиттером.
+        
         Args:
             url: URL страницы
             force_refresh: Принудительно обновить кеш (игнорировать существующий)
             
         Returns:
-            HTML содержимое страницы или None при ошибке
+            HTML содержимое страницы (пустая строка, если страницы нет)
+            или None при ошибке
         """
         # Проверяем кеш перед запросом
         if self.use_cache and not force_refresh:
@@ -180,6 +278,47 @@ class ShopParser:
         if not self.session:
             await self._init_session()
         
+        html = None
+        for attempt in range(self.max_retries + 1):
+            async with self.scheduler.slot(url):
+                html, retry_after = await self._request(url)
+            if html is not None or retry_after is None:
+                break
+            if attempt < self.max_retries:
+                # Ждем вне планировщика, чтобы не занимать место других запросов
+                delay = max(retry_after, self._backoff_delay(attempt))
+                logger.warning(f"[Повтор] {url}: попытка {attempt + 2} из {self.max_retries + 1} через {delay:.1f} с")
+                await asyncio.sleep(delay)
+        
+        # Сохраняем в кеш
+        if html and self.use_cache:
+            cache_file = self._get_cache_filename(url)
+            self._save_to_cache(cache_file, html)
+        
+        return html
+    
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        """Задержка перед повтором: экспоненциальная с полным джиттером"""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> float:
+        """Задержка из заголовка Retry-After (в секундах), 0 если его нет"""
+        try:
+            return min(BACKOFF_MAX, float(response.headers.get('Retry-After', 0)))
+        except ValueError:
+            return 0.0
+    
+    async def _request(self, url: str) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Выполняет один запрос страницы
+        
+        Returns:
+            (HTML или None, минимальная задержка перед повтором или None,
+            если повторять запрос бессмысленно). Для несуществующей
+            страницы (404) HTML — пустая строка.
+        """
         try:
             # Извлекаем путь из URL (path + query)
             parsed_url = urllib.parse.urlparse(url)
@@ -204,33 +343,36 @@ class ShopParser:
                 if response.status == 200:
                     html = await response.text()
                     logger.info(f"[Инфо] Страница загружена: {url} (размер: {len(html)} символов)")
-                    
-                    # Сохраняем в кеш
-                    if self.use_cache:
-                        cache_file = self._get_cache_filename(url)
-                        self._save_to_cache(cache_file, html)
-                    
-                    return html
+                    return html, None
+                elif response.status == 404:
+                    # Страницы за концом списка: такой ответ — не ошибка
+                    logger.info(f"[Инфо] Страница не найдена: {url}")
+                    return "", None
                 elif response.status == 401:
                     error_body = await response.text()
                     logger.error(f"[Ошибка] 401 Unauthorized для {url}")
                     logger.error(f"[Диагностика] Заголовки ответа: {dict(response.headers)}")
                     logger.error(f"[Диагностика] Тело ответа (первые 1000 символов): {error_body[:1000]}")
-                    return None
+                    return None, None
                 else:
                     error_body = await response.text()
                     logger.warning(f"[Предупреждение] HTTP статус {response.status} для {url}")
                     logger.warning(f"[Диагностика] Тело ответа (первые 500 символов): {error_body[:500]}")
-                    return None
+                    if response.status in RETRY_STATUSES:
+                        return None, self._retry_after(response)
+                    return None, None
                     
         except asyncio.TimeoutError:
             logger.error(f"[Ошибка] Таймаут при загрузке {url}")
-            return None
+            return None, 0.0
+        except aiohttp.ClientError as e:
+            logger.error(f"[Ошибка] Сетевая ошибка при загрузке {url}: {e}")
+            return None, 0.0
         except Exception as e:
             logger.error(f"[Ошибка] Ошибка при загрузке {url}: {e}")
             import traceback
             logger.error(f"[Диагностика] Трассировка: {traceback.format_exc()}")
-            return None
+            return None, None
 
     async def _get_products_from_page(self, html: str) -> List[Dict[str, str]]:
         page_products = []
@@ -256,35 +398,79 @@ class ShopParser:
  
         return page_products
 
-    async def get_category(self, category: ComponentsCategory) -> List[Dict[str, str]]:
-        all_category_products = []
-        for base_url_path in category.get_urls(self.base_url):
-            page = 1
-            # Сохраняем исходный URL без параметров
-            base_url = base_url_path
-            
+    @staticmethod
+    def _page_url(base_url: str, page: int) -> str:
+        """URL страницы списка товаров"""
+        if '?' in base_url:
+            return f"{base_url}/&page={page}"
+        return f"{base_url}/?page={page}"
+    
+    async def _fetch_products(self, url: str) -> List[Dict[str, str]]:
+        """
+        Товары страницы
+        
+        Raises:
+            PageFetchError: Страница не загрузилась после всех повторов
+        """
+        html = await self.fetch_page(url)
+        if html is None:
+            raise PageFetchError(url)
+        if not html:
+            return []
+        return await self._get_products_from_page(html)
+    
+    async def _get_listing(self, base_url: str) -> List[Dict[str, str]]:
+        """
+        Все товары списка с постраничной навигацией
+        
+        Число страниц заранее неизвестно, поэтому страницы запрашиваются
+        с опережением: пока обрабатывается страница N, уже загружаются
+        следующие max_concurrent. Первая пустая страница означает конец
+        списка — запросы за ней отменяются.
+        
+        Raises:
+            PageFetchError: Страница списка не загрузилась (запросы
+                остальных страниц отменяются)
+        """
+        products: List[Dict[str, str]] = []
+        pending: Dict[int, asyncio.Task] = {}
+        page = 1
+        try:
             while True:
-                await asyncio.sleep(1)
-
-                if '?' in base_url:
-                    url = f"{base_url}/&page={page}"
-                else:
-                    url = f"{base_url}/?page={page}"
+                for number in range(page, page + max(1, self.max_concurrent)):
+                    if number not in pending:
+                        pending[number] = asyncio.create_task(
+                            self._fetch_products(self._page_url(base_url, number))
+                        )
                 
-                html = await self.fetch_page(url)
-
-                if not html:  # Добавляем проверку на None
-                    break
-                    
-                current_page_products = await self._get_products_from_page(html)
-
-                if not len(current_page_products):
+                page_products = await pending.pop(page)
+                if not page_products:
                     break
-
-                all_category_products.extend(current_page_products)
+                
+                products.extend(page_products)
                 page += 1
-
-        return all_category_products
+        finally:
+            for task in pending.values():
+                task.cancel()
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+        return products
+    
+    async def get_category(self, category: ComponentsCategory) -> List[Dict[str, str]]:
+        """
+        Получает все товары категории (списки категории загружаются параллельно)
+        
+        Raises:
+            PageFetchError: Страница не загрузилась — категория получена не полностью
+        """
+        tasks = [asyncio.create_task(self._get_listing(url)) for url in category.get_urls(self.base_url)]
+        try:
+            listings = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [product for listing in listings for product in listing]
 
     async def get_products_from_category(self, category_name: str | ComponentsCategory) -> List[Dict[str, str]]:
         """
@@ -295,6 +481,9 @@ class ShopParser:
             
         Returns:
             Список товаров
+            
+        Raises:
+            PageFetchError: Категория получена не полностью
         """
         # Определяем категорию (поддержка enum или строки)
         if isinstance(category_name, ComponentsCategory):
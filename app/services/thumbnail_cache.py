@@ -0,0 +1,130 @@
+"""
+Дисковый кеш уменьшенных изображений компонентов для PDF
+"""
+import io
+import os
+import glob
+import hashlib
+import tempfile
+import logging
+from typing import Optional
+from PIL import Image as PILImage
+
+logger = logging.getLogger(__name__)
+
+# Максимальная сторона миниатюры в пикселях (в PDF изображение занимает 25 мм)
+THUMBNAIL_MAX_SIZE = 120
+THUMBNAIL_JPEG_QUALITY = 85
+
+
+def make_thumbnail(data: bytes, max_size: int = THUMBNAIL_MAX_SIZE) -> bytes:
+    """
+    Уменьшить изображение и перекодировать в JPEG
+
+    Args:
+        data: Исходные байты изображения любого формата, поддерживаемого PIL
+        max_size: Максимальная сторона в пикселях
+
+    Returns:
+        Байты JPEG
+
+    Raises:
+        OSError: Если изображение не удалось прочитать
+    """
+    image = PILImage.open(io.BytesIO(data))
+    image.thumbnail((max_size, max_size), PILImage.Resampling.LANCZOS)
+
+    # JPEG без прозрачности: подкладываем белый фон
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = PILImage.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=THUMBNAIL_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+class ThumbnailCache:
+    """Кеш миниатюр на диске с ключом по URL изображения
+
+    Хранит уже уменьшенные JPEG, поэтому повторный экспорт популярных
+    сборок не делает сетевых запросов и не декодирует исходники.
+    Общий размер ограничен: при превышении удаляются давно не читавшиеся файлы.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def get(self, url: str) -> Optional[bytes]:
+        """
+        Получить миниатюру изображения
+
+        Args:
+            url: URL исходного изображения
+
+        Returns:
+            Байты JPEG или None, если миниатюры нет в кеше
+        """
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Время изменения файла — метка последнего использования для LRU
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def set(self, url: str, data: bytes) -> None:
+        """
+        Сохранить миниатюру изображения
+
+        Args:
+            url: URL исходного изображения
+            data: Байты JPEG
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, self._path(url))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удалить давно не использованные миниатюры, пока кеш превышает лимит"""
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.cache_dir, "*.jpg")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            logger.info(f"Миниатюра удалена из кеша по лимиту размера: {path}")
+            if total <= self.max_bytes:
+                break
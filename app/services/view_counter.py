@@ -0,0 +1,139 @@
+"""
+Буферизованный подсчет просмотров сборок (write-behind через Redis)
+"""
+import uuid
+from typing import Dict, List, Optional
+import logging
+from app.services.redis_service import RedisService
+from app.services.build_trending import BuildTrending
+
+logger = logging.getLogger(__name__)
+
+# Хеш build_id -> количество еще не записанных в БД просмотров
+PENDING_VIEWS_KEY = "build_views:pending"
+# Хеш, который в данный момент переносится в БД
+FLUSHING_VIEWS_KEY = "build_views:flushing"
+# Тот же хеш на время записи в БД (уже не учитывается в get_pending)
+APPLYING_VIEWS_KEY = "build_views:applying"
+# Токен переноса: записывается в БД в одной транзакции с приращениями
+FLUSH_TOKEN_KEY = "build_views:flush_token"
+# Блокировка переноса (одновременно переносит только один воркер)
+FLUSH_LOCK_KEY = "build_views:flush_lock"
+FLUSH_LOCK_TTL = 60
+
+# Окно, в течение которого повторный просмотр одного зрителя не засчитывается
+VIEW_DEDUPE_TTL = 300
+
+
+class ViewCounter:
+    """Счетчик просмотров с отложенной записью
+
+    Просмотр засчитывается в Redis (SET NX EX для дедупликации и HINCRBY
+    в общий хеш), а фоновая задача периодически переносит накопленные
+    приращения в builds.views_count одним пакетным UPDATE. Засчитанный
+    просмотр также учитывается в популярных сборках.
+    """
+
+    def __init__(self, redis_service: RedisService, trending: Optional[BuildTrending] = None):
+        self.redis_service = redis_service
+        self.trending = trending
+
+    async def record_view(self, build_id: int, viewer_key: str) -> bool:
+        """
+        Засчитать просмотр, если зритель не смотрел сборку в течение окна дедупликации
+
+        Args:
+            build_id: ID сборки
+            viewer_key: Идентификатор зрителя (user_<id> или IP)
+
+        Returns:
+            bool: True если просмотр засчитан в буфер
+        """
+        dedupe_key = f"build_view:{build_id}:{viewer_key}"
+        if not await self.redis_service.set_nx(dedupe_key, "1", ttl=VIEW_DEDUPE_TTL):
+            return False
+        if await self.redis_service.hincrby(PENDING_VIEWS_KEY, str(build_id), 1) is None:
+            return False
+        if self.trending:
+            await self.trending.record_view(build_id)
+        return True
+
+    async def get_pending(self, build_ids: List[int]) -> Dict[int, int]:
+        """
+        Получить еще не записанные в БД просмотры
+
+        Args:
+            build_ids: Список ID сборок
+
+        Returns:
+            Словарь build_id -> приращение (только ненулевые)
+        """
+        if not build_ids:
+            return {}
+        fields = [str(build_id) for build_id in build_ids]
+        pending: Dict[int, int] = {}
+        # Учитываем и буфер, который сейчас переносится в БД
+        for key in (PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY):
+            values = await self.redis_service.hmget(key, fields)
+            for build_id, value in zip(build_ids, values):
+                if value:
+                    pending[build_id] = pending.get(build_id, 0) + int(value)
+        return pending
+
+    async def flush(self, build_repo) -> int:
+        """
+        Перенести накопленные просмотры в БД
+
+        Буфер атомарно переименовывается, поэтому новые просмотры копятся
+        в новом хеше и не теряются. Перед записью в БД буфер переносится под
+        APPLYING_VIEWS_KEY, чтобы записанные приращения не учитывались
+        в get_pending повторно, а вместе с приращениями в БД записывается
+        токен переноса. Если запись не удалась, буфер возвращается под
+        FLUSHING_VIEWS_KEY; если процесс прервался после записи, при
+        следующем вызове перенос распознается по токену и не применяется
+        второй раз.
+
+        Args:
+            build_repo: Репозиторий сборок (BuildRepository)
+
+        Returns:
+            Количество обновленных сборок
+        """
+        if not await self.redis_service.set_nx(FLUSH_LOCK_KEY, "1", ttl=FLUSH_LOCK_TTL):
+            return 0
+        try:
+            if await self.redis_service.exists(APPLYING_VIEWS_KEY):
+                token = await self.redis_service.get_raw(FLUSH_TOKEN_KEY)
+                if token and await build_repo.is_view_flush_applied(token):
+                    await self._finish()
+                    return 0
+                if not await self.redis_service.rename(APPLYING_VIEWS_KEY, FLUSHING_VIEWS_KEY):
+                    return 0
+
+            # Незавершенный перенос с прошлого раза имеет приоритет
+            if not await self.redis_service.exists(FLUSHING_VIEWS_KEY):
+                if not await self.redis_service.rename(PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY):
+                    return 0
+
+            # Токен создается один раз на буфер и сохраняется при повторах
+            await self.redis_service.set_nx(FLUSH_TOKEN_KEY, uuid.uuid4().hex)
+            token = await self.redis_service.get_raw(FLUSH_TOKEN_KEY)
+            pending = await self.redis_service.get_hash(FLUSHING_VIEWS_KEY) or {}
+            if not token or not await self.redis_service.rename(FLUSHING_VIEWS_KEY, APPLYING_VIEWS_KEY):
+                return 0
+
+            deltas = {int(build_id): int(count) for build_id, count in pending.items() if int(count) > 0}
+            try:
+                updated = await build_repo.apply_view_deltas(deltas, token)
+            except Exception:
+                await self.redis_service.rename(APPLYING_VIEWS_KEY, FLUSHING_VIEWS_KEY)
+                raise
+            await self._finish()
+            return updated
+        finally:
+            await self.redis_service.delete(FLUSH_LOCK_KEY)
+
+    async def _finish(self) -> None:
+        """Удалить записанный в БД буфер и его токен"""
+        await self.redis_service.delete(APPLYING_VIEWS_KEY)
+        await self.redis_service.delete(FLUSH_TOKEN_KEY)
@@ -1,5 +1,7 @@
 """Утилиты для приложения"""
 from app.utils.transliteration import transliterate_ru_to_en, safe_filename
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.zip_stream import ZipStreamBuffer
 
-__all__ = ['transliterate_ru_to_en', 'safe_filename']
+__all__ = ['transliterate_ru_to_en', 'safe_filename', 'encode_cursor', 'decode_cursor', 'ZipStreamBuffer']
 
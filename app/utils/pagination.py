@@ -0,0 +1,45 @@
+"""
+Утилиты для курсорной (keyset) пагинации
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """
+    Кодирует позицию в списке в непрозрачный курсор
+    
+    Args:
+        payload: Данные позиции (значение сортировки, ID и параметры запроса)
+        
+    Returns:
+        Строка курсора (base64url без выравнивания)
+    """
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Декодирует курсор, созданный encode_cursor
+    
+    Args:
+        cursor: Строка курсора
+        
+    Returns:
+        Данные позиции
+        
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError, binascii.Error) as e:
+        raise ValueError(f"Некорректный курсор: {e}")
+    
+    if not isinstance(payload, dict):
+        raise ValueError("Некорректный курсор")
+    return payload
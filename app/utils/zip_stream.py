@@ -0,0 +1,36 @@
+"""
+Потоковая запись ZIP-архива без промежуточного файла
+"""
+from typing import List
+
+
+class ZipStreamBuffer:
+    """Приемник для zipfile.ZipFile, из которого данные забираются частями
+
+    У объекта нет tell/seek, поэтому zipfile пишет архив в потоковом режиме
+    (с дескрипторами данных после каждого файла). Записанные байты копятся
+    до вызова drain, так что в памяти держится только еще не отправленная часть.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        """Забрать накопленные байты"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
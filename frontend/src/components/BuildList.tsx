@@ -2,11 +2,11 @@ import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { buildsApi } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
-import type { Build, BuildListResponse } from '../types/build';
+import type { BuildSummary, BuildListResponse } from '../types/build';
 
 const BuildList: React.FC = () => {
-  const [builds, setBuilds] = useState<Build[]>([]);
-  const [myBuilds, setMyBuilds] = useState<Build[]>([]);
+  const [builds, setBuilds] = useState<BuildSummary[]>([]);
+  const [myBuilds, setMyBuilds] = useState<BuildSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [page, setPage] = useState(1);
@@ -79,7 +79,7 @@ const BuildList: React.FC = () => {
     }
   };
 
-  const sortBuilds = (buildList: Build[]) => {
+  const sortBuilds = (buildList: BuildSummary[]) => {
     return [...buildList].sort((a, b) => {
       const dateA = new Date(a.created_at).getTime();
       const dateB = new Date(b.created_at).getTime();
@@ -1,10 +1,10 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { buildsApi } from '../services/api';
-import type { Build } from '../types/build';
+import type { BuildSummary } from '../types/build';
 
 const BuildTop: React.FC = () => {
-  const [builds, setBuilds] = useState<Build[]>([]);
+  const [builds, setBuilds] = useState<BuildSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
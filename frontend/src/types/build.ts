@@ -30,10 +30,14 @@ export interface Build {
   average_rating: number;
   ratings_count: number;
   total_price: number;
+  comments_count: number;
   created_at: string;
   updated_at: string | null;
 }
 
+// Краткие данные сборки в списках (без компонентов)
+export type BuildSummary = Omit<Build, 'components' | 'component_ids'>;
+
 export interface BuildCreate {
   title: string;
   description: string;
@@ -49,15 +53,16 @@ export interface BuildUpdate {
 }
 
 export interface BuildListResponse {
-  builds: Build[];
+  builds: BuildSummary[];
   total: number;
-  page: number;
+  page: number | null;
   per_page: number;
   total_pages: number;
+  next_cursor: string | null;
 }
 
 export interface BuildTopResponse {
-  builds: Build[];
+  builds: BuildSummary[];
   total: number;
 }
 
@@ -96,6 +101,8 @@ export interface BuildComment {
   created_at: string;
   updated_at: string | null;
   replies?: BuildComment[];
+  replies_count?: number;
+  replies_next_cursor?: string | null;
 }
 
 export interface BuildCommentCreate {
@@ -112,6 +119,12 @@ export interface BuildCommentListResponse {
   total: number;
 }
 
+export interface BuildCommentRepliesResponse {
+  replies: BuildComment[];
+  total: number;
+  next_cursor: string | null;
+}
+
 // Типы для статистики
 export interface BuildStats {
   total_builds: number;
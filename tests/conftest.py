@@ -4,6 +4,9 @@
 import pytest
 import pytest_asyncio
 import sys
+import json
+import importlib
+import fnmatch
 from typing import AsyncGenerator, Generator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -38,15 +41,18 @@ from app.core.app_factory import create_app
 from app.models.user import User, UserRole
 from app.models.component import Component, ComponentCategory
 from app.models.build import Build
+from app.services.component_catalog import component_catalog
 from app.models.feedback import Feedback, FeedbackType, FeedbackStatus
 from app.dependencies.auth import get_current_user, get_optional_user
 from app.services.redis_service import RedisService
 from app.services.rabbitmq_service import RabbitMQService
 from app.services.pdf_generator import PDFGenerator
+from app.services.pdf_cache import PDFCache
 from app.dependencies.services import (
     get_redis_service,
     get_rabbitmq_service,
-    get_pdf_generator
+    get_pdf_generator,
+    get_pdf_cache
 )
 
 
@@ -78,6 +84,9 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
+    # Снимок каталога компонентов общий на процесс: каждый тест начинает с новой БД
+    component_catalog.reset()
+    
     async with TestSessionLocal() as session:
         yield session
         await session.rollback()
@@ -283,13 +292,163 @@ def mock_redis_service():
     """Создает мок для Redis сервиса"""
     mock_redis = AsyncMock(spec=RedisService)
     mock_redis.get = AsyncMock(return_value=None)
+    mock_redis.get_raw = AsyncMock(return_value=None)
+    mock_redis.set_raw = AsyncMock(return_value=True)
+    mock_redis.incr = AsyncMock(return_value=1)
+    mock_redis.set_nx = AsyncMock(return_value=True)
+    mock_redis.hincrby = AsyncMock(return_value=1)
+    mock_redis.hmget = AsyncMock(side_effect=lambda key, fields: [None] * len(fields))
     mock_redis.set = AsyncMock(return_value=True)
     mock_redis.delete = AsyncMock(return_value=True)
     mock_redis.get_keys = AsyncMock(return_value=[])
     mock_redis.cleanup_expired_keys = AsyncMock(return_value=0)
+    mock_redis.smembers_many = AsyncMock(return_value=None)
+    mock_redis.scard_many = AsyncMock(return_value=None)
+    mock_redis.update_sets = AsyncMock(return_value=True)
+    mock_redis.zadd = AsyncMock(return_value=True)
+    mock_redis.zrem = AsyncMock(return_value=True)
+    mock_redis.zrevrange = AsyncMock(return_value=None)
+    mock_redis.zincrby = AsyncMock(return_value=None)
+    mock_redis.zcard = AsyncMock(return_value=None)
+    mock_redis.zscale = AsyncMock(return_value=True)
     return mock_redis
 
 
+@pytest.fixture(scope="function")
+def in_memory_redis(mock_redis_service):
+    """Подключает к моку Redis хранилище в памяти (строки, хеши, множества, счетчики)"""
+    storage = {}
+    
+    async def get_json(key):
+        value = storage.get(key)
+        return json.loads(value) if value is not None else None
+    
+    async def set_json(key, value, ttl=None):
+        storage[key] = json.dumps(value, default=str)
+        return True
+    
+    async def get_raw(key):
+        return storage.get(key)
+    
+    async def set_raw(key, value, ttl=None):
+        storage[key] = value
+        return True
+    
+    async def set_nx(key, value, ttl=None):
+        if key in storage:
+            return False
+        storage[key] = value
+        return True
+    
+    async def incr(key, amount=1):
+        storage[key] = str(int(storage.get(key, 0)) + amount)
+        return int(storage[key])
+    
+    async def exists(key):
+        return key in storage
+    
+    async def delete(key):
+        return storage.pop(key, None) is not None
+    
+    async def rename(key, new_key):
+        if key not in storage:
+            return False
+        storage[new_key] = storage.pop(key)
+        return True
+    
+    async def hincrby(key, field, amount=1):
+        hash_data = storage.setdefault(key, {})
+        hash_data[field] = str(int(hash_data.get(field, 0)) + amount)
+        return int(hash_data[field])
+    
+    async def hmget(key, fields):
+        hash_data = storage.get(key, {})
+        return [hash_data.get(field) for field in fields]
+    
+    async def get_hash(key):
+        hash_data = storage.get(key)
+        return {k: int(v) for k, v in hash_data.items()} if hash_data else None
+    
+    async def smembers_many(keys):
+        return [set(storage.get(key, set())) for key in keys]
+    
+    async def scard_many(keys):
+        return [len(storage.get(key, set())) for key in keys]
+    
+    async def update_sets(add=None, remove=None, delete=()):
+        for key in delete:
+            storage.pop(key, None)
+        for key, members in (remove or {}).items():
+            storage.get(key, set()).difference_update(members)
+            if key in storage and not storage[key]:
+                del storage[key]
+        for key, members in (add or {}).items():
+            members = set(members)
+            if members:
+                storage.setdefault(key, set()).update(members)
+        return True
+    
+    async def get_keys(pattern="*"):
+        return [key for key in storage if fnmatch.fnmatchcase(key, pattern)]
+    
+    async def zadd(key, mapping):
+        if mapping:
+            storage.setdefault(key, {}).update(mapping)
+        return True
+    
+    async def zrem(key, *members):
+        for member in members:
+            storage.get(key, {}).pop(member, None)
+        if key in storage and not storage[key]:
+            del storage[key]
+        return True
+    
+    async def zrevrange(key, start, stop):
+        ranked = sorted(storage.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [member for member, _ in ranked[start:stop + 1 if stop >= 0 else None]]
+    
+    async def zincrby(key, amount, member):
+        scores = storage.setdefault(key, {})
+        scores[member] = scores.get(member, 0.0) + amount
+        return scores[member]
+    
+    async def zcard(key):
+        return len(storage.get(key, {}))
+    
+    async def zscale(key, factor, min_score=None):
+        scores = {member: score * factor for member, score in storage.get(key, {}).items()}
+        scores = {member: score for member, score in scores.items() if min_score is None or score >= min_score}
+        if scores:
+            storage[key] = scores
+        else:
+            storage.pop(key, None)
+        return True
+    
+    mock_redis_service.get.side_effect = get_json
+    mock_redis_service.set.side_effect = set_json
+    mock_redis_service.get_raw.side_effect = get_raw
+    mock_redis_service.set_raw.side_effect = set_raw
+    mock_redis_service.set_nx.side_effect = set_nx
+    mock_redis_service.incr.side_effect = incr
+    mock_redis_service.exists.side_effect = exists
+    mock_redis_service.delete.side_effect = delete
+    mock_redis_service.rename.side_effect = rename
+    mock_redis_service.hincrby.side_effect = hincrby
+    mock_redis_service.hmget.side_effect = hmget
+    mock_redis_service.get_hash.side_effect = get_hash
+    mock_redis_service.smembers_many.side_effect = smembers_many
+    mock_redis_service.scard_many.side_effect = scard_many
+    mock_redis_service.update_sets.side_effect = update_sets
+    mock_redis_service.get_keys.side_effect = get_keys
+    mock_redis_service.zadd.side_effect = zadd
+    mock_redis_service.zrem.side_effect = zrem
+    mock_redis_service.zrevrange.side_effect = zrevrange
+    mock_redis_service.zincrby.side_effect = zincrby
+    mock_redis_service.zcard.side_effect = zcard
+    mock_redis_service.zscale.side_effect = zscale
+    return storage
+
+
 @pytest.fixture(scope="function")
 def mock_rabbitmq_service():
     """Создает мок для RabbitMQ сервиса"""
@@ -326,7 +485,28 @@ def mock_pdf_generator():
     return mock_pdf
 
 
-def _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator):
+@pytest.fixture(scope="function")
+def pdf_cache(tmp_path):
+    """Дисковый кеш PDF во временной директории"""
+    return PDFCache(str(tmp_path / "pdf_cache"), 10 * 1024 * 1024)
+
+
+@pytest.fixture(scope="function")
+def shop_parser_module(monkeypatch):
+    """Настоящий модуль парсера магазина вместо мока (моки возвращаются после теста)"""
+    monkeypatch.delitem(sys.modules, "bs4")
+    monkeypatch.delitem(sys.modules, "app.services.shop_parser")
+    return importlib.import_module("app.services.shop_parser")
+
+
+@pytest.fixture(scope="function")
+def component_parser_module(shop_parser_module, monkeypatch):
+    """Настоящий модуль сервиса парсинга, использующий настоящий парсер магазина"""
+    monkeypatch.delitem(sys.modules, "app.services.component_parser")
+    return importlib.import_module("app.services.component_parser")
+
+
+def _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache):
     """Вспомогательная функция для создания тестового приложения"""
     app = create_app()
     
@@ -346,15 +526,16 @@ def _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service,
     app.dependency_overrides[get_redis_service] = _get_redis_service
     app.dependency_overrides[get_rabbitmq_service] = _get_rabbitmq_service
     app.dependency_overrides[get_pdf_generator] = _get_pdf_generator
+    app.dependency_overrides[get_pdf_cache] = lambda: pdf_cache
     
     return app
 
 
 @pytest.fixture(scope="function")
-def client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, test_user):
+def client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache, test_user):
     """Создает тестовый клиент FastAPI с авторизованным пользователем"""
     # Создаем отдельный экземпляр приложения для этого клиента
-    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator)
+    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache)
     
     # Переопределяем зависимость авторизации
     async def _get_current_user():
@@ -373,10 +554,10 @@ def client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_
 
 
 @pytest.fixture(scope="function")
-def unauthenticated_client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator):
+def unauthenticated_client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache):
     """Создает неавторизованный тестовый клиент"""
     # Создаем отдельный экземпляр приложения для этого клиента
-    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator)
+    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache)
     
     async def _get_optional_user():
         return None
@@ -390,10 +571,10 @@ def unauthenticated_client(override_get_db, mock_redis_service, mock_rabbitmq_se
 
 
 @pytest.fixture(scope="function")
-def client_user2(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, test_user2):
+def client_user2(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache, test_user2):
     """Создает тестовый клиент для второго пользователя"""
     # Создаем отдельный экземпляр приложения для этого клиента
-    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator)
+    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache)
     
     async def _get_current_user():
         return test_user2
@@ -428,10 +609,10 @@ async def test_admin(db_session: AsyncSession) -> User:
 
 
 @pytest.fixture(scope="function")
-def admin_client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, test_admin):
+def admin_client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache, test_admin):
     """Создает тестовый клиент для администратора"""
     # Создаем отдельный экземпляр приложения для этого клиента
-    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator)
+    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache)
     
     async def _get_current_user():
         return test_admin
@@ -466,10 +647,10 @@ async def test_super_admin(db_session: AsyncSession) -> User:
 
 
 @pytest.fixture(scope="function")
-def super_admin_client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, test_super_admin):
+def super_admin_client(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache, test_super_admin):
     """Создает тестовый клиент для супер-администратора"""
     # Создаем отдельный экземпляр приложения для этого клиента
-    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator)
+    app = _create_test_app(override_get_db, mock_redis_service, mock_rabbitmq_service, mock_pdf_generator, pdf_cache)
     
     async def _get_current_user():
         return test_super_admin
@@ -58,6 +58,106 @@ class TestCreateBuild:
         
         response = client.post("/api/builds/", json=build_data)
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    @pytest.mark.asyncio
+    async def test_create_build_incompatible_components(
+        self, client, test_components, db_session
+    ):
+        """Тест отклонения сборки с несовместимыми компонентами по характеристикам из названий"""
+        from app.models.component import Component, ComponentCategory
+        from app.repositories.component_repository import ComponentRepository
+        from app.services.component_catalog import component_catalog
+        
+        amd_cpu = Component(
+            name="AMD Ryzen 7 7700X",
+            link="https://example.com/cpu-am5",
+            price=25000,
+            category=ComponentCategory.PROCESSORY
+        )
+        ddr5 = Component(
+            name="Kingston FURY Beast 32GB DDR5",
+            link="https://example.com/ram-ddr5",
+            price=9000,
+            category=ComponentCategory.OPERATIVNAYA_PAMYAT
+        )
+        db_session.add_all([amd_cpu, ddr5])
+        await db_session.commit()
+        
+        # Характеристики извлекаются после парсинга; повторный запуск ничего не меняет
+        assert await ComponentRepository(db_session).refresh_specs() == len(test_components) + 2
+        await db_session.commit()
+        assert await ComponentRepository(db_session).refresh_specs() == 0
+        component_catalog.reset()
+        
+        by_category = {c.category: c for c in test_components}
+        board = by_category[ComponentCategory.MATERINSKIE_PLATY]
+        await db_session.refresh(board)
+        assert board.specs["socket"] == "LGA1700"
+        assert board.specs["form_factor"] == "Micro-ATX"
+        await db_session.refresh(amd_cpu)
+        assert amd_cpu.specs["socket"] == "AM5"
+        
+        # Исходная сборка совместима
+        build_data = {
+            "title": "Совместимая сборка",
+            "description": "Компоненты одной платформы",
+            "component_ids": [c.id for c in test_components]
+        }
+        response = client.post("/api/builds/", json=build_data)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["components"][0]["specs"] is not None
+        
+        # Процессор AM5 и память DDR5 на плате LGA1700 с DDR4-памятью в сборке
+        incompatible_ids = [
+            amd_cpu.id if c.category == ComponentCategory.PROCESSORY else c.id for c in test_components
+        ] + [ddr5.id]
+        build_data = {
+            "title": "Несовместимая сборка",
+            "description": "Процессор и память другой платформы",
+            "component_ids": incompatible_ids
+        }
+        response = client.post("/api/builds/", json=build_data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        detail = response.json()["detail"]
+        assert "сокетом AM5" in detail
+        assert "LGA1700" in detail
+    
+    @pytest.mark.asyncio
+    async def test_unavailable_components_only_in_existing_builds(
+        self, client, test_components, db_session
+    ):
+        """Тест: недоступный компонент остается в сохраненной сборке, но не попадает в новые"""
+        from sqlalchemy import update
+        from app.models.component import Component, ComponentCategory
+        from app.services.component_catalog import component_catalog
+        
+        component_ids = [c.id for c in test_components]
+        response = client.post("/api/builds/", json={
+            "title": "Сборка до распродажи",
+            "description": "Видеокарта пропадет из продажи",
+            "component_ids": component_ids
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        build_id = response.json()["id"]
+        
+        gpu = next(c for c in test_components if c.category == ComponentCategory.VIDEOKARTY)
+        await db_session.execute(update(Component).where(Component.id == gpu.id).values(is_available=False))
+        await db_session.commit()
+        component_catalog.reset()
+        
+        # Новая сборка с недоступным компонентом отклоняется
+        response = client.post("/api/builds/", json={
+            "title": "Сборка после распродажи",
+            "description": "Видеокарты уже нет в продаже",
+            "component_ids": component_ids
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert str(gpu.id) in response.json()["detail"]
+        
+        # Сохраненную сборку можно изменять, не заменяя недоступный компонент
+        response = client.put(f"/api/builds/{build_id}", json={"component_ids": list(reversed(component_ids))})
+        assert response.status_code == status.HTTP_200_OK
+        assert gpu.id in {c["id"] for c in response.json()["components"]}
 
 
 class TestGetBuilds:
@@ -169,6 +269,273 @@ class TestGetBuilds:
         assert all(build["author_id"] == test_user.id for build in data["builds"])
 
 
+class TestBuildSearch:
+    """Тесты для поиска сборок"""
+    
+    def test_prefix_tsquery(self):
+        """Тест построения префиксного tsquery из пользовательского запроса"""
+        from app.repositories.build_repository import BuildRepository
+        
+        assert BuildRepository._build_prefix_tsquery("Игровая RTX-3060") == "игровая:* & rtx:* & 3060:*"
+        assert BuildRepository._build_prefix_tsquery("  !!  ") is None
+    
+    def test_postgresql_search_uses_fts_and_trigram(self):
+        """Тест, что в PostgreSQL поиск идет по search_vector и триграммам, а не по ILIKE"""
+        from unittest.mock import MagicMock
+        from sqlalchemy import select
+        from sqlalchemy.dialects.postgresql import asyncpg
+        from app.models.build import Build
+        from app.repositories.build_repository import BuildRepository
+        
+        db = MagicMock()
+        db.bind.dialect.name = "postgresql"
+        condition, rank = BuildRepository(db)._search_condition("игров")
+        
+        sql = str(select(Build.id).where(condition).order_by(rank).compile(dialect=asyncpg.dialect()))
+        assert "builds.search_vector @@ to_tsquery" in sql
+        assert "<% builds.title" in sql
+        assert "ts_rank" in sql
+        assert "ILIKE" not in sql.upper()
+    
+    @pytest.mark.asyncio
+    async def test_search_by_additional_info(
+        self, client, test_user, test_components, db_session
+    ):
+        """Тест поиска по дополнительной информации сборки"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        
+        await build_repo.create(
+            BuildCreate(
+                title="Сборка с заметками",
+                description="Подробное описание сборки для тестирования",
+                additional_info="Tested with undervolting",
+                component_ids=component_ids
+            ),
+            test_user.id
+        )
+        
+        response = client.get("/api/builds/?query=undervolt")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["total"] == 1
+
+
+class TestBuildTotalPrice:
+    """Тесты для сохраненной стоимости сборки"""
+    
+    @pytest.mark.asyncio
+    async def test_price_filters_and_sorting(
+        self, client, test_user, test_components, db_session
+    ):
+        """Тест фильтрации и сортировки сборок по стоимости"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate, BuildUpdate
+        from app.models.component import Component, ComponentCategory
+        
+        hdd = Component(
+            name="WD Blue 1TB",
+            link="https://example.com/hdd",
+            price=4000,
+            category=ComponentCategory.ZHESTKIE_DISKI
+        )
+        db_session.add(hdd)
+        await db_session.commit()
+        await db_session.refresh(hdd)
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        base_price = sum(c.price for c in test_components)
+        
+        cheap_build = await build_repo.create(
+            BuildCreate(
+                title="Базовая сборка",
+                description="Подробное описание сборки для тестирования",
+                component_ids=component_ids
+            ),
+            test_user.id
+        )
+        expensive_build = await build_repo.create(
+            BuildCreate(
+                title="Сборка с HDD",
+                description="Подробное описание сборки для тестирования",
+                component_ids=component_ids + [hdd.id]
+            ),
+            test_user.id
+        )
+        assert cheap_build.total_price == base_price
+        assert expensive_build.total_price == base_price + hdd.price
+        
+        response = client.get(f"/api/builds/?min_price={base_price + 1}")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total"] == 1
+        assert data["builds"][0]["id"] == expensive_build.id
+        
+        response = client.get(f"/api/builds/?max_price={base_price}")
+        data = response.json()
+        assert data["total"] == 1
+        assert data["builds"][0]["id"] == cheap_build.id
+        
+        response = client.get("/api/builds/?sort_by=total_price&order=asc")
+        data = response.json()
+        assert [b["id"] for b in data["builds"]] == [cheap_build.id, expensive_build.id]
+        
+        # Изменение состава компонентов пересчитывает стоимость
+        updated = await build_repo.update(expensive_build, BuildUpdate(component_ids=component_ids))
+        assert updated.total_price == base_price
+
+
+class TestBuildCursorPagination:
+    """Тесты для пагинации сборок по курсору"""
+    
+    @pytest.mark.asyncio
+    async def test_cursor_walks_all_pages(
+        self, client, test_user, test_components, db_session
+    ):
+        """Тест обхода всех страниц по курсору без повторов"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        created_ids = []
+        for i in range(5):
+            build = await build_repo.create(
+                BuildCreate(
+                    title=f"Сборка {i}",
+                    description="Подробное описание сборки для тестирования",
+                    component_ids=component_ids
+                ),
+                test_user.id
+            )
+            created_ids.append(build.id)
+        
+        # Одинаковые значения сортировки различаются по ID
+        seen_ids = []
+        cursor = None
+        for _ in range(3):
+            url = "/api/builds/?sort_by=views_count&limit=2"
+            if cursor:
+                url += f"&cursor={cursor}"
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            data = response.json()
+            seen_ids.extend(b["id"] for b in data["builds"])
+            # Общее количество не зависит от позиции курсора
+            assert data["total"] == 5
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert seen_ids == sorted(created_ids, reverse=True)
+        assert data["page"] is None
+        
+        # Полностью заполненная последняя страница не дает курсора на пустую
+        response = client.get("/api/builds/?sort_by=views_count&limit=5")
+        assert len(response.json()["builds"]) == 5
+        assert response.json()["next_cursor"] is None
+        first = client.get("/api/builds/?sort_by=views_count&limit=3").json()
+        last = client.get(f"/api/builds/?sort_by=views_count&limit=2&cursor={first['next_cursor']}").json()
+        assert len(last["builds"]) == 2
+        assert last["next_cursor"] is None
+    
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, client):
+        """Тест некорректного курсора"""
+        from app.utils.pagination import encode_cursor
+        
+        response = client.get("/api/builds/?cursor=not-a-cursor")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        # Курсор от другой сортировки
+        cursor = encode_cursor({"s": "title", "o": "asc", "v": "A", "id": 1})
+        response = client.get(f"/api/builds/?sort_by=views_count&cursor={cursor}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestBuildListProjection:
+    """Тесты для легкой выборки списков сборок"""
+    
+    @pytest.mark.asyncio
+    async def test_list_page_is_single_query(
+        self, client, test_user, test_components, db_session
+    ):
+        """Тест: страница списка читается одним запросом без компонентов и оценок"""
+        from sqlalchemy import event
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        for i in range(3):
+            await build_repo.create(
+                BuildCreate(
+                    title=f"Сборка {i}",
+                    description="Подробное описание сборки для тестирования",
+                    component_ids=component_ids
+                ),
+                test_user.id
+            )
+        
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        sync_engine = db_session.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            builds, _ = await build_repo.search_page(limit=20)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+        
+        # Раньше: сборки + авторы + компоненты (3 запроса, строки по каждому компоненту)
+        assert len(statements) == 1
+        assert "build_components" not in statements[0]
+        assert "build_ratings" not in statements[0]
+        assert len(builds) == 3
+        assert builds[0]["author"]["name"] == test_user.name
+        assert builds[0]["total_price"] == sum(c.price for c in test_components)
+        
+        response = client.get("/api/builds/")
+        assert response.status_code == status.HTTP_200_OK
+        assert "components" not in response.json()["builds"][0]
+        
+        # Страница и общее количество одним запросом
+        statements.clear()
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            builds, total, _ = await build_repo.search_with_total(limit=2)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+        assert len(statements) == 1
+        assert len(builds) == 2
+        assert total == 3
+    
+    @pytest.mark.asyncio
+    async def test_estimated_total_only_for_unfiltered(self, client, monkeypatch):
+        """Тест оценки общего количества по статистике БД"""
+        from app.repositories.build_repository import BuildRepository
+        
+        async def estimate_count(self):
+            return 1000
+        
+        monkeypatch.setattr(BuildRepository, "estimate_count", estimate_count)
+        
+        data = client.get("/api/builds/?estimate_total=true").json()
+        assert data["total"] == 1000
+        assert data["total_is_estimate"] is True
+        
+        # С фильтрами количество считается точно
+        data = client.get("/api/builds/?estimate_total=true&query=test").json()
+        assert data["total"] == 0
+        assert data["total_is_estimate"] is False
+
+
 class TestGetTopBuilds:
     """Тесты для получения топа сборок"""
     
@@ -181,6 +548,183 @@ class TestGetTopBuilds:
         data = response.json()
         assert data["total"] == 0
         assert len(data["builds"]) == 0
+    
+    @pytest.mark.asyncio
+    async def test_top_builds_bayesian_leaderboard(
+        self, client, test_user, test_user2, test_components, in_memory_redis, mock_redis_service, db_session
+    ):
+        """Тест топа по байесовскому рейтингу: запрос к БД, топ в Redis и его обновление при записи оценок"""
+        from app.models.user import User, UserRole
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate, BuildRatingCreate
+        from app.services.build_leaderboard import BuildLeaderboard
+        
+        raters = [
+            User(email=f"rater{i}@example.com", name=f"Rater {i}", google_id=f"rater{i}",
+                 is_active=True, role=UserRole.USER)
+            for i in range(20)
+        ]
+        db_session.add_all(raters)
+        await db_session.commit()
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        single, popular, average = [
+            await build_repo.create(
+                BuildCreate(title=title, description="Описание сборки для топа", component_ids=component_ids),
+                author.id
+            )
+            for title, author in (("Одна оценка", test_user), ("Много оценок", test_user2), ("Средняя", test_user2))
+        ]
+        # Одна пятерка, двадцать оценок со средним 4.9 и три четверки
+        for build, scores in ((single, [5]), (popular, [5] * 18 + [4] * 2), (average, [4] * 3)):
+            for rater, score in zip(raters, scores):
+                await build_repo.create_rating(build.id, rater.id, BuildRatingCreate(score=score))
+        
+        # Топ еще не построен — считается запросом к БД
+        response = client.get("/api/builds/top")
+        assert response.status_code == status.HTTP_200_OK
+        assert [b["id"] for b in response.json()["builds"]] == [popular.id, single.id, average.id]
+        
+        leaderboard = BuildLeaderboard(mock_redis_service)
+        assert await leaderboard.top_ids(10) is None
+        assert await leaderboard.rebuild(build_repo) == 3
+        
+        async def assert_leaderboard_matches_database():
+            prior_mean, prior_weight = await leaderboard.get_params()
+            expected = await build_repo.get_top_builds(10, prior_mean, prior_weight)
+            assert await leaderboard.top_ids(10) == [b["id"] for b in expected]
+            response = client.get("/api/builds/top")
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["builds"] == [
+                {**b, "created_at": b["created_at"].isoformat(), "updated_at": b["updated_at"].isoformat()}
+                for b in expected
+            ]
+        
+        await assert_leaderboard_matches_database()
+        
+        # Вес сборки пересчитывается при записи оценок
+        response = client.post(f"/api/builds/{average.id}/ratings", json={"score": 5})
+        assert response.status_code == status.HTTP_201_CREATED
+        await assert_leaderboard_matches_database()
+        
+        response = client.put(f"/api/builds/{average.id}/ratings", json={"score": 1})
+        assert response.status_code == status.HTTP_200_OK
+        await assert_leaderboard_matches_database()
+        assert (await leaderboard.top_ids(10))[-1] == average.id
+        
+        response = client.delete(f"/api/builds/{average.id}/ratings")
+        assert response.status_code == status.HTTP_200_OK
+        await assert_leaderboard_matches_database()
+        
+        # Удаленная сборка пропадает из топа
+        response = client.delete(f"/api/builds/{single.id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert await leaderboard.top_ids(10) == [popular.id, average.id]
+        await assert_leaderboard_matches_database()
+
+
+class TestTrendingBuilds:
+    """Тесты для популярных сейчас сборок"""
+    
+    @pytest.mark.asyncio
+    async def test_trending_builds_decay_and_updates(
+        self, client, test_user, test_user2, test_components, in_memory_redis, mock_redis_service, db_session
+    ):
+        """Тест популярных сборок: расчет по БД, множество в Redis, учет событий и перемасштабирование"""
+        from datetime import datetime, timedelta, timezone
+        from sqlalchemy import update
+        from app.models.build import BuildRating
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate, BuildRatingCreate, BuildCommentCreate
+        from app.services.build_trending import BuildTrending, TRENDING_EPOCH_KEY, TRENDING_HALF_LIFE
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        fresh, stale, quiet = [
+            await build_repo.create(
+                BuildCreate(title=title, description="Описание сборки для популярных", component_ids=component_ids),
+                author.id
+            )
+            for title, author in (("Свежая", test_user), ("Давняя", test_user2), ("Тихая", test_user2))
+        ]
+        # Свежий комментарий весит больше двух давних пятерок
+        await build_repo.create_comment(fresh.id, test_user2.id, BuildCommentCreate(content="Отличная сборка"))
+        await build_repo.create_rating(stale.id, test_user.id, BuildRatingCreate(score=5))
+        await build_repo.create_rating(stale.id, test_user2.id, BuildRatingCreate(score=5))
+        await db_session.execute(
+            update(BuildRating).values(created_at=datetime.now(timezone.utc) - timedelta(days=10))
+        )
+        await db_session.commit()
+        
+        # Множество еще не построено — веса считаются по БД
+        response = client.get("/api/builds/trending")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [b["id"] for b in data["builds"]] == [fresh.id, stale.id]
+        assert data["total"] == 2
+        
+        trending = BuildTrending(mock_redis_service)
+        assert await trending.page(0, 10) is None
+        assert await trending.rebuild(build_repo) == 2
+        assert await trending.page(0, 10) == ([fresh.id, stale.id], 2)
+        
+        # Просмотр, оценка и комментарий учитываются сразу
+        response = client.get(f"/api/builds/{quiet.id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert await trending.page(0, 10) == ([fresh.id, quiet.id, stale.id], 3)
+        
+        response = client.post(f"/api/builds/{stale.id}/comments", json={"content": "Все еще актуальна"})
+        assert response.status_code == status.HTTP_201_CREATED
+        response = client.get("/api/builds/trending", params={"skip": 1, "limit": 1})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [b["id"] for b in data["builds"]] == [fresh.id]
+        assert (data["total"], data["page"], data["total_pages"]) == (3, 2, 3)
+        
+        # Перемасштабирование сохраняет порядок и удаляет угасшие сборки
+        epoch = await trending.get_epoch()
+        in_memory_redis[TRENDING_EPOCH_KEY] = repr(epoch - 7 * TRENDING_HALF_LIFE)
+        assert await trending.rescale() is True
+        assert await trending.get_epoch() >= epoch
+        assert await trending.page(0, 10) == ([stale.id, fresh.id], 2)
+        
+        response = client.delete(f"/api/builds/{fresh.id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert await trending.page(0, 10) == ([stale.id], 1)
+    
+    @pytest.mark.asyncio
+    async def test_trending_database_fallback_cached(
+        self, client, test_user, test_components, in_memory_redis, mock_redis_service, db_session, monkeypatch
+    ):
+        """Тест: пока множество не построено, расчет по БД не повторяется на каждый запрос"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate, BuildCommentCreate
+        from app.services.build_trending import BuildTrending
+        
+        build_repo = BuildRepository(db_session)
+        build = await build_repo.create(
+            BuildCreate(title="Обсуждаемая", description="Описание сборки для популярных",
+                        component_ids=[c.id for c in test_components]),
+            test_user.id
+        )
+        await build_repo.create_comment(build.id, test_user.id, BuildCommentCreate(content="Отличная сборка"))
+        
+        calls = []
+        scores_from_database = BuildTrending.scores_from_database
+        
+        async def counting_scores(build_repo, now=None):
+            calls.append(now)
+            return await scores_from_database(build_repo, now)
+        
+        monkeypatch.setattr(BuildTrending, "scores_from_database", staticmethod(counting_scores))
+        
+        for params in ({}, {"skip": 0, "limit": 5}, {}):
+            response = client.get("/api/builds/trending", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            assert [b["id"] for b in response.json()["builds"]] == [build.id]
+        assert len(calls) == 1
+        assert await BuildTrending(mock_redis_service).page(0, 10) is None
 
 
 class TestGetMyBuilds:
@@ -237,6 +781,87 @@ class TestGetBuildStats:
         assert data["total_ratings"] == 0
         assert data["total_comments"] == 0
         assert data["average_rating"] == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_get_builds_stats_cached_until_write(
+        self, client, test_user, test_components, in_memory_redis, db_session
+    ):
+        """Тест кеширования статистики и ее инвалидации при создании сборки"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        assert client.get("/api/builds/stats").json()["total_builds"] == 0
+        
+        # Запись в обход сервиса не инвалидирует кеш: ответ отдается из Redis
+        component_ids = [c.id for c in test_components]
+        await BuildRepository(db_session).create(
+            BuildCreate(
+                title="Сборка в обход сервиса",
+                description="Подробное описание сборки для тестирования",
+                component_ids=component_ids
+            ),
+            test_user.id
+        )
+        assert client.get("/api/builds/stats").json()["total_builds"] == 0
+        
+        response = client.post("/api/builds/", json={
+            "title": "Новая сборка",
+            "description": "Подробное описание сборки для тестирования",
+            "component_ids": component_ids
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert client.get("/api/builds/stats").json()["total_builds"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_stats_counters_follow_writes(
+        self, test_user, test_user2, test_components, db_session
+    ):
+        """Тест поддержки счетчиков build_stats при записи"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate, BuildRatingCreate, BuildCommentCreate
+        
+        build_repo = BuildRepository(db_session)
+        # Строка статистики создается пересчетом при первом чтении
+        assert (await build_repo.get_stats())["total_builds"] == 0
+        
+        build = await build_repo.create(
+            BuildCreate(
+                title="Тестовая сборка",
+                description="Подробное описание сборки для тестирования",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user.id
+        )
+        await build_repo.create_rating(build.id, test_user.id, BuildRatingCreate(score=5))
+        rating = await build_repo.create_rating(build.id, test_user2.id, BuildRatingCreate(score=2))
+        await build_repo.update_rating(rating, 4)
+        comment = await build_repo.create_comment(
+            build.id, test_user.id, BuildCommentCreate(content="Комментарий")
+        )
+        await build_repo.create_comment(
+            build.id, test_user2.id, BuildCommentCreate(content="Ответ", parent_id=comment.id)
+        )
+        
+        stats = await build_repo.get_stats()
+        assert stats == {
+            "total_builds": 1,
+            "total_ratings": 2,
+            "total_comments": 2,
+            "average_rating": 4.5
+        }
+        
+        # Удаление комментария удаляет и ответы
+        assert await build_repo.delete_comment(comment)
+        assert (await build_repo.get_stats())["total_comments"] == 0
+        
+        assert await build_repo.delete(build)
+        stats = await build_repo.get_stats()
+        assert stats["total_builds"] == 0
+        assert stats["total_ratings"] == 0
+        assert stats["average_rating"] == 0.0
+        
+        refreshed = await build_repo.refresh_stats()
+        assert (refreshed.total_builds, refreshed.total_ratings, refreshed.rating_sum) == (0, 0, 0)
 
 
 class TestGetUniqueComponents:
@@ -253,6 +878,357 @@ class TestGetUniqueComponents:
         assert isinstance(data["components_by_category"], dict)
 
 
+class TestSimilarBuilds:
+    """Тесты для похожих сборок"""
+    
+    @pytest.mark.asyncio
+    async def test_similar_builds_index_matches_database(
+        self, client, test_components, in_memory_redis, mock_redis_service, db_session
+    ):
+        """Тест похожих сборок: запрос к БД до построения индекса, индекс и его обновление при записи"""
+        from app.models.component import Component, ComponentCategory
+        from app.repositories.build_repository import BuildRepository
+        from app.services.build_similarity import BuildSimilarityIndex
+        
+        swapped = [ComponentCategory.VIDEOKARTY, ComponentCategory.OPERATIVNAYA_PAMYAT, ComponentCategory.KORPUSA]
+        alternatives = {
+            category: Component(name=f"Альтернатива {category.value}", link=f"https://example.com/alt-{category.value}",
+                                price=5000, category=category)
+            for category in swapped
+        }
+        db_session.add_all(alternatives.values())
+        await db_session.commit()
+        
+        def component_ids(replace):
+            return [alternatives[c.category].id if c.category in replace else c.id for c in test_components]
+        
+        build_ids = []
+        for replace in ([], swapped[:1], swapped, swapped[1:]):
+            response = client.post("/api/builds/", json={
+                "title": "Сборка для сравнения",
+                "description": "Сборка с частично общими компонентами",
+                "component_ids": component_ids(replace)
+            })
+            assert response.status_code == status.HTTP_201_CREATED
+            build_ids.append(response.json()["id"])
+        base, one_swapped, all_swapped, two_swapped = build_ids
+        
+        # Индекс еще не построен — похожесть считается запросом к БД
+        response = client.get(f"/api/builds/{base}/similar", params={"limit": 2})
+        assert response.status_code == status.HTTP_200_OK
+        builds = response.json()["builds"]
+        assert [b["id"] for b in builds] == [one_swapped, two_swapped]
+        assert builds[0]["similarity"] == round(7 / 9, 4)
+        assert builds[0]["common_components"] == 7
+        assert builds[1]["similarity"] == round(6 / 10, 4)
+        
+        build_repo = BuildRepository(db_session)
+        index = BuildSimilarityIndex(mock_redis_service)
+        assert await index.find_similar(base, 3) is None
+        assert await index.rebuild(build_repo) == 4
+        
+        async def assert_index_matches_database():
+            for build_id in build_ids:
+                expected = await build_repo.get_similar_builds(build_id, 3)
+                actual = await index.find_similar(build_id, 3)
+                assert [(b, round(sim, 9), common) for b, sim, common in actual] == \
+                    [(b, round(sim, 9), common) for b, sim, common in expected]
+        
+        await assert_index_matches_database()
+        
+        # Индекс обновляется при изменении и удалении сборок
+        response = client.put(f"/api/builds/{one_swapped}", json={"component_ids": component_ids(swapped)})
+        assert response.status_code == status.HTTP_200_OK
+        await assert_index_matches_database()
+        
+        response = client.delete(f"/api/builds/{all_swapped}")
+        assert response.status_code == status.HTTP_200_OK
+        build_ids.remove(all_swapped)
+        await assert_index_matches_database()
+        assert all(b != all_swapped for b, _, _ in await index.find_similar(base, 3))
+        
+        response = client.get("/api/builds/99999/similar")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    @pytest.mark.asyncio
+    async def test_similar_builds_skip_popular_component_postings(
+        self, client, test_components, in_memory_redis, mock_redis_service, db_session, monkeypatch
+    ):
+        """Тест: списки сборок популярных компонентов не загружаются, общие компоненты считаются точно"""
+        from app.models.component import Component, ComponentCategory
+        from app.repositories.build_repository import BuildRepository
+        from app.services import build_similarity
+        from app.services.build_similarity import BuildSimilarityIndex, COMPONENT_BUILDS_KEY
+        
+        swapped = [ComponentCategory.VIDEOKARTY, ComponentCategory.OPERATIVNAYA_PAMYAT, ComponentCategory.KORPUSA]
+        alternatives = {
+            category: Component(name=f"Альтернатива {category.value}", link=f"https://example.com/alt-{category.value}",
+                                price=5000, category=category)
+            for category in swapped
+        }
+        db_session.add_all(alternatives.values())
+        await db_session.commit()
+        
+        build_ids = []
+        for replace in ([], swapped[:1], swapped, swapped[1:]):
+            response = client.post("/api/builds/", json={
+                "title": "Сборка для сравнения",
+                "description": "Сборка с частично общими компонентами",
+                "component_ids": [alternatives[c.category].id if c.category in replace else c.id for c in test_components]
+            })
+            assert response.status_code == status.HTTP_201_CREATED
+            build_ids.append(response.json()["id"])
+        base, one_swapped, all_swapped, two_swapped = build_ids
+        
+        build_repo = BuildRepository(db_session)
+        index = BuildSimilarityIndex(mock_redis_service)
+        assert await index.rebuild(build_repo) == 4
+        
+        # Компоненты, входящие во все четыре сборки, считаются популярными
+        monkeypatch.setattr(build_similarity, "SIMILARITY_MAX_POSTING_SIZE", 3)
+        loaded_keys = []
+        smembers_many = mock_redis_service.smembers_many
+        
+        async def tracking_smembers_many(keys):
+            loaded_keys.extend(keys)
+            return await smembers_many(keys)
+        
+        monkeypatch.setattr(mock_redis_service, "smembers_many", tracking_smembers_many)
+        
+        popular = {
+            COMPONENT_BUILDS_KEY.format(component_id=c.id) for c in test_components if c.category not in swapped
+        }
+        expected = await build_repo.get_similar_builds(base, 3)
+        actual = await index.find_similar(base, 3)
+        
+        assert not popular & set(loaded_keys)
+        # Сборка, совпадающая только популярными компонентами, не находится,
+        # у остальных похожесть и число общих компонентов как в БД
+        assert [b for b, _, _ in expected] == [one_swapped, two_swapped, all_swapped]
+        assert [(b, round(sim, 9), common) for b, sim, common in actual] == \
+            [(b, round(sim, 9), common) for b, sim, common in expected[:2]]
+
+
+class TestOptimizeBuild:
+    """Тесты для подбора комплектующих по бюджету"""
+    
+    @pytest.mark.asyncio
+    async def test_optimize_build_under_budget_with_pins(
+        self, client, test_components, db_session
+    ):
+        """Тест подбора: бюджет, порядок вариантов, закрепленные компоненты"""
+        from app.models.component import Component, ComponentCategory
+        
+        extra = [
+            Component(name="NVIDIA GeForce RTX 4090", link="https://example.com/gpu-4090",
+                      price=150000, category=ComponentCategory.VIDEOKARTY),
+            Component(name="Intel Core i3-12100F", link="https://example.com/cpu-i3",
+                      price=7000, category=ComponentCategory.PROCESSORY),
+            Component(name="Toshiba 1TB", link="https://example.com/hdd",
+                      price=3500, category=ComponentCategory.ZHESTKIE_DISKI),
+        ]
+        db_session.add_all(extra)
+        await db_session.commit()
+        
+        base_price = sum(c.price for c in test_components)
+        response = client.post("/api/builds/optimize", json={"budget": base_price, "top_k": 5})
+        assert response.status_code == status.HTTP_200_OK
+        builds = response.json()["builds"]
+        assert 1 <= len(builds) <= 5
+        
+        scores = [build["score"] for build in builds]
+        assert scores == sorted(scores, reverse=True)
+        assert len({tuple(sorted(c["id"] for c in build["components"])) for build in builds}) == len(builds)
+        for build in builds:
+            assert build["total_price"] <= base_price
+            assert build["total_price"] == sum(c["price"] for c in build["components"])
+            categories = [c["category"] for c in build["components"]]
+            assert len(categories) == 8
+            assert len(set(categories) & {"SSD_NAKOPITELI", "ZHESTKIE_DISKI"}) == 1
+        # Видеокарта за 150 000 в бюджет не помещается
+        assert all(c["id"] != extra[0].id for build in builds for c in build["components"])
+        # Лучший вариант тратит бюджет на процессор дороже i3
+        assert any(c["name"] == "Intel Core i5-12400F" for c in builds[0]["components"])
+        
+        # Закрепленный компонент входит во все варианты
+        response = client.post("/api/builds/optimize", json={
+            "budget": 300000,
+            "pinned_component_ids": [extra[1].id],
+            "weights": {"PROCESSORY": 5}
+        })
+        assert response.status_code == status.HTTP_200_OK
+        for build in response.json()["builds"]:
+            assert extra[1].id in [c["id"] for c in build["components"]]
+        
+        # Бюджета не хватает даже на самую дешевую сборку
+        response = client.post("/api/builds/optimize", json={"budget": 10000})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "минимальная стоимость" in response.json()["detail"]
+        
+        # Два закрепленных компонента одной категории
+        gpu_ids = [c.id for c in test_components if c.category == ComponentCategory.VIDEOKARTY] + [extra[0].id]
+        response = client.post("/api/builds/optimize", json={"budget": 300000, "pinned_component_ids": gpu_ids})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_optimizer_matches_brute_force(self):
+        """Тест точности подбора: совпадает с полным перебором при шаге бюджета 1 ₽"""
+        import itertools
+        import math
+        import random
+        from datetime import datetime
+        from app.models.component import ComponentCategory
+        from app.schemas.component import ComponentResponse
+        from app.services.component_catalog import CatalogSnapshot
+        from app.services.build_optimizer import BuildOptimizer, OPTIMIZER_GROUPS, DEFAULT_CATEGORY_WEIGHTS
+        
+        rnd = random.Random(7)
+        components = [
+            ComponentResponse(
+                id=index, name=f"Компонент {index}", link=f"https://example.com/{index}",
+                price=rnd.randint(1000, 40000), image=None, category=category,
+                created_at=datetime.now(), updated_at=None
+            )
+            for index, category in enumerate([c for c in ComponentCategory for _ in range(3)], start=1)
+        ]
+        snapshot = CatalogSnapshot(components)
+        budget = 150000
+        
+        # Полный перебор с той же оценкой (вес категории * нормированный логарифм цены)
+        options = []
+        for categories in OPTIMIZER_GROUPS:
+            group = [c for c in components if c.category in categories]
+            low = min(math.log(c.price) for c in group)
+            high = max(math.log(c.price) for c in group)
+            options.append([
+                (c.price, DEFAULT_CATEGORY_WEIGHTS[c.category] * (math.log(c.price) - low) / (high - low))
+                for c in group
+            ])
+        expected = sorted(
+            (sum(score for _, score in combo) for combo in itertools.product(*options)
+             if sum(price for price, _ in combo) <= budget),
+            reverse=True
+        )[:4]
+        
+        builds = BuildOptimizer(budget_steps=budget).optimize(snapshot, budget, top_k=4)
+        assert [round(b.score, 9) for b in builds] == [round(score, 9) for score in expected]
+        assert all(b.total_price <= budget for b in builds)
+    
+    def test_optimizer_respects_compatibility(self):
+        """Тест подбора с учетом совместимости: совпадает с полным перебором совместимых сборок"""
+        import itertools
+        import math
+        import random
+        from datetime import datetime
+        from app.models.component import ComponentCategory
+        from app.schemas.component import ComponentResponse
+        from app.services.component_catalog import CatalogSnapshot
+        from app.services.component_specs import check_compatibility
+        from app.services.build_optimizer import BuildOptimizer, OPTIMIZER_GROUPS, DEFAULT_CATEGORY_WEIGHTS
+        
+        rnd = random.Random(11)
+        sockets = ["AM4", "AM5", "LGA1700"]
+        form_factors = ["Mini-ITX", "Micro-ATX", "ATX"]
+        
+        def random_specs(category):
+            if category == ComponentCategory.PROCESSORY:
+                return {"socket": rnd.choice(sockets), "tdp": rnd.choice([65, 105, 125])}
+            if category == ComponentCategory.MATERINSKIE_PLATY:
+                return {
+                    "socket": rnd.choice(sockets),
+                    "memory_type": rnd.choice(["DDR4", "DDR5"]),
+                    "form_factor": rnd.choice(form_factors)
+                }
+            if category == ComponentCategory.OPERATIVNAYA_PAMYAT:
+                return {"memory_type": rnd.choice(["DDR4", "DDR5"])}
+            if category == ComponentCategory.KORPUSA:
+                return {"form_factor": rnd.choice(form_factors)}
+            if category == ComponentCategory.VIDEOKARTY:
+                return {"tdp": rnd.choice([120, 220, 320])}
+            if category == ComponentCategory.BLOKI_PITANIYA:
+                return {"wattage": rnd.choice([450, 650, 850])}
+            return {}
+        
+        components = [
+            ComponentResponse(
+                id=index, name=f"Компонент {index}", link=f"https://example.com/{index}",
+                price=rnd.randint(1000, 40000), image=None, category=category,
+                created_at=datetime.now(), updated_at=None, specs=random_specs(category)
+            )
+            for index, category in enumerate([c for c in ComponentCategory for _ in range(4)], start=1)
+        ]
+        snapshot = CatalogSnapshot(components)
+        budget = 150000
+        
+        groups = []
+        for categories in OPTIMIZER_GROUPS:
+            group = [c for c in components if c.category in categories]
+            low = min(math.log(c.price) for c in group)
+            high = max(math.log(c.price) for c in group)
+            groups.append([
+                (c, DEFAULT_CATEGORY_WEIGHTS[c.category] * (math.log(c.price) - low) / (high - low))
+                for c in group
+            ])
+        expected = sorted(
+            (sum(score for _, score in combo) for combo in itertools.product(*groups)
+             if sum(c.price for c, _ in combo) <= budget
+             and not check_compatibility((c.category, c.specs) for c, _ in combo)),
+            reverse=True
+        )[:3]
+        
+        builds = BuildOptimizer(budget_steps=budget).optimize(snapshot, budget, top_k=3)
+        assert [round(b.score, 9) for b in builds] == [round(score, 9) for score in expected]
+        for build in builds:
+            chosen = [snapshot.get(component_id) for component_id in build.component_ids]
+            assert check_compatibility((c.category, c.specs) for c in chosen) == []
+
+    
+    def test_optimizer_full_catalog_timing(self):
+        """Тест времени подбора на каталоге реального размера (~400 компонентов в категории)"""
+        import random
+        import time
+        from datetime import datetime
+        from app.models.component import ComponentCategory
+        from app.schemas.component import ComponentResponse
+        from app.services.component_catalog import CatalogSnapshot
+        from app.services.build_optimizer import BuildOptimizer
+        
+        rnd = random.Random(5)
+        
+        def random_specs(category):
+            if category == ComponentCategory.PROCESSORY:
+                return {"socket": rnd.choice(["AM4", "AM5", "LGA1700", "LGA1851"]), "tdp": 105}
+            if category == ComponentCategory.MATERINSKIE_PLATY:
+                return {
+                    "socket": rnd.choice(["AM4", "AM5", "LGA1700", "LGA1851"]),
+                    "memory_type": rnd.choice(["DDR4", "DDR5"]),
+                    "form_factor": rnd.choice(["Mini-ITX", "Micro-ATX", "ATX"])
+                }
+            if category == ComponentCategory.OPERATIVNAYA_PAMYAT:
+                return {"memory_type": rnd.choice(["DDR4", "DDR5"])}
+            if category == ComponentCategory.KORPUSA:
+                return {"form_factor": rnd.choice(["Mini-ITX", "Micro-ATX", "ATX"])}
+            if category == ComponentCategory.BLOKI_PITANIYA:
+                return {"wattage": 850}
+            return {}
+        
+        components = [
+            ComponentResponse(
+                id=index, name=f"Компонент {index}", link=f"https://example.com/{index}",
+                price=rnd.randint(1000, 300000), image=None, category=category,
+                created_at=datetime.now(), updated_at=None, specs=random_specs(category)
+            )
+            for index, category in enumerate([c for c in ComponentCategory for _ in range(400)], start=1)
+        ]
+        snapshot = CatalogSnapshot(components)
+        
+        started = time.perf_counter()
+        builds = BuildOptimizer().optimize(snapshot, 400000, top_k=10)
+        elapsed = time.perf_counter() - started
+        
+        assert len(builds) == 10
+        # Подбор выполняется в потоке, но не должен занимать его секундами
+        assert elapsed < 3.0
+
 class TestGetBuildById:
     """Тесты для получения сборки по ID"""
     
@@ -312,6 +1288,70 @@ class TestGetBuildById:
         
         # Неавторизованный пользователь может просматривать сборки
         assert response.status_code == status.HTTP_200_OK
+    
+    @pytest.mark.asyncio
+    async def test_views_buffered_and_flushed(
+        self, unauthenticated_client, test_user, test_components, in_memory_redis, mock_redis_service, db_session,
+        monkeypatch
+    ):
+        """Тест буферизации просмотров в Redis и их пакетной записи в БД"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        from app.services.view_counter import ViewCounter
+        
+        build_repo = BuildRepository(db_session)
+        created_build = await build_repo.create(
+            BuildCreate(
+                title="Тестовая сборка",
+                description="Описание сборки",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user.id
+        )
+        
+        # Повторный просмотр с того же IP не засчитывается
+        assert unauthenticated_client.get(f"/api/builds/{created_build.id}").json()["views_count"] == 1
+        assert unauthenticated_client.get(f"/api/builds/{created_build.id}").json()["views_count"] == 1
+        assert unauthenticated_client.get("/api/builds/").json()["builds"][0]["views_count"] == 1
+        
+        # До записи в БД счетчик не меняется
+        await db_session.refresh(created_build)
+        assert created_build.views_count == 0
+        
+        assert await ViewCounter(mock_redis_service).flush(build_repo) == 1
+        await db_session.refresh(created_build)
+        assert created_build.views_count == 1
+        
+        # После записи приращение не учитывается повторно
+        assert unauthenticated_client.get(f"/api/builds/{created_build.id}").json()["views_count"] == 1
+        assert await ViewCounter(mock_redis_service).flush(build_repo) == 0
+        
+        # Перенос, прерванный после записи в БД, не учитывается и не применяется повторно
+        view_counter = ViewCounter(mock_redis_service)
+        assert await view_counter.record_view(created_build.id, "user_42") is True
+        async def crash(*args):
+            raise RuntimeError("worker stopped")
+        
+        with monkeypatch.context() as m:
+            m.setattr(ViewCounter, "_finish", crash)
+            with pytest.raises(RuntimeError):
+                await view_counter.flush(build_repo)
+        assert await view_counter.get_pending([created_build.id]) == {}
+        assert await view_counter.flush(build_repo) == 0
+        await db_session.refresh(created_build)
+        assert created_build.views_count == 2
+        assert not await mock_redis_service.exists("build_views:applying")
+        
+        # При ошибке записи буфер возвращается и переносится следующим вызовом
+        assert await view_counter.record_view(created_build.id, "user_43") is True
+        with monkeypatch.context() as m:
+            m.setattr(build_repo, "apply_view_deltas", crash)
+            with pytest.raises(RuntimeError):
+                await view_counter.flush(build_repo)
+        assert await view_counter.get_pending([created_build.id]) == {created_build.id: 1}
+        assert await view_counter.flush(build_repo) == 1
+        await db_session.refresh(created_build)
+        assert created_build.views_count == 3
 
 
 class TestUpdateBuild:
@@ -384,6 +1424,73 @@ class TestUpdateBuild:
         response = client_user2.put(f"/api/builds/{created_build.id}", json=update_data)
         
         assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    @pytest.mark.asyncio
+    async def test_update_build_diffs_component_links(
+        self, test_user, test_components, db_session
+    ):
+        """Тест обновления компонентов по разнице без перезаписи всех связей"""
+        from sqlalchemy import event
+        from app.models.component import Component, ComponentCategory
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate, BuildUpdate
+        
+        build_repo = BuildRepository(db_session)
+        created_build = await build_repo.create(
+            BuildCreate(
+                title="Сборка для замены видеокарты",
+                description="Подробное описание сборки для тестирования",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user.id
+        )
+        
+        new_gpu = Component(
+            name="NVIDIA GeForce RTX 4070",
+            link="https://example.com/gpu-4070",
+            price=60000,
+            category=ComponentCategory.VIDEOKARTY
+        )
+        db_session.add(new_gpu)
+        await db_session.commit()
+        old_gpu = next(c for c in test_components if c.category == ComponentCategory.VIDEOKARTY)
+        component_ids = [c.id for c in test_components if c.id != old_gpu.id] + [new_gpu.id]
+        
+        statements = []
+        
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+        
+        engine = db_session.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            build = await build_repo.get_by_id(created_build.id)
+            statements.clear()
+            updated = await build_repo.update(build, BuildUpdate(component_ids=component_ids))
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        
+        # Удаляется только замененная видеокарта, все связи не перезаписываются
+        deletes = [s for s in statements if s.startswith("DELETE FROM build_components")]
+        assert len(deletes) == 1
+        assert "component_id IN" in deletes[0]
+        inserts = [s for s in statements if s.startswith("INSERT INTO build_components")]
+        assert len(inserts) == 1
+        
+        assert {c.id for c in updated.components} == set(component_ids)
+        expected_price = sum(c.price for c in test_components) - old_gpu.price + new_gpu.price
+        assert updated.total_price == expected_price
+        
+        # Изменение только названия не трогает связи с компонентами
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            updated = await build_repo.update(updated, BuildUpdate(title="Новое название сборки"))
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert not [s for s in statements if "build_components" in s and not s.startswith("SELECT")]
+        assert updated.title == "Новое название сборки"
+        assert updated.total_price == expected_price
 
 
 class TestDeleteBuild:
@@ -671,6 +1778,82 @@ class TestDeleteRating:
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+class TestRatingAggregates:
+    """Тесты для денормализованных агрегатов рейтинга сборки"""
+    
+    @pytest.mark.asyncio
+    async def test_rating_aggregates_follow_rating_changes(
+        self, client_user2, test_user, test_components, db_session
+    ):
+        """Тест синхронизации rating_sum/ratings_count при создании, обновлении и удалении оценки"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        
+        build_data = BuildCreate(
+            title="Сборка для агрегатов",
+            description="Подробное описание сборки для тестирования",
+            component_ids=component_ids
+        )
+        created_build = await build_repo.create(build_data, test_user.id)
+        
+        client_user2.post(f"/api/builds/{created_build.id}/ratings", json={"score": 4})
+        build = await build_repo.get_by_id(created_build.id)
+        assert build.rating_sum == 4
+        assert build.ratings_count == 1
+        assert build.average_rating == 4.0
+        
+        client_user2.put(f"/api/builds/{created_build.id}/ratings", json={"score": 2})
+        build = await build_repo.get_by_id(created_build.id)
+        assert build.rating_sum == 2
+        assert build.ratings_count == 1
+        
+        client_user2.delete(f"/api/builds/{created_build.id}/ratings")
+        build = await build_repo.get_by_id(created_build.id)
+        assert build.rating_sum == 0
+        assert build.ratings_count == 0
+        assert build.average_rating == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_top_and_sort_by_average_rating(
+        self, client_user2, test_user, test_components, db_session
+    ):
+        """Тест сортировки по среднему рейтингу в топе и в списке сборок"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        build_repo = BuildRepository(db_session)
+        component_ids = [c.id for c in test_components]
+        
+        builds = []
+        for title in ("Сборка низкая", "Сборка высокая", "Сборка без оценок"):
+            builds.append(await build_repo.create(
+                BuildCreate(
+                    title=title,
+                    description="Подробное описание сборки для тестирования",
+                    component_ids=component_ids
+                ),
+                test_user.id
+            ))
+        
+        client_user2.post(f"/api/builds/{builds[0].id}/ratings", json={"score": 2})
+        client_user2.post(f"/api/builds/{builds[1].id}/ratings", json={"score": 5})
+        
+        response = client_user2.get("/api/builds/top")
+        assert response.status_code == status.HTTP_200_OK
+        top_ids = [b["id"] for b in response.json()["builds"]]
+        assert top_ids == [builds[1].id, builds[0].id]
+        
+        response = client_user2.get("/api/builds/?sort_by=average_rating&order=desc")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [b["id"] for b in data["builds"]][:2] == [builds[1].id, builds[0].id]
+        assert data["builds"][0]["average_rating"] == 5.0
+        assert data["builds"][0]["ratings_count"] == 1
+
+
 class TestGetMyRating:
     """Тесты для получения моей оценки"""
     
@@ -877,6 +2060,61 @@ class TestGetComments:
         data = response.json()
         assert data["total"] == 3
         assert len(data["comments"]) == 3
+    
+    @pytest.mark.asyncio
+    async def test_get_comments_paginated_replies_and_counters(
+        self, client_user2, test_user, test_components, db_session
+    ):
+        """Тест постраничных ответов и денормализованных счетчиков комментариев"""
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        created_build = await BuildRepository(db_session).create(
+            BuildCreate(
+                title="Сборка",
+                description="Подробное описание сборки для тестирования",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user.id
+        )
+        comments_url = f"/api/builds/{created_build.id}/comments"
+        
+        root = client_user2.post(comments_url, json={"content": "Корневой"}).json()
+        reply_ids = [
+            client_user2.post(comments_url, json={"content": f"Ответ {i}", "parent_id": root["id"]}).json()["id"]
+            for i in range(5)
+        ]
+        
+        data = client_user2.get(f"{comments_url}?replies_limit=2").json()
+        assert data["total"] == 6
+        comment = data["comments"][0]
+        assert comment["replies_count"] == 5
+        assert [reply["id"] for reply in comment["replies"]] == reply_ids[:2]
+        
+        page = client_user2.get(
+            f"{comments_url}/{root['id']}/replies",
+            params={"limit": 2, "cursor": comment["replies_next_cursor"]}
+        ).json()
+        assert [reply["id"] for reply in page["replies"]] == reply_ids[2:4]
+        assert page["total"] == 5
+        
+        page = client_user2.get(
+            f"{comments_url}/{root['id']}/replies",
+            params={"limit": 2, "cursor": page["next_cursor"]}
+        ).json()
+        assert [reply["id"] for reply in page["replies"]] == reply_ids[4:]
+        assert page["next_cursor"] is None
+        
+        # Удаление ответа и ветки обновляет счетчики
+        client_user2.delete(f"{comments_url}/{reply_ids[0]}")
+        data = client_user2.get(comments_url).json()
+        assert data["total"] == 5
+        assert data["comments"][0]["replies_count"] == 4
+        
+        client_user2.delete(f"{comments_url}/{root['id']}")
+        data = client_user2.get(comments_url).json()
+        assert data["total"] == 0
+        assert client_user2.get(f"/api/builds/{created_build.id}").json()["comments_count"] == 0
 
 
 class TestUpdateComment:
@@ -1071,6 +2309,346 @@ class TestExportPDF:
         assert "attachment" in response.headers["content-disposition"]
         assert len(response.content) > 0
     
+    @pytest.mark.asyncio
+    async def test_export_pdf_cached_with_etag(
+        self, client, test_user, test_components, mock_pdf_generator, pdf_cache, db_session
+    ):
+        """Тест кеширования PDF на диске и ответа 304 по ETag"""
+        import os
+        from unittest.mock import AsyncMock
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        render = AsyncMock(side_effect=mock_pdf_generator.create_build_pdf)
+        mock_pdf_generator.create_build_pdf = render
+        
+        created_build = await BuildRepository(db_session).create(
+            BuildCreate(
+                title="Сборка для экспорта",
+                description="Описание сборки",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user.id
+        )
+        
+        first = client.get(f"/api/builds/{created_build.id}/export/pdf")
+        assert first.status_code == status.HTTP_200_OK
+        etag = first.headers["etag"]
+        
+        second = client.get(f"/api/builds/{created_build.id}/export/pdf")
+        assert second.content == first.content
+        assert second.headers["etag"] == etag
+        assert render.await_count == 1
+        
+        not_modified = client.get(
+            f"/api/builds/{created_build.id}/export/pdf",
+            headers={"If-None-Match": etag}
+        )
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified.content == b""
+        
+        # Изменение сборки дает новый ключ, старый файл удаляется
+        response = client.put(f"/api/builds/{created_build.id}", json={"title": "Новое название сборки"})
+        assert response.status_code == status.HTTP_200_OK
+        assert os.listdir(pdf_cache.cache_dir) == []
+        
+        third = client.get(f"/api/builds/{created_build.id}/export/pdf")
+        assert third.headers["etag"] != etag
+        assert render.await_count == 2
+    
+    def test_pdf_cache_lru_eviction(self, tmp_path):
+        """Тест вытеснения давно не использованных PDF по лимиту размера"""
+        import os
+        import asyncio
+        from app.services.pdf_cache import PDFCache
+        
+        cache = PDFCache(str(tmp_path), max_bytes=250)
+        
+        async def render(target):
+            target.write(b"x" * 100)
+        
+        async def fill():
+            (await cache.get_or_create(1, "a", render)).close()
+            (await cache.get_or_create(2, "b", render)).close()
+            os.utime(tmp_path / "1_a.pdf", (1, 1))
+            os.utime(tmp_path / "2_b.pdf", (2, 2))
+            # Чтение обновляет метку использования первого файла
+            cache.get(1, "a").close()
+            (await cache.get_or_create(3, "c", render)).close()
+        
+        asyncio.run(fill())
+        
+        assert os.path.exists(tmp_path / "1_a.pdf")
+        assert cache.get(2, "b") is None
+        assert os.path.exists(tmp_path / "3_c.pdf")
+    
+    def test_pdf_cache_keeps_returned_file(self, tmp_path):
+        """Тест: только что созданный PDF не вытесняется и читается после удаления из кеша"""
+        import asyncio
+        from app.services.pdf_cache import PDFCache
+        
+        cache = PDFCache(str(tmp_path), max_bytes=50)
+        
+        async def render(target):
+            target.write(b"x" * 100)
+        
+        # Файл больше лимита, но вытеснение не удаляет его
+        with asyncio.run(cache.get_or_create(1, "a", render)) as pdf_file:
+            assert pdf_file.read() == b"x" * 100
+        
+        # Открытый файл дочитывается, даже если его удалили (другой воркер, инвалидация)
+        with cache.get(1, "a") as pdf_file:
+            assert cache.invalidate(1) == 1
+            assert pdf_file.read() == b"x" * 100
+        assert cache.get(1, "a") is None
+    
+    def test_bulk_export_closes_unsent_pdfs_on_disconnect(self):
+        """Тест: при разрыве соединения готовые, но не отданные PDF закрываются"""
+        import io
+        import asyncio
+        from types import SimpleNamespace
+        from app.models.build import Build
+        from app.services.build_service import BuildService
+        
+        files = {}
+        
+        async def get_by_ids(ids):
+            return [Build(id=build_id) for build_id in ids]
+        
+        async def open_pdf(build):
+            files[build.id] = io.BytesIO(b"%PDF")
+            return files[build.id]
+        
+        service = BuildService(SimpleNamespace(get_by_ids=get_by_ids), None, None)
+        service._open_pdf_with_retry = open_pdf
+        
+        async def consume_one():
+            stream = service._iter_build_pdfs([1, 2, 3])
+            build, pdf_file = await stream.__anext__()
+            # Даем остальным задачам завершиться до разрыва
+            await asyncio.sleep(0.01)
+            await stream.aclose()
+            return build, pdf_file
+        
+        build, pdf_file = asyncio.run(consume_one())
+        
+        # Отданный файл закрывает потребитель, остальные — генератор
+        assert not pdf_file.closed
+        assert all(f.closed for build_id, f in files.items() if build_id != build.id)
+        assert len(files) == 3
+    
+    def test_render_pool_rejects_over_capacity(self):
+        """Тест отказа пула верстки при заполненной очереди"""
+        import time
+        import asyncio
+        from app.services.pdf_render_pool import PDFRenderPool, PDFRenderBusyError
+        
+        pool = PDFRenderPool(max_workers=1, max_queue=0)
+        
+        async def run_two():
+            first = asyncio.create_task(pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0)
+            assert pool.in_flight == 1
+            with pytest.raises(PDFRenderBusyError):
+                await pool.run(time.sleep, 0)
+            await first
+            assert pool.in_flight == 0
+        
+        try:
+            asyncio.run(run_two())
+        finally:
+            pool.shutdown()
+    
+    def test_render_snapshot_without_database(self):
+        """Тест верстки PDF по снимку сборки из простых данных"""
+        import io
+        from PIL import Image
+        from app.services.pdf_generator import PDFGenerator
+        
+        image_buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), color=(200, 10, 10)).save(image_buffer, format="PNG")
+        
+        snapshot = {
+            "title": "Сборка",
+            "description": "Описание",
+            "additional_info": None,
+            "author_name": "Автор",
+            "created_at": "01.01.2025 12:00",
+            "total_price": 15000,
+            "average_rating": 4.5,
+            "ratings_count": 2,
+            "views_count": 10,
+            "components": [
+                {"id": 1, "name": "Процессор", "price": 10000, "image": "http://img/1", "category_name": "Процессор"},
+                {"id": 2, "name": "Память", "price": 5000, "image": None, "category_name": "Оперативная память"},
+            ]
+        }
+        
+        pdf_bytes = PDFGenerator().render(snapshot, {1: image_buffer.getvalue()})
+        
+        assert pdf_bytes.startswith(b"%PDF")
+    
+    def test_pdf_assets_loaded_once(self, tmp_path, monkeypatch):
+        """Тест однократной загрузки шрифтов, логотипа и стилей PDF"""
+        from PIL import Image
+        from app.services import pdf_assets
+        
+        logo_path = str(tmp_path / "logo.png")
+        Image.new("RGBA", (400, 400), color=(0, 0, 0, 0)).save(logo_path)
+        
+        registered = []
+        original_register = pdf_assets.pdfmetrics.registerFont
+        monkeypatch.setattr(pdf_assets.pdfmetrics, "registerFont", lambda font: registered.append(font) or original_register(font))
+        
+        first = pdf_assets.get_pdf_assets(pdf_assets.DEFAULT_FONTS_DIR, logo_path)
+        second = pdf_assets.get_pdf_assets(pdf_assets.DEFAULT_FONTS_DIR, logo_path)
+        
+        assert first is second
+        assert len(registered) == 2
+        # Логотип уже уменьшен, а Image создается заново для каждого документа
+        assert first.logo_image() is not first.logo_image()
+        assert first.logo_image().drawHeight <= pdf_assets.LOGO_MAX_HEIGHT
+    
+    def test_fetch_images_concurrent_with_thumbnail_cache(self, tmp_path):
+        """Тест параллельной загрузки изображений с кешем миниатюр"""
+        import io
+        import asyncio
+        from PIL import Image
+        from app.services.pdf_generator import PDFGenerator
+        from app.services.thumbnail_cache import ThumbnailCache
+        
+        image_buffer = io.BytesIO()
+        Image.new("RGBA", (600, 300), color=(0, 0, 255, 128)).save(image_buffer, format="PNG")
+        source = image_buffer.getvalue()
+        
+        generator = PDFGenerator(
+            thumbnail_cache=ThumbnailCache(str(tmp_path), max_bytes=1024 * 1024),
+            image_concurrency=2,
+            image_timeout=0.2
+        )
+        downloads = []
+        active = 0
+        max_active = 0
+        
+        async def fake_download(url):
+            nonlocal active, max_active
+            downloads.append(url)
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(1 if url == "http://img/slow" else 0.01)
+            active -= 1
+            return source
+        
+        generator._download_image = fake_download
+        snapshot = {"components": [
+            {"id": 1, "image": "http://img/1"},
+            {"id": 2, "image": "http://img/2"},
+            {"id": 3, "image": "http://img/1"},
+            {"id": 4, "image": "http://img/3"},
+            {"id": 5, "image": "http://img/slow"},
+            {"id": 6, "image": None},
+        ]}
+        
+        images = asyncio.run(generator.fetch_images(snapshot))
+        
+        # Одинаковые URL загружаются один раз, медленное изображение пропускается по таймауту
+        assert sorted(downloads) == ["http://img/1", "http://img/2", "http://img/3", "http://img/slow"]
+        assert max_active <= 2
+        assert sorted(images) == [1, 2, 3, 4]
+        thumbnail = Image.open(io.BytesIO(images[1]))
+        assert thumbnail.format == "JPEG"
+        assert max(thumbnail.size) == 120
+        
+        # Повторный экспорт берет миниатюры с диска без сети
+        downloads.clear()
+        snapshot["components"].pop(4)
+        assert asyncio.run(generator.fetch_images(snapshot)) == images
+        assert downloads == []
+    
+    @pytest.mark.asyncio
+    async def test_export_pdf_busy(
+        self, client, test_user, test_components, db_session, mock_pdf_generator
+    ):
+        """Тест ответа 503 при переполненной очереди верстки"""
+        from unittest.mock import AsyncMock
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        from app.services.pdf_render_pool import PDFRenderBusyError
+        
+        mock_pdf_generator.create_build_pdf = AsyncMock(side_effect=PDFRenderBusyError())
+        
+        created_build = await BuildRepository(db_session).create(
+            BuildCreate(
+                title="Сборка для экспорта",
+                description="Описание сборки",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user.id
+        )
+        
+        response = client.get(f"/api/builds/{created_build.id}/export/pdf")
+        
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["retry-after"] == "5"
+    
+    @pytest.mark.asyncio
+    async def test_export_builds_zip(
+        self, client, test_user, test_user2, test_components, db_session, mock_pdf_generator
+    ):
+        """Тест массового экспорта сборок в ZIP с переиспользованием кеша PDF"""
+        import io
+        import zipfile
+        from unittest.mock import AsyncMock
+        from app.repositories.build_repository import BuildRepository
+        from app.schemas.build import BuildCreate
+        
+        render = AsyncMock(side_effect=mock_pdf_generator.create_build_pdf)
+        mock_pdf_generator.create_build_pdf = render
+        
+        build_repo = BuildRepository(db_session)
+        own_ids = []
+        for i in range(3):
+            build = await build_repo.create(
+                BuildCreate(
+                    title=f"Сборка {i + 1}",
+                    description="Описание сборки",
+                    component_ids=[c.id for c in test_components]
+                ),
+                test_user.id
+            )
+            own_ids.append(build.id)
+        foreign = await build_repo.create(
+            BuildCreate(
+                title="Чужая сборка",
+                description="Описание сборки",
+                component_ids=[c.id for c in test_components]
+            ),
+            test_user2.id
+        )
+        
+        # Чужие сборки в архив не попадают
+        response = client.post("/api/builds/export", json={"build_ids": own_ids + [foreign.id]})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        names = sorted(archive.namelist())
+        assert len(names) == 3
+        assert all(name.startswith(f"build_{build_id}_") for name, build_id in zip(names, own_ids))
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+        assert render.await_count == 3
+        
+        # Экспорт по фильтру берет PDF из кеша
+        response = client.post("/api/builds/export", json={"query": "Сборка"})
+        assert len(zipfile.ZipFile(io.BytesIO(response.content)).namelist()) == 3
+        assert render.await_count == 3
+        
+        response = client.post("/api/builds/export", json={"author_id": test_user2.id})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        
+        response = client.post("/api/builds/export", json={"build_ids": [foreign.id]})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
     @pytest.mark.asyncio
     async def test_export_pdf_not_found(self, client):
         """Тест экспорта PDF несуществующей сборки"""
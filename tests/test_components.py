@@ -1,6 +1,7 @@
 """
 Тесты для эндпоинтов components
 """
+import sys
 import pytest
 from fastapi import status
 from unittest.mock import AsyncMock
@@ -224,6 +225,273 @@ class TestGetComponentsByCategory:
         
         # Компоненты должны быть доступны всем
         assert response.status_code == status.HTTP_200_OK
+    
+    @pytest.mark.asyncio
+    async def test_get_components_by_category_from_catalog_snapshot(
+        self, client, db_session, test_components
+    ):
+        """Тест выдачи из снимка каталога с ETag версии"""
+        from app.services.component_catalog import component_catalog
+        
+        response = client.get("/api/components/by-category?category=PROCESSORY&query=intel")
+        assert response.status_code == status.HTTP_200_OK
+        assert [c["name"] for c in response.json()] == ["Intel Core i5-12400F"]
+        etag = response.headers["ETag"]
+        
+        # Совпадающий If-None-Match — 304 без тела (и для списка компонентов сборок)
+        response = client.get(
+            "/api/components/by-category?category=PROCESSORY",
+            headers={"If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        unique = client.get("/api/builds/components/unique")
+        assert unique.headers["ETag"] == etag
+        
+        # Новый компонент попадает в выдачу только с новой версией снимка
+        db_session.add(Component(
+            name="Intel Core i7-12700K",
+            link="https://example.com/cpu-i7",
+            price=30000,
+            category=ComponentCategory.PROCESSORY
+        ))
+        await db_session.commit()
+        response = client.get("/api/components/by-category?category=PROCESSORY")
+        assert response.headers["ETag"] == etag
+        assert len(response.json()) == 1
+        
+        await component_catalog.reload(db_session)
+        response = client.get(
+            "/api/components/by-category?category=PROCESSORY",
+            headers={"If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert [c["name"] for c in response.json()] == ["Intel Core i5-12400F", "Intel Core i7-12700K"]
+    
+    @pytest.mark.asyncio
+    async def test_catalog_snapshot_prefix_index_and_version_announce(
+        self, db_session, test_components
+    ):
+        """Тест поиска по префиксу и подмены снимка по объявлению версии"""
+        from contextlib import asynccontextmanager
+        from app.services.component_catalog import ComponentCatalog, CATALOG_CHANNEL
+        
+        catalog = ComponentCatalog()
+        snapshot = await catalog.get_snapshot(db_session)
+        assert [c.name for c in snapshot.search_prefix("deepcool")] == ["Deepcool AK400", "Deepcool Matrexx 55"]
+        assert [c.name for c in snapshot.search_prefix("DEEPCOOL", category=ComponentCategory.KORPUSA)] == ["Deepcool Matrexx 55"]
+        assert snapshot.search_prefix("xyz") == []
+        assert snapshot.get(test_components[0].id).name == test_components[0].name
+        
+        # Другой воркер изменил каталог и объявил новую версию
+        test_components[0].price = 16000
+        await db_session.commit()
+        
+        class FakeRedis:
+            def __init__(self):
+                self.channels = []
+            
+            async def get_raw(self, key):
+                return snapshot.version
+            
+            @asynccontextmanager
+            async def subscribe(self, channel):
+                self.channels.append(channel)
+                
+                async def messages():
+                    yield "new-version"
+                
+                yield messages()
+        
+        @asynccontextmanager
+        async def session_factory():
+            yield db_session
+        
+        fake_redis = FakeRedis()
+        await catalog.listen(fake_redis, session_factory)
+        
+        assert fake_redis.channels == [CATALOG_CHANNEL]
+        assert catalog.snapshot is not snapshot
+        assert catalog.snapshot.version != snapshot.version
+        assert catalog.snapshot.get(test_components[0].id).price == 16000
+        # Старый снимок не изменился
+        assert snapshot.get(test_components[0].id).price == 15000
+
+
+class TestComponentSync:
+    """Тесты для синхронизации каталога с результатами парсинга"""
+    
+    @pytest.mark.asyncio
+    async def test_bulk_upsert_counts_and_unique_link(self, db_session):
+        """Тест пакетного INSERT ... ON CONFLICT (link): счетчики, обновление и уникальность ссылки"""
+        from sqlalchemy import select
+        from sqlalchemy.exc import IntegrityError
+        from app.repositories.component_repository import ComponentRepository
+        
+        repo = ComponentRepository(db_session)
+        products = [
+            {"name": "AMD Ryzen 5 7600", "link": "https://example.com/r5-7600", "price": 20000, "image": None},
+            {"name": "Intel Core i5-13400F", "link": "https://example.com/i5-13400f", "price": 18000, "image": None},
+            {"name": "Intel Core i3-12100F", "link": "https://example.com/i3-12100f", "price": 8000, "image": None},
+        ]
+        counts = await repo.bulk_upsert(products, ComponentCategory.PROCESSORY, batch_size=2)
+        assert counts == {"inserted": 3, "updated": 0, "unchanged": 0}
+        
+        products = [
+            products[0],
+            {**products[1], "price": 17000},
+            {**products[2], "price": 7000},
+            {**products[2], "price": 7500},  # повтор ссылки — берется последний
+            {"name": "Intel Core i7-13700K", "link": "https://example.com/i7-13700k", "price": 35000, "image": None},
+            {"name": "Товар без ссылки", "link": "", "price": 100, "image": None},
+        ]
+        counts = await repo.bulk_upsert(products, ComponentCategory.PROCESSORY, batch_size=2)
+        assert counts == {"inserted": 1, "updated": 2, "unchanged": 1}
+        
+        db_session.expire_all()
+        components = {
+            c.link: c for c in (await db_session.execute(select(Component))).scalars()
+        }
+        assert len(components) == 4
+        assert components["https://example.com/i3-12100f"].price == 7500
+        assert components["https://example.com/i5-13400f"].updated_at is not None
+        assert components["https://example.com/r5-7600"].updated_at is None
+        assert components["https://example.com/r5-7600"].specs["socket"] == "AM5"
+        
+        db_session.add(Component(
+            name="Дубликат", link="https://example.com/r5-7600", category=ComponentCategory.PROCESSORY
+        ))
+        with pytest.raises(IntegrityError):
+            await db_session.commit()
+        await db_session.rollback()
+
+    
+    @pytest.mark.asyncio
+    async def test_staged_sync_marks_missing_unavailable(self, db_session, test_user, test_components):
+        """Тест полной синхронизации через промежуточную таблицу: каталог меняется одной транзакцией, сборки сохраняют компоненты"""
+        from sqlalchemy import select, func
+        from app.models.component import components_staging
+        from app.repositories.build_repository import BuildRepository
+        from app.repositories.component_repository import ComponentRepository
+        from app.schemas.build import BuildCreate
+        from app.services.component_catalog import ComponentCatalog
+        
+        old_cpu = Component(
+            name="Intel Core i3-10100F", link="https://example.com/cpu-old", price=6000,
+            category=ComponentCategory.PROCESSORY
+        )
+        db_session.add(old_cpu)
+        await db_session.commit()
+        old_cpu_id, cpu_id = old_cpu.id, test_components[0].id
+        build_id = (await BuildRepository(db_session).create(
+            BuildCreate(
+                title="Сборка со снятым процессором",
+                description="Процессор пропадет из магазина",
+                component_ids=[old_cpu.id] + [c.id for c in test_components[1:]]
+            ),
+            test_user.id
+        )).id
+        
+        repo = ComponentRepository(db_session)
+        await repo.clear_staging()
+        staged = await repo.stage([
+            {"name": "Intel Core i5-12400F", "link": "https://example.com/cpu", "price": 14000, "image": None},
+            {"name": "AMD Ryzen 5 7600", "link": "https://example.com/r5-7600", "price": 20000, "image": None},
+        ], ComponentCategory.PROCESSORY)
+        assert staged == 2
+        # Видеокарты получены не полностью — их компоненты не трогаем
+        await repo.stage([], ComponentCategory.VIDEOKARTY)
+        
+        # До переноса каталог не изменился
+        assert await repo.count() == 9
+        assert (await repo.get_by_id(test_components[0].id)).price == 15000
+        
+        counts = await repo.apply_staging([ComponentCategory.PROCESSORY])
+        assert counts == {"inserted": 1, "updated": 1, "unchanged": 0, "unavailable": 1}
+        assert (await db_session.execute(select(func.count()).select_from(components_staging))).scalar() == 0
+        
+        db_session.expire_all()
+        availability = {
+            c.link: c.is_available for c in (await db_session.execute(select(Component))).scalars()
+        }
+        assert availability.pop("https://example.com/cpu-old") is False
+        assert all(availability.values()) and len(availability) == 9
+        assert (await repo.get_by_id(cpu_id)).price == 14000
+        
+        # Снятый товар остается в сборке, но не попадает в снимок каталога
+        build = await BuildRepository(db_session).get_by_id(build_id, populate_existing=True)
+        assert old_cpu_id in {c.id for c in build.components}
+        snapshot = await ComponentCatalog().reload(db_session)
+        assert snapshot.get(old_cpu_id) is None
+        assert len(snapshot) == 9
+        
+        # Вернувшийся в магазин товар снова доступен
+        counts = await repo.bulk_upsert(
+            [{"name": "Intel Core i3-10100F", "link": "https://example.com/cpu-old", "price": 6000, "image": None}],
+            ComponentCategory.PROCESSORY
+        )
+        assert counts == {"inserted": 0, "updated": 1, "unchanged": 0}
+        db_session.expire_all()
+        assert (await repo.get_by_id(old_cpu_id)).is_available is True
+    
+    @pytest.mark.asyncio
+    async def test_partially_fetched_category_not_synced(
+        self, db_session, test_components, mock_redis_service, component_parser_module, monkeypatch
+    ):
+        """Тест: категория, страница которой не загрузилась, не передается в apply_staging"""
+        from unittest.mock import MagicMock
+        from sqlalchemy import select
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from app.repositories.component_repository import ComponentRepository
+        
+        shop = sys.modules["app.services.shop_parser"]
+        monkeypatch.setattr(component_parser_module, "create_async_engine", lambda *args, **kwargs: MagicMock(dispose=AsyncMock()))
+        monkeypatch.setattr(
+            component_parser_module, "async_sessionmaker",
+            lambda *args, **kwargs: async_sessionmaker(db_session.bind, expire_on_commit=False)
+        )
+        monkeypatch.setattr(component_parser_module, "component_catalog", MagicMock(publish=AsyncMock()))
+        
+        synced = []
+        apply_staging = ComponentRepository.apply_staging
+        
+        async def record_apply_staging(self, categories):
+            synced.extend(categories)
+            return await apply_staging(self, categories)
+        
+        monkeypatch.setattr(ComponentRepository, "apply_staging", record_apply_staging)
+        
+        async def request(url):
+            path, page = url.split("/?page=")
+            slug = path.rsplit("/", 1)[1]
+            if page == "1":
+                return _listing_html(f"{slug}-new"), None
+            if slug == "videokarty":
+                # Вторая страница видеокарт не загрузилась после всех повторов
+                return None, None
+            return "", None
+        
+        parser = shop.ShopParser(use_cache=False, rate=1000, burst=100)
+        parser.session = object()
+        parser._request = request
+        service = component_parser_module.ComponentParserService(mock_redis_service, parser)
+        await service._parse_all_categories(None, clear_existing=True)
+        
+        assert ComponentCategory.PROCESSORY in synced
+        assert ComponentCategory.VIDEOKARTY not in synced
+        status_errors = mock_redis_service.set.call_args_list[-1].args[1]["errors"]
+        assert any("Видеокарты" in error for error in status_errors)
+        
+        db_session.expire_all()
+        availability = {
+            c.link: c.is_available for c in (await db_session.execute(select(Component))).scalars()
+        }
+        # Товары не полностью полученной категории не становятся недоступными
+        assert availability["https://example.com/gpu"] is True
+        assert availability["https://example.com/cpu"] is False
+        assert availability[f"{parser.base_url}/protsessory-new"] is True
+        assert f"{parser.base_url}/videokarty-new" not in availability
 
 
 class TestParseComponents:
@@ -465,3 +733,158 @@ class TestStopParsing:
         
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+
+
+def _listing_html(*names):
+    """HTML страницы списка товаров магазина"""
+    return "".join(
+        f'<div class="products__item"><div class="products__img-wrap"><a><span><img src="/{name}.png"></span></a></div>'
+        f'<div class="products__content"><a href="/{name}">{name}</a>'
+        f'<div class="products__prices"><div class="prices__price">1 000 ₽</div></div></div></div>'
+        for name in names
+    )
+
+
+class TestShopParser:
+    """Тесты обхода магазина: ограничение частоты, повторы и постраничная загрузка"""
+    
+    @staticmethod
+    def _parser(module, pages, **kwargs):
+        """Парсер без сети и кеша: pages — функция номер страницы -> (HTML, задержка повтора)"""
+        parser = module.ShopParser(use_cache=False, rate=1000, burst=100, **kwargs)
+        parser.session = object()
+        parser.requested = []
+        
+        async def request(url):
+            page = int(url.rsplit("page=", 1)[1])
+            parser.requested.append(page)
+            return await pages(page)
+        
+        parser._request = request
+        return parser
+    
+    @pytest.mark.asyncio
+    async def test_token_bucket_limits_burst_and_rate(self, shop_parser_module):
+        """Тест: всплеск проходит сразу, дальше запросы идут не чаще rate в секунду"""
+        import asyncio
+        
+        bucket = shop_parser_module.TokenBucket(rate=20, capacity=3)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await bucket.acquire()
+        assert loop.time() - start < 0.05
+        for _ in range(4):
+            await bucket.acquire()
+        # 4 запроса сверх всплеска при 20 в секунду — не быстрее 0.2 с
+        assert loop.time() - start >= 0.19
+    
+    @pytest.mark.asyncio
+    async def test_scheduler_limits_concurrency(self, shop_parser_module):
+        """Тест: одновременно выполняется не больше max_concurrent запросов"""
+        import asyncio
+        
+        scheduler = shop_parser_module.CrawlScheduler(max_concurrent=2, rate=1000, burst=100)
+        active, peak = 0, 0
+        
+        async def request():
+            nonlocal active, peak
+            async with scheduler.slot("https://shop.example/category/cpu/?page=1"):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+        
+        await asyncio.gather(*(request() for _ in range(6)))
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_fetch_page_retries_and_honours_retry_after(self, shop_parser_module, monkeypatch):
+        """Тест повторов: задержка не меньше Retry-After, постоянные ошибки не повторяются"""
+        import asyncio
+        from unittest.mock import MagicMock
+        
+        monkeypatch.setattr(shop_parser_module.ShopParser, "_backoff_delay", staticmethod(lambda attempt: 0.0))
+        responses = iter([(None, 0.2), (None, 0.0), ("<html></html>", None)])
+        
+        async def flaky(page):
+            return next(responses)
+        
+        parser = self._parser(shop_parser_module, flaky)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        assert await parser.fetch_page("https://shop.example/category/cpu/?page=1") == "<html></html>"
+        assert loop.time() - start >= 0.2
+        assert parser.requested == [1, 1, 1]
+        
+        async def always_busy(page):
+            return None, 0.0
+        
+        parser = self._parser(shop_parser_module, always_busy, max_retries=2)
+        assert await parser.fetch_page("https://shop.example/category/cpu/?page=1") is None
+        assert parser.requested == [1, 1, 1]
+        
+        async def forbidden(page):
+            return None, None
+        
+        parser = self._parser(shop_parser_module, forbidden)
+        assert await parser.fetch_page("https://shop.example/category/cpu/?page=1") is None
+        assert parser.requested == [1]
+        
+        retry_after = shop_parser_module.ShopParser._retry_after
+        assert retry_after(MagicMock(headers={"Retry-After": "3"})) == 3.0
+        assert retry_after(MagicMock(headers={"Retry-After": "3600"})) == shop_parser_module.BACKOFF_MAX
+        assert retry_after(MagicMock(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+        assert retry_after(MagicMock(headers={})) == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_listing_stops_at_first_empty_page(self, shop_parser_module):
+        """Тест: первая пустая страница завершает список, запросы за ней отменяются"""
+        import asyncio
+        
+        cancelled = []
+        
+        async def pages(page):
+            if page <= 2:
+                return _listing_html(f"p{page}-a", f"p{page}-b"), None
+            if page == 3:
+                # Страница за концом списка (404)
+                return "", None
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(page)
+                raise
+        
+        parser = self._parser(shop_parser_module, pages, max_concurrent=4)
+        products = await parser.get_category(shop_parser_module.ComponentsCategory.PROCESSORY)
+        
+        assert [product["name"] for product in products] == ["p1-a", "p1-b", "p2-a", "p2-b"]
+        assert products[0]["price"] == 1000
+        # Страницы загружались с опережением, и все начатые запросы за концом списка отменены
+        assert 4 in cancelled
+        assert sorted(cancelled) == sorted(page for page in parser.requested if page > 3)
+    
+    @pytest.mark.asyncio
+    async def test_failed_page_fails_category(self, shop_parser_module):
+        """Тест: страница, не загрузившаяся после повторов, не считается концом списка"""
+        import asyncio
+        
+        cancelled = []
+        
+        async def pages(page):
+            if page == 1:
+                return _listing_html("p1-a"), None
+            if page == 2:
+                return None, None
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(page)
+                raise
+        
+        parser = self._parser(shop_parser_module, pages, max_concurrent=3)
+        with pytest.raises(shop_parser_module.PageFetchError):
+            await parser.get_category(shop_parser_module.ComponentsCategory.PROCESSORY)
+        assert 3 in cancelled
+        assert sorted(cancelled) == sorted(page for page in parser.requested if page > 2)